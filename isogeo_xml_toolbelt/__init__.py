@@ -9,8 +9,11 @@
 from .__about__ import __version__  # noqa: F401
 
 # subpackages
+from .comparators import *  # noqa: F401,F403
+from .fixers import *  # noqa: F401,F403
 from .models import *  # noqa: F401,F403
 from .readers import *  # noqa: F401,F403
 from .utils import *  # noqa: F401,F403
+from .validators import *  # noqa: F401,F403
 
 VERSION = __version__
@@ -0,0 +1,13 @@
+# coding: utf-8
+#! python3  # noqa: E265
+
+from .record_diff import (  # noqa: F401,F403
+    ElementChange,
+    FieldChange,
+    RecordDiff,
+    diff_fields,
+    diff_many,
+    diff_records,
+    diff_trees,
+    subtree_hashes,
+)
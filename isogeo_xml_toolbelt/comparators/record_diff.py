@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Records diff
+
+    Purpose:     Tell what changed between two versions of a metadata record:
+    fields read by the readers (asDict) and XML elements. Subtrees are hashed
+    bottom-up (Merkle tree), so that identical sections are skipped by comparing
+    a single hash.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import hashlib
+import logging
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 3rd party library
+from lxml import etree
+
+# submodules
+from isogeo_xml_toolbelt.readers.reader_factory import read_metadata
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# fields which are not compared: they don't depend on the content
+IGNORED_FIELDS = frozenset(("filename",))
+
+# changes
+FieldChange = namedtuple("FieldChange", ["field", "old", "new"])
+ElementChange = namedtuple("ElementChange", ["path", "kind", "old", "new"])
+RecordDiff = namedtuple("RecordDiff", ["old", "new", "status", "fields", "elements"])
+
+# columns of the diff report
+REPORT_HEADERS = ["old", "new", "status", "fields", "elements", "error"]
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def subtree_hashes(root) -> dict:
+    """Hash every subtree of a XML tree: the hash of an element covers its tag,
+    attributes, text (stripped) and the hashes of its children, in order.
+    Comments, processing instructions and tails are ignored.
+
+    :param lxml.etree._Element root: root element.
+
+    :return: {element: digest}
+    """
+    hashes = {}
+    # reversed document order: children are hashed before their parent
+    for elem in reversed(list(root.iter(tag=etree.Element))):
+        digest = hashlib.blake2b(elem.tag.encode("utf-8"), digest_size=16)
+        for name, value in sorted(elem.attrib.items()):
+            digest.update("\0{}={}".format(name, value).encode("utf-8"))
+        digest.update(b"\0" + (elem.text or "").strip().encode("utf-8"))
+        for child in elem.iterchildren(tag=etree.Element):
+            digest.update(hashes.get(child))
+        hashes[elem] = digest.digest()
+    return hashes
+
+
+def diff_fields(old: dict, new: dict, ignored=IGNORED_FIELDS) -> list:
+    """Compare two records read as dicts (see the readers asDict methods).
+
+    :param dict old: old version.
+    :param dict new: new version.
+    :param ignored: names of the fields not to compare.
+
+    :return: list of FieldChange, in fields order.
+    """
+    changes = []
+    for field in list(old) + [i for i in new if i not in old]:
+        if field in ignored:
+            continue
+        if old.get(field) != new.get(field):
+            changes.append(FieldChange(field, old.get(field), new.get(field)))
+    return changes
+
+
+def _qname(elem) -> str:
+    """Return the prefixed name of an element."""
+    qname = etree.QName(elem)
+    if elem.prefix:
+        return "{}:{}".format(elem.prefix, qname.localname)
+    return qname.localname
+
+
+def _text(elem) -> str:
+    """Return the text content of a subtree."""
+    return " ".join(i.strip() for i in elem.itertext() if i.strip())
+
+
+def diff_trees(old_root, new_root, old_hashes: dict = None, new_hashes: dict = None) -> list:
+    """Compare two XML trees. Children are paired by tag and position among
+    the children with the same tag; pairs with the same subtree hash are skipped.
+
+    :param lxml.etree._Element old_root: root element of the old version.
+    :param lxml.etree._Element new_root: root element of the new version.
+    :param dict old_hashes: subtree hashes of the old version. Computed if not set.
+    :param dict new_hashes: subtree hashes of the new version. Computed if not set.
+
+    :return: list of ElementChange: path (like `/gmd:MD_Metadata/gmd:contact[2]`,
+        `/@attribute` for attributes), kind (`added`, `removed` or `modified`),
+        old and new values (text content of the subtree, or attribute value).
+    """
+    old_hashes = old_hashes or subtree_hashes(old_root)
+    new_hashes = new_hashes or subtree_hashes(new_root)
+    changes = []
+    if old_hashes.get(old_root) == new_hashes.get(new_root):
+        return changes
+    if old_root.tag != new_root.tag:
+        path = "/" + _qname(old_root)
+        return [ElementChange(path, "modified", _text(old_root), _text(new_root))]
+
+    stack = [("/" + _qname(old_root), old_root, new_root)]
+    while stack:
+        path, old, new = stack.pop()
+        if new is None:
+            changes.append(ElementChange(path, "removed", _text(old), None))
+            continue
+        if old is None:
+            changes.append(ElementChange(path, "added", None, _text(new)))
+            continue
+
+        # element itself
+        old_text, new_text = (old.text or "").strip(), (new.text or "").strip()
+        if old_text != new_text:
+            changes.append(ElementChange(path, "modified", old_text, new_text))
+        for name in sorted(set(old.attrib) | set(new.attrib)):
+            if old.get(name) != new.get(name):
+                kind = "modified"
+                if name not in old.attrib:
+                    kind = "added"
+                elif name not in new.attrib:
+                    kind = "removed"
+                changes.append(
+                    ElementChange(
+                        "{}/@{}".format(path, _qname_attribute(old, name)),
+                        kind,
+                        old.get(name),
+                        new.get(name),
+                    )
+                )
+
+        # children, paired by tag and position
+        old_children, new_children = {}, {}
+        for elem, children in ((old, old_children), (new, new_children)):
+            for child in elem.iterchildren(tag=etree.Element):
+                children.setdefault(child.tag, []).append(child)
+        pairs = []
+        for tag in list(old_children) + [i for i in new_children if i not in old_children]:
+            olds, news = old_children.get(tag, []), new_children.get(tag, [])
+            for index in range(max(len(olds), len(news))):
+                old_child = olds[index] if index < len(olds) else None
+                new_child = news[index] if index < len(news) else None
+                child = old_child if old_child is not None else new_child
+                child_path = "{}/{}".format(path, _qname(child))
+                if max(len(olds), len(news)) > 1:
+                    child_path += "[{}]".format(index + 1)
+                pairs.append((child_path, old_child, new_child))
+
+        # reversed, to report the changes in document order
+        for child_path, old_child, new_child in reversed(pairs):
+            if old_child is None or new_child is None or (
+                old_hashes.get(old_child) != new_hashes.get(new_child)
+            ):
+                stack.append((child_path, old_child, new_child))
+    return changes
+
+
+def _qname_attribute(elem, name: str) -> str:
+    """Return the prefixed name of an attribute of an element."""
+    qname = etree.QName(name)
+    if qname.namespace is None:
+        return name
+    for prefix, uri in elem.nsmap.items():
+        if uri == qname.namespace and prefix:
+            return "{}:{}".format(prefix, qname.localname)
+    return name
+
+
+def diff_records(old_xml: Path, new_xml: Path) -> RecordDiff:
+    """Compare two versions of a metadata record. Identical files are not
+    parsed, and records are read only if their trees differ.
+
+    :param pathlib.Path old_xml: path to the old version.
+    :param pathlib.Path new_xml: path to the new version.
+
+    :return: named tuple (old, new, status, fields, elements) where status is
+        `identical` or `changed`, fields a list of FieldChange (empty if the schema
+        is not supported by the readers) and elements a list of ElementChange.
+    """
+    old_xml, new_xml = Path(old_xml), Path(new_xml)
+    if old_xml.read_bytes() == new_xml.read_bytes():
+        return RecordDiff(str(old_xml), str(new_xml), "identical", [], [])
+
+    parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+    old_root = etree.parse(str(old_xml), parser).getroot()
+    new_root = etree.parse(str(new_xml), parser).getroot()
+    elements = diff_trees(old_root, new_root)
+    if not elements:
+        return RecordDiff(str(old_xml), str(new_xml), "identical", [], [])
+
+    fields = []
+    old_md, new_md = read_metadata(old_xml), read_metadata(new_xml)
+    if old_md is not None and new_md is not None:
+        fields = diff_fields(old_md.asDict(), new_md.asDict())
+    return RecordDiff(str(old_xml), str(new_xml), "changed", fields, elements)
+
+
+def diff_one(paths: tuple) -> dict:
+    """Compare two versions of a record. Errors are reported instead of raised.
+
+    :param tuple paths: (old version path, new version path)
+    :return: report row: old, new, status (`identical`, `changed` or `error`),
+        changed fields names, number of changed elements, error.
+    """
+    old_xml, new_xml = paths
+    row = {"old": str(old_xml), "new": str(new_xml), "fields": "", "elements": 0, "error": ""}
+    try:
+        record_diff = diff_records(old_xml, new_xml)
+    except Exception as err:
+        logging.error("Comparing {} and {} failed: {}".format(old_xml, new_xml, err))
+        row.update(status="error", error="{}: {}".format(type(err).__name__, err))
+    else:
+        row.update(
+            status=record_diff.status,
+            fields="|".join(i.field for i in record_diff.fields),
+            elements=len(record_diff.elements),
+        )
+    return row
+
+
+def diff_many(pairs, jobs: int = 1) -> list:
+    """Compare a set of records pairs over a pool of processes.
+
+    :param pairs: iterable of tuples (old version path, new version path).
+    :param int jobs: number of worker processes. Default: 1 (sequential).
+
+    :return: list of report rows (see diff_one), in pairs order.
+    """
+    pairs = [(Path(old), Path(new)) for old, new in pairs]
+    if jobs <= 1:
+        report = [diff_one(i) for i in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as workers:
+            chunksize = max(1, len(pairs) // (jobs * 8))
+            report = list(workers.map(diff_one, pairs, chunksize=chunksize))
+
+    changed = sum(1 for row in report if row.get("status") == "changed")
+    logging.info("{} records compared, {} changed".format(len(report), changed))
+    return report
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    record_diff = diff_records(
+        Path("tests/fixtures/iso19139/sample_19139.xml"),
+        Path("tests/output/fixed_19139.xml"),
+    )
+    for change in record_diff.fields + record_diff.elements:
+        print(change)
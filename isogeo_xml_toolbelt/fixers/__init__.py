@@ -0,0 +1,7 @@
+# coding: utf-8
+#! python3  # noqa: E265
+
+from .fixer_iso19139 import MetadataIso19139Fixer, fix_many  # noqa: F401,F403
+from .fix_rules import FixRule, FixRuleSet  # noqa: F401,F403
+from .fix_stream import stream_fix  # noqa: F401,F403
+from .fix_manifest import FixManifest  # noqa: F401,F403
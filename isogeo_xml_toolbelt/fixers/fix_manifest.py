@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Fix manifest
+
+    Purpose:     Remember how each file was fixed (input hash, rule set
+    fingerprint, output hash) so that a re-run skips the files which didn't
+    change, without parsing them.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# size of the chunks read from the hashed files
+READ_CHUNK = 1024 * 1024
+
+# mode of the written files, as created by open(): temporary files are only
+# readable by their owner
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def file_hash(path: Path) -> str:
+    """Return the sha256 checksum of a file.
+
+    :param pathlib.Path path: path to the file.
+    """
+    sha256 = hashlib.sha256()
+    with Path(path).open("rb") as in_file:
+        for chunk in iter(lambda: in_file.read(READ_CHUNK), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_unchanged(xml: Path, output: Path, entry: dict, fingerprint: str) -> tuple:
+    """Check if a file was already fixed into its output with the same rules.
+    Return (unchanged, input hash): the input hash is computed once, to be
+    recorded if the file has to be fixed.
+
+    :param pathlib.Path xml: path to the input XML file.
+    :param pathlib.Path output: path to the output XML file.
+    :param dict entry: manifest entry of the input, or None.
+    :param str fingerprint: fingerprint of the rule set.
+    """
+    input_hash = file_hash(xml)
+    if not entry or entry.get("rules") != fingerprint:
+        return False, input_hash
+    if entry.get("input") != input_hash or not Path(output).is_file():
+        return False, input_hash
+    return file_hash(output) == entry.get("output"), input_hash
+
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class FixManifest(object):
+    """Manifest of fixed files: {input path: {input, rules, output}}, hashes
+    being sha256 checksums and rules the fingerprint of the rule set.
+
+    The manifest is loaded when instanciated and written atomically when closed.
+
+    :param pathlib.Path path: path to the JSON manifest.
+    """
+
+    def __init__(self, path: Path):
+        """Instanciation: load the existing manifest."""
+        if not isinstance(path, Path):
+            raise TypeError(
+                "Manifest path must be a 'pathlib.Path' instance not {}".format(
+                    type(path)
+                )
+            )
+        self.path = path
+        self.entries = {}
+        if self.path.is_file():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError as err:
+                logging.warning(
+                    "Invalid manifest ignored ({}): {}".format(err, self.path)
+                )
+            logging.info(
+                "{} entries loaded from manifest: {}".format(
+                    len(self.entries), self.path
+                )
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, xml: Path) -> dict:
+        """Return the entry of an input file, or None.
+
+        :param pathlib.Path xml: path to the input XML file.
+        """
+        return self.entries.get(str(xml))
+
+    def record(self, xml: Path, input_hash: str, fingerprint: str, output_hash: str):
+        """Record how an input file was fixed.
+
+        :param pathlib.Path xml: path to the input XML file.
+        :param str input_hash: checksum of the input file.
+        :param str fingerprint: fingerprint of the rule set.
+        :param str output_hash: checksum of the output file.
+        """
+        self.entries[str(xml)] = {
+            "input": input_hash,
+            "rules": fingerprint,
+            "output": output_hash,
+        }
+
+    def close(self):
+        """Write the manifest into a temporary file renamed into place."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".{}.".format(self.path.name), suffix=".tmp", dir=str(self.path.parent)
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as out_file:
+                json.dump(self.entries, out_file, indent=1, sort_keys=True)
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, str(self.path))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    sample = Path("tests/fixtures/iso19139/sample_19139.xml")
+    with FixManifest(Path("tests/output/fix_manifest.json")) as manifest:
+        print(is_unchanged(sample, sample, manifest.get(sample), "rules"))
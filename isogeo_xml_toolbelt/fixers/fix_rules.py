@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Fix rules
+
+    Purpose:     Declarative fix rules (anchor path, predicate, action) loaded
+    from JSON or YAML and compiled into a dispatch table keyed by element tag,
+    so that a set of rules is applied in a single traversal of the tree.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import hashlib
+import json
+import logging
+import re
+from collections import deque
+from copy import deepcopy
+from pathlib import Path
+from string import Template
+from xml.sax.saxutils import escape
+
+# 3rd party library
+from lxml import etree
+
+# optional
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+NAMESPACES = {
+    "gts": "http://www.isotc211.org/2005/gts",
+    "gml": "http://www.opengis.net/gml",
+    "xsi": "http://www.w3.org/2001/XMLSchema-instance",
+    "gco": "http://www.isotc211.org/2005/gco",
+    "gmd": "http://www.isotc211.org/2005/gmd",
+    "gmx": "http://www.isotc211.org/2005/gmx",
+    "srv": "http://www.isotc211.org/2005/srv",
+    "xl": "http://www.w3.org/1999/xlink",
+}
+
+# supported actions and predicates
+ACTIONS = ("insert", "replace", "remove", "set-attr")
+PREDICATES = ("missing", "exists")
+
+# entities escaped in the variables substituted into xml, besides &, < and >
+XML_ENTITIES = {'"': "&quot;", "'": "&apos;"}
+
+# string literals of a path
+PATH_LITERAL = re.compile(r"""('[^']*'|"[^"]*")""")
+
+# rule sets shipped with the package
+RULES_FOLDER = Path(__file__).parent / "rules"
+DEFAULT_RULES = RULES_FOLDER / "iso19139_default.json"
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def qualify(name: str, namespaces: dict = NAMESPACES) -> str:
+    """Return the Clark notation of a prefixed name: `gmd:date` →
+    `{http://www.isotc211.org/2005/gmd}date`.
+
+    :param str name: prefixed name
+    :param dict namespaces: {prefix: namespace URI}
+    """
+    if ":" not in name:
+        return name
+    prefix, local_name = name.split(":")
+    if prefix not in namespaces:
+        raise ValueError("Unknown namespace prefix: {}".format(name))
+    return "{{{}}}{}".format(namespaces.get(prefix), local_name)
+
+
+def first_step(path: str, namespaces: dict = NAMESPACES) -> str:
+    """Return the qualified tag of the first step of a relative path, or None
+    if the path is empty or doesn't start with a child element name (`.`, `*`,
+    `//`...).
+
+    :param str path: relative path, like `gmd:code/gco:CharacterString`.
+    :param dict namespaces: {prefix: namespace URI}
+    """
+    if not path:
+        return None
+    step = re.split(r"[/\[]", path, maxsplit=1)[0]
+    if not re.match(r"^[\w.-]+:[\w.-]+$|^[A-Za-z_][\w.-]*$", step):
+        return None
+    return qualify(step, namespaces)
+
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class FixRule(object):
+    """A fix rule: when an element is found at the anchor path and the predicate
+    is verified, the action is applied to the anchor or to its target sub-elements.
+
+    :param dict spec: rule specification, with keys:
+
+        - name: rule name, reported when the rule is applied.
+        - anchor: absolute path of the anchor element, from the root element,
+          like `gmd:MD_Metadata/gmd:identificationInfo`.
+        - action: one of `insert`, `replace`, `remove` or `set-attr`.
+        - target: path of the elements to act on, relative to the anchor. Optional:
+          the anchor itself by default (insert appends into the target).
+        - missing / exists: optional predicate, a path relative to the anchor which
+          must be missing or must exist for the rule to apply. Inserting rules
+          should check that what they insert is missing, so that fixing a fixed
+          file changes nothing.
+        - xml: XML fragment to insert, or to replace the targets with.
+        - text: text to set to the targets (replace).
+        - attribute, value: attribute to set to the targets (set-attr).
+
+        `${variable}` in predicates, xml, text and value are substituted with the
+        variables. Values are escaped in xml, and quoted again in the string
+        literals of predicates: `[@xl:title='${label}']` matches a label with
+        a `'`.
+
+    :param dict variables: {variable name: value}
+    :param dict namespaces: {prefix: namespace URI}
+    :param int index: position of the rule in its rule set.
+    """
+
+    def __init__(
+        self,
+        spec: dict,
+        variables: dict = None,
+        namespaces: dict = NAMESPACES,
+        index: int = 0,
+    ):
+        """Instanciation: check and compile the specification."""
+        self.name = spec.get("name", "rule_{}".format(index))
+        self.index = index
+        self.namespaces = namespaces
+        self.action = spec.get("action")
+        if self.action not in ACTIONS:
+            raise ValueError(
+                "Rule {}: action ({}) must be one of: {}".format(
+                    self.name, self.action, ", ".join(ACTIONS)
+                )
+            )
+        if not spec.get("anchor"):
+            raise ValueError("Rule {}: anchor is required".format(self.name))
+        self.anchor = tuple(
+            qualify(i, namespaces) for i in spec.get("anchor").strip("/").split("/")
+        )
+        self.target = spec.get("target")
+        self.target_step = first_step(self.target, namespaces)
+
+        # predicate and values
+        variables = variables or {}
+        try:
+            self.predicate = None
+            for predicate in PREDICATES:
+                if spec.get(predicate):
+                    self.predicate = (
+                        predicate,
+                        self._substitute_path(spec.get(predicate), variables),
+                    )
+            self.text = self._substitute(spec.get("text"), variables)
+            self.value = self._substitute(spec.get("value"), variables)
+            xml = self._substitute(
+                spec.get("xml"),
+                {
+                    name: escape(str(value), XML_ENTITIES)
+                    for name, value in variables.items()
+                },
+            )
+        except KeyError as err:
+            raise ValueError("Rule {}: unknown variable {}".format(self.name, err))
+        self.predicate_step = first_step(self.predicate and self.predicate[1], namespaces)
+        self.attribute = spec.get("attribute")
+        if self.attribute:
+            self.attribute = qualify(self.attribute, namespaces)
+        self.fragment = self._parse_fragment(xml) if xml else []
+
+        # required values by action
+        if self.action == "insert" and not self.fragment:
+            raise ValueError("Rule {}: insert requires xml".format(self.name))
+        if self.action == "replace" and not (self.fragment or self.text is not None):
+            raise ValueError("Rule {}: replace requires xml or text".format(self.name))
+        if self.action == "set-attr" and not (self.attribute and self.value is not None):
+            raise ValueError(
+                "Rule {}: set-attr requires attribute and value".format(self.name)
+            )
+
+    @staticmethod
+    def _substitute(template: str, variables: dict) -> str:
+        """Substitute the variables into a template, None being kept."""
+        if template is None:
+            return None
+        return Template(template).substitute(variables)
+
+    def _substitute_path(self, template: str, variables: dict) -> str:
+        """Substitute the variables into a path, its string literals being quoted
+        again to fit their values, None being kept."""
+        if template is None:
+            return None
+        parts = PATH_LITERAL.split(template)
+        for position in range(0, len(parts), 2):
+            parts[position] = self._substitute(parts[position], variables)
+        # odd parts are the string literals
+        for position in range(1, len(parts), 2):
+            value = self._substitute(parts[position][1:-1], variables)
+            if "'" not in value:
+                parts[position] = "'{}'".format(value)
+            elif '"' not in value:
+                parts[position] = '"{}"'.format(value)
+            else:
+                raise ValueError(
+                    "Rule {}: both quotes can't be used in a path: {}".format(
+                        self.name, value
+                    )
+                )
+        return "".join(parts)
+
+    def _parse_fragment(self, xml: str) -> list:
+        """Parse a XML fragment, its prefixes being declared by the namespaces."""
+        wrapper = "<fragment {}>{}</fragment>".format(
+            " ".join(
+                'xmlns:{}="{}"'.format(prefix, uri)
+                for prefix, uri in self.namespaces.items()
+            ),
+            xml,
+        )
+        parser = etree.XMLParser(remove_blank_text=True)
+        try:
+            return list(etree.fromstring(wrapper.encode("utf-8"), parser))
+        except etree.XMLSyntaxError as err:
+            raise ValueError("Rule {}: invalid xml ({})".format(self.name, err))
+
+    def check(self, anchor) -> bool:
+        """Return True if the predicate is verified for an anchor element.
+
+        :param lxml.etree._Element anchor: anchor element.
+        """
+        if self.predicate is None:
+            return True
+        predicate, path = self.predicate
+        found = bool(self.find_all(anchor, path))
+        return found if predicate == "exists" else not found
+
+    def find_all(self, anchor, path: str) -> list:
+        """Return the elements matching a path relative to an anchor element.
+
+        :param lxml.etree._Element anchor: anchor element.
+        :param str path: relative path.
+        """
+        return anchor.findall(path, self.namespaces)
+
+    def apply(self, anchor) -> bool:
+        """Apply the rule to an anchor element. Return True if the tree changed.
+
+        :param lxml.etree._Element anchor: anchor element.
+        """
+        if not self.check(anchor):
+            return False
+        return self.act(self.find_targets(anchor))
+
+    def find_targets(self, anchor) -> list:
+        """Return the elements to act on for an anchor element.
+
+        :param lxml.etree._Element anchor: anchor element.
+        """
+        if self.target:
+            return self.find_all(anchor, self.target)
+        return [anchor]
+
+    def act(self, targets: list) -> bool:
+        """Apply the action to target elements, regardless of the predicate.
+        Return True if the tree changed: setting an attribute or a text to its
+        current value is not a change.
+
+        :param list targets: elements to act on.
+        """
+        changed = False
+        for target in targets:
+            if self.action == "set-attr":
+                changed |= target.get(self.attribute) != self.value
+                target.set(self.attribute, self.value)
+                continue
+            if self.action == "replace" and not self.fragment:
+                changed |= target.text != self.text
+                target.text = self.text
+                continue
+            changed = True
+            if self.action == "insert":
+                for elem in self.fragment:
+                    target.append(deepcopy(elem))
+            elif self.action == "remove":
+                target.getparent().remove(target)
+            else:
+                # replace element
+                parent = target.getparent()
+                position = parent.index(target)
+                parent.remove(target)
+                for offset, elem in enumerate(self.fragment):
+                    parent.insert(position + offset, deepcopy(elem))
+        return changed
+
+
+class FixRuleSet(object):
+    """Set of fix rules compiled into a dispatch table keyed by the tag of
+    their anchor element.
+
+    :param dict spec: rule set specification: `name`, `version`, `variables`
+        (default values of the variables), `namespaces` (added to the default ones)
+        and `rules` (list of rules specifications, see FixRule).
+    :param dict variables: variables overriding the rule set default ones.
+
+    The fingerprint identifies the specification and the variables: files fixed
+    with the same fingerprint are fixed the same way.
+    """
+
+    def __init__(self, spec: dict, variables: dict = None):
+        """Instanciation: compile the rules."""
+        if not isinstance(spec.get("rules"), list):
+            raise ValueError("Rule set must have a list of rules")
+        self.name = spec.get("name")
+        self.version = str(spec.get("version", ""))
+        self.namespaces = dict(NAMESPACES, **spec.get("namespaces", {}))
+        self.variables = dict(spec.get("variables", {}), **(variables or {}))
+        self.fingerprint = "{}:{}:{}".format(
+            self.name,
+            self.version,
+            hashlib.sha256(
+                json.dumps([spec, self.variables], sort_keys=True).encode("utf-8")
+            ).hexdigest()[:16],
+        )
+        self.rules = [
+            FixRule(rule, self.variables, self.namespaces, index)
+            for index, rule in enumerate(spec.get("rules"))
+        ]
+
+        # {anchor tag: [rules]} and paths leading to anchors
+        self.dispatch = {}
+        self.prefixes = set()
+        for rule in self.rules:
+            self.dispatch.setdefault(rule.anchor[-1], []).append(rule)
+            self.prefixes.update(rule.anchor[:i] for i in range(1, len(rule.anchor)))
+
+    @classmethod
+    def from_file(cls, path: Path = DEFAULT_RULES, variables: dict = None):
+        """Load a rule set from a JSON or YAML file.
+
+        :param pathlib.Path path: path to the rules file (.json, .yml or .yaml).
+        :param dict variables: variables overriding the rule set default ones.
+        """
+        path = Path(path)
+        content = path.read_text(encoding="utf-8")
+        if path.suffix.lower() in (".yml", ".yaml"):
+            if yaml is None:
+                raise ImportError(
+                    "YAML rules require the 'pyyaml' package: "
+                    "pip install isogeo-xml-toolbelt[yaml]"
+                )
+            spec = yaml.safe_load(content)
+        else:
+            spec = json.loads(content)
+        logging.debug("Fix rules loaded: {}".format(path))
+        return cls(spec, variables)
+
+    def collect(self, root) -> list:
+        """Collect the (rule, anchor element) pairs of a tree, in a single
+        breadth-first traversal which only descends into anchors ancestors.
+        Pairs are sorted by rule, then in document order.
+
+        :param lxml.etree._Element root: root element.
+        """
+        matches = []
+        queue = deque([(root, (root.tag,))])
+        while queue:
+            elem, path = queue.popleft()
+            for rule in self.dispatch.get(elem.tag, ()):
+                if rule.anchor == path:
+                    matches.append((rule.index, len(matches), rule, elem))
+            if path not in self.prefixes:
+                continue
+            for child in elem:
+                if isinstance(child.tag, str):  # skip comments
+                    queue.append((child, path + (child.tag,)))
+        return [(rule, elem) for _, _, rule, elem in sorted(matches, key=lambda i: i[:2])]
+
+    def apply(self, tree) -> list:
+        """Apply the rules to a tree. Return the names of the applied rules, in
+        rules order.
+
+        :param lxml.etree._ElementTree tree: parsed XML.
+        """
+        applied = []
+        for rule, anchor in self.collect(tree.getroot()):
+            if rule.apply(anchor) and rule.name not in applied:
+                applied.append(rule.name)
+        return applied
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    rule_set = FixRuleSet.from_file(DEFAULT_RULES)
+    print(rule_set.name, rule_set.version, sorted(rule_set.dispatch))
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Streaming fixer
+
+    Purpose:     Apply fix rules to very large XML documents with a flat memory
+    footprint: the input is read with iterparse and the output written
+    incrementally with lxml.etree.xmlfile, each element being written and freed
+    as soon as it's parsed. Only the children inspected by the rules and the
+    anchors which can't be streamed are buffered until their end.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+# 3rd party library
+from lxml import etree
+
+# submodules
+from isogeo_xml_toolbelt.fixers.fix_manifest import FILE_MODE
+from isogeo_xml_toolbelt.fixers.fix_rules import FixRuleSet
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+INDENT = "  "  # indentation of written elements, like lxml pretty_print
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class StreamPlan(object):
+    """Streaming plan of a rule set: which anchors can be streamed and which of
+    their children must be inspected. Other elements are streamed, written
+    element by element whatever their size.
+
+    An anchor can be streamed if its rules act on children (target) or append
+    to it (insert), the target and predicate paths starting with a child name.
+    Other anchors (e.g. setting their own attributes) are kept in memory until
+    they end, then fixed like in a parsed tree.
+
+    Predicates are checked on the inspected children, one at a time. A target
+    whose predicate is not decided yet (nothing found so far) is held with the
+    following children until a child verifies the predicate or the anchor ends:
+    memory then grows with the children of the anchor from the first held
+    target, e.g. the end of `MD_DataIdentification` from its first
+    `resourceConstraints` when the license is missing.
+
+    :param FixRuleSet rule_set: compiled rule set.
+    """
+
+    def __init__(self, rule_set: FixRuleSet):
+        """Instanciation."""
+        self.rule_set = rule_set
+        self.spine = rule_set.prefixes
+        self.anchors = {}
+        for rule in rule_set.rules:
+            self.anchors.setdefault(rule.anchor, []).append(rule)
+
+        # {anchor path: tags of the children to inspect}, for streamed anchors only
+        self.filters = {}
+        for path, rules in self.anchors.items():
+            tags = set()
+            streamable = True
+            for rule in rules:
+                if rule.target:
+                    streamable &= bool(rule.target_step)
+                    tags.add(rule.target_step)
+                else:
+                    streamable &= rule.action == "insert"
+                if rule.predicate:
+                    streamable &= bool(rule.predicate_step)
+                    tags.add(rule.predicate_step)
+            # children to inspect must not be streamed themselves
+            streamable &= not any(
+                path + (tag,) in self.spine or path + (tag,) in self.anchors
+                for tag in tags
+            )
+            if streamable:
+                self.filters[path] = tags
+
+        # root element can't be buffered: fall back on fixing the parsed tree
+        self.in_memory = any(
+            len(path) == 1 and path not in self.filters for path in self.anchors
+        )
+
+    def is_streamed(self, path: tuple) -> bool:
+        """Return True if the element at the path is written while parsed, False
+        if it must be buffered: anchor which can't be streamed, or child
+        inspected by the rules of its parent."""
+        if path in self.anchors:
+            return len(path) == 1 or path in self.filters
+        return path[-1] not in self.filters.get(path[:-1], ())
+
+
+class _Node(object):
+    """Element being parsed: streamed (open in the output) or buffered."""
+
+    __slots__ = (
+        "elem",
+        "path",
+        "streamed",
+        "leaf",
+        "passed",
+        "found",
+        "held",
+        "writer",
+        "children",
+    )
+
+    def __init__(
+        self, elem, path: tuple, streamed: bool, leaf: bool, passed: bool = False
+    ):
+        self.elem = elem
+        self.path = path
+        self.streamed = streamed
+        self.leaf = leaf  # no anchor below: descendants are not tracked
+        self.passed = passed  # no anchor at or below: descendants are passed through
+        self.found = set()  # index of the rules whose predicate path was found
+        self.held = {}  # {rule: targets} waiting for the predicate to be decided
+        self.writer = None  # element context of the output, once opened
+        self.children = False  # a child has been written
+
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def stream_fix(rule_set: FixRuleSet, xml: Path, output: Path) -> list:
+    """Fix a XML file in streaming. Return the applied rules names.
+
+    Results are the same as fixing the parsed tree, rules being applied when
+    their anchor is parsed instead of in rules order, and namespaces being
+    declared in prefixes order. Comments and processing instructions are kept
+    within the root element. If rules act on the root element itself (other
+    than inserting into it), the document is parsed.
+
+    :param FixRuleSet rule_set: compiled rule set.
+    :param pathlib.Path xml: path to the input XML file.
+    :param pathlib.Path output: path to the output XML file, written atomically.
+    """
+    output = Path(output)
+    plan = StreamPlan(rule_set)
+    if plan.in_memory:
+        from isogeo_xml_toolbelt.fixers.fixer_iso19139 import MetadataIso19139Fixer
+
+        logging.warning("Root element rules can't be streamed, {} is parsed".format(xml))
+        return MetadataIso19139Fixer(rule_set, streaming=False).fix_file(xml, output)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=".{}.".format(output.name), suffix=".tmp", dir=str(output.parent)
+    )
+    try:
+        with os.fdopen(fd, "wb") as out_xml:
+            applied = _stream(plan, str(xml), out_xml)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, str(output))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logging.debug("{} fixed in streaming ({}): {}".format(xml, ", ".join(applied), output))
+    return applied
+
+
+def _stream(plan: StreamPlan, xml: str, out_xml) -> list:
+    """Parse, fix and write a XML document. Return the applied rules names."""
+    applied = []
+
+    def mark(rule, changed: bool):
+        if changed and rule.name not in applied:
+            applied.append(rule.name)
+
+    with etree.xmlfile(out_xml, encoding="UTF-8") as xf:
+        xf.write_declaration()
+        stack = []
+        skipped = 0  # open descendants of a leaf node
+        declared = {}  # namespaces declared by the next element
+        for event, elem in etree.iterparse(
+            xml, events=("start-ns", "start", "end"), remove_blank_text=True
+        ):
+            if event == "start-ns":
+                prefix, uri = elem
+                declared[prefix or None] = uri
+                continue
+
+            if event == "start":
+                nsmap, declared = declared, {}
+                parent = stack[-1] if stack else None
+                if parent is not None and parent.leaf:
+                    skipped += 1
+                    continue
+                path = (parent.path if parent else ()) + (elem.tag,)
+                if parent is not None and parent.passed:
+                    node = _Node(elem, path, True, False, True)
+                else:
+                    # children following held targets can't be written before them
+                    streamed = (
+                        parent is None or (parent.streamed and not parent.held)
+                    ) and plan.is_streamed(path)
+                    leaf = not streamed and path not in plan.spine
+                    passed = (
+                        streamed and path not in plan.spine and path not in plan.anchors
+                    )
+                    node = _Node(elem, path, streamed, leaf, passed)
+                if node.streamed:
+                    if parent is not None:
+                        _flush(xf, parent, elem)
+                        parent.children = True
+                        _indent(xf, len(parent.path))
+                    node.writer = xf.element(elem.tag, elem.attrib, nsmap=nsmap)
+                    node.writer.__enter__()
+                stack.append(node)
+                continue
+
+            # end event
+            if skipped:
+                skipped -= 1
+                continue
+            node = stack.pop()
+            parent = stack[-1] if stack else None
+            if node.passed:
+                _close(xf, node, parent)
+                continue
+            rules = plan.anchors.get(node.path, ())
+
+            if node.streamed:
+                # predicates not found in any child: held targets are decided
+                for rule, targets in node.held.items():
+                    if rule.predicate[0] == "missing":
+                        mark(rule, rule.act(targets))
+                node.held.clear()
+                # append to the anchor, children being already written
+                for rule in rules:
+                    if rule.target:
+                        continue
+                    if rule.predicate:
+                        found = rule.index in node.found
+                        if found != (rule.predicate[0] == "exists"):
+                            continue
+                    mark(rule, rule.act([elem]))
+                _close(xf, node, parent)
+            else:
+                # buffered anchor: fixed like in a parsed tree
+                for rule in rules:
+                    mark(rule, rule.apply(elem))
+
+            if parent is None or not parent.streamed or node.streamed:
+                continue
+
+            # buffered child of a streamed element: inspect it, then write it.
+            # Following siblings may be already (partially) parsed: paths are
+            # only matched within the child.
+            following = elem.getnext()
+            if elem.tag in plan.filters.get(parent.path, ()):
+                rules = plan.anchors.get(parent.path)
+                # predicates first: the child may verify the predicate of its targets
+                for rule in rules:
+                    if (
+                        rule.predicate
+                        and rule.predicate_step == elem.tag
+                        and rule.index not in parent.found
+                        and _within(rule.find_all(parent.elem, rule.predicate[1]), elem)
+                    ):
+                        parent.found.add(rule.index)
+                        targets = parent.held.pop(rule, None)
+                        if targets is not None and rule.predicate[0] == "exists":
+                            mark(rule, rule.act(targets))
+                for rule in rules:
+                    if not rule.target or rule.target_step != elem.tag:
+                        continue
+                    targets = _within(rule.find_all(parent.elem, rule.target), elem)
+                    if rule.predicate is None:
+                        mark(rule, rule.act(targets))
+                    elif rule.index not in parent.found:
+                        if targets:
+                            parent.held.setdefault(rule, []).extend(targets)
+                    elif rule.predicate[0] == "exists":
+                        mark(rule, rule.act(targets))
+            # held targets and their following siblings are written once decided
+            if not parent.held:
+                _flush(xf, parent, following)
+
+    return applied
+
+
+def _within(elements: list, ancestor) -> list:
+    """Return the elements which are the ancestor or its descendants."""
+    return [
+        elem
+        for elem in elements
+        if elem is ancestor or any(i is ancestor for i in elem.iterancestors())
+    ]
+
+
+def _new_namespaces(elem, parent) -> dict:
+    """Return the namespaces of an element which are not in scope in its parent,
+    to be declared by the element.
+
+    :param lxml.etree._Element elem: element.
+    :param lxml.etree._Element parent: parent element, or None for the root.
+    """
+    if parent is None:
+        return elem.nsmap
+    in_scope = parent.nsmap
+    return {
+        prefix: uri for prefix, uri in elem.nsmap.items() if in_scope.get(prefix) != uri
+    }
+
+
+def _indent(xf, level: int):
+    """Write a line break and the indentation of an element.
+
+    :param xf: incremental writer (lxml.etree.xmlfile).
+    :param int level: depth of the element, 0 for the root.
+    """
+    xf.write("\n" + INDENT * level)
+
+
+def _write_tree(xf, elem, parent, level: int):
+    """Write a subtree element by element, declaring only the namespaces not in
+    scope. Elements are indented, except within mixed content.
+
+    :param xf: incremental writer (lxml.etree.xmlfile).
+    :param lxml.etree._Element elem: root of the subtree.
+    :param lxml.etree._Element parent: parent element of the subtree.
+    :param int level: depth of the subtree root, None within mixed content.
+    """
+    if level is not None:
+        _indent(xf, level)
+    if not isinstance(elem.tag, str):
+        # comments and processing instructions, with their tail
+        xf.write(elem)
+        return
+    with xf.element(elem.tag, elem.attrib, nsmap=_new_namespaces(elem, parent)):
+        mixed = level is None or elem.text or any(child.tail for child in elem)
+        if elem.text:
+            xf.write(elem.text)
+        for child in elem:
+            _write_tree(xf, child, elem, None if mixed else level + 1)
+        if len(elem) and not mixed:
+            _indent(xf, level)
+    if elem.tail:
+        xf.write(elem.tail)
+
+
+def _flush(xf, node: _Node, until=None):
+    """Write the text and the children of a streamed element and free them.
+
+    :param xf: incremental writer (lxml.etree.xmlfile).
+    :param _Node node: streamed element.
+    :param lxml.etree._Element until: child not to write, nor the followings ones
+        (not parsed yet). Default: None (all children).
+    """
+    elem = node.elem
+    if elem.text:
+        xf.write(elem.text)
+        elem.text = None
+    while len(elem):
+        child = elem[0]
+        if child is until:
+            return
+        _write_tree(xf, child, elem, len(node.path))
+        node.children = True
+        elem.remove(child)
+
+
+def _close(xf, node: _Node, parent: _Node):
+    """Write the end of a streamed element and free it.
+
+    :param xf: incremental writer (lxml.etree.xmlfile).
+    :param _Node node: streamed element.
+    :param _Node parent: streamed parent element, or None for the root.
+    """
+    _flush(xf, node)
+    if node.children:
+        _indent(xf, len(node.path) - 1)
+    node.writer.__exit__(None, None, None)
+    if parent is not None:
+        parent.elem.remove(node.elem)
+    node.elem.clear()
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    print(
+        stream_fix(
+            FixRuleSet.from_file(),
+            Path("tests/fixtures/iso19139/sample_19139.xml"),
+            Path("tests/output/fixed_stream_19139.xml"),
+        )
+    )
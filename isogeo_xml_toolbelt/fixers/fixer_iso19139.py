@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - ISO 19139 fixer
+
+    Purpose:     Add missing elements to ISO 19139 XML files (creation date,
+    character set, SRS, usage conditions), applying declarative fix rules in a
+    single traversal of the tree.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 3rd party library
+from lxml import etree
+
+# submodules
+from isogeo_xml_toolbelt.fixers.fix_rules import (  # noqa: F401
+    DEFAULT_RULES,
+    NAMESPACES,
+    FixRuleSet,
+)
+from isogeo_xml_toolbelt.fixers.fix_manifest import (
+    FILE_MODE,
+    FixManifest,
+    file_hash,
+    is_unchanged,
+)
+from isogeo_xml_toolbelt.fixers.fix_stream import stream_fix
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class MetadataIso19139Fixer(object):
+    """ISO 19139 XML fixer applying a set of fix rules.
+
+    Rules are dispatched by the tag of their anchor element: the anchors of every
+    rule are collected in a single traversal restricted to their ancestors, then
+    rules are applied. Output is pretty-printed by lxml.
+
+    :param rules: rule set, or path to a JSON or YAML rules file. Default: rules
+        shipped with the package (creation date, character set, SRS and usage
+        conditions).
+    :param bool streaming: fix files in streaming instead of parsing them, for very
+        large documents (see fix_stream). Default: False.
+    :param variables: values overriding the rule set variables, for example
+        `creation_date="2015-09-08"` or `srs_code="urn:ogc:def:crs:EPSG:2154"`.
+    """
+
+    def __init__(self, rules=None, streaming: bool = False, **variables):
+        """Instanciation."""
+        if isinstance(rules, FixRuleSet):
+            self.rules = rules
+        else:
+            self.rules = FixRuleSet.from_file(rules or DEFAULT_RULES, variables)
+        self.streaming = streaming
+        self.parser = etree.XMLParser(remove_blank_text=True)
+
+    def fix_file(self, xml: Path, output: Path) -> list:
+        """Fix a XML file and write the result. Return the applied rules names.
+
+        :param pathlib.Path xml: path to the input XML file.
+        :param pathlib.Path output: path to the output XML file.
+        """
+        if self.streaming:
+            return stream_fix(self.rules, xml, output)
+        tree = etree.parse(str(xml), self.parser)
+        applied = self.fix_tree(tree)
+        self.write(tree, output)
+        logging.debug("{} fixed ({}): {}".format(xml, ", ".join(applied), output))
+        return applied
+
+    def fix_tree(self, tree) -> list:
+        """Fix a parsed XML tree in place. Return the applied rules names.
+
+        :param lxml.etree._ElementTree tree: parsed ISO 19139 XML.
+        """
+        return self.rules.apply(tree)
+
+    def write(self, tree, output: Path):
+        """Write a XML tree, pretty-printed. The tree is written into a temporary
+        file renamed into place, so that the output is never partially written.
+
+        :param lxml.etree._ElementTree tree: XML tree.
+        :param pathlib.Path output: path to the output XML file.
+        """
+        output = Path(output)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".{}.".format(output.name), suffix=".tmp", dir=str(output.parent)
+        )
+        try:
+            with os.fdopen(fd, "wb") as out_xml:
+                tree.write(
+                    out_xml, encoding="utf-8", xml_declaration=True, pretty_print=True
+                )
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, str(output))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+# fixer of the current worker process, created by init_fixer
+_FIXER = None
+
+# columns of the fix report
+REPORT_HEADERS = [
+    "input",
+    "output",
+    "status",
+    "applied",
+    "error",
+    "input_hash",
+    "output_hash",
+]
+
+
+def init_fixer(rules: Path = None, variables: dict = None, streaming: bool = False):
+    """Create the fixer of the current process: rules are compiled once per
+    worker.
+
+    :param pathlib.Path rules: path to a JSON or YAML rules file. Default: package rules.
+    :param dict variables: values overriding the rule set variables.
+    :param bool streaming: fix files in streaming. Default: False.
+    """
+    global _FIXER
+    _FIXER = MetadataIso19139Fixer(rules, streaming=streaming, **(variables or {}))
+
+
+def fix_one(paths: tuple) -> dict:
+    """Fix a file with the fixer of the current process. Errors are reported
+    instead of raised.
+
+    :param tuple paths: (input path, output path), optionally followed by the
+        manifest entry of the input (None if it was never fixed): files fixed
+        with the same rules since they last changed are not parsed again.
+    :return: report row: input, output, status (`fixed`, `unchanged` or `error`),
+        applied rules, error, and input and output hashes if a manifest is used.
+    """
+    xml, output = paths[:2]
+    row = {"input": str(xml), "output": str(output), "applied": "", "error": ""}
+    try:
+        if len(paths) > 2:
+            unchanged, row["input_hash"] = is_unchanged(
+                xml, output, paths[2], _FIXER.rules.fingerprint
+            )
+            if unchanged:
+                row.update(status="unchanged", output_hash=paths[2].get("output"))
+                return row
+        applied = _FIXER.fix_file(xml, output)
+        if len(paths) > 2:
+            row["output_hash"] = file_hash(output)
+    except Exception as err:
+        logging.error("Fixing {} failed: {}".format(xml, err))
+        row.update(status="error", error="{}: {}".format(type(err).__name__, err))
+    else:
+        row.update(status="fixed", applied="|".join(applied))
+    return row
+
+
+def fix_many(
+    inputs,
+    output_dir: Path,
+    jobs: int = 1,
+    rules: Path = None,
+    variables: dict = None,
+    streaming: bool = False,
+    manifest: Path = None,
+) -> list:
+    """Fix a set of XML files into an output folder, over a pool of processes.
+    A file which can't be fixed doesn't stop the others.
+
+    :param inputs: iterable of paths to the XML files to fix.
+    :param pathlib.Path output_dir: output folder, files keeping their names.
+    :param int jobs: number of worker processes. Default: 1 (sequential).
+    :param pathlib.Path rules: path to a JSON or YAML rules file. Default: package rules.
+    :param dict variables: values overriding the rule set variables.
+    :param bool streaming: fix files in streaming, for very large documents. Default: False.
+    :param pathlib.Path manifest: path to the JSON manifest of the fixed files
+        (see FixManifest). Files already fixed with the same rules are skipped if
+        neither them nor their output changed. Default: None (every file is fixed).
+
+    :return: list of report rows (see fix_one), in inputs order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = [(Path(xml), output_dir / Path(xml).name) for xml in inputs]
+    fix_manifest = None
+    if manifest is not None:
+        fix_manifest = FixManifest(Path(manifest))
+        paths = [(xml, output, fix_manifest.get(xml)) for xml, output in paths]
+
+    if jobs <= 1:
+        init_fixer(rules, variables, streaming)
+        report = [fix_one(i) for i in paths]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_fixer, initargs=(rules, variables, streaming)
+        ) as workers:
+            chunksize = max(1, len(paths) // (jobs * 8))
+            report = list(workers.map(fix_one, paths, chunksize=chunksize))
+
+    if fix_manifest is not None:
+        # fingerprint of the rules used by the workers
+        fingerprint = FixRuleSet.from_file(rules or DEFAULT_RULES, variables).fingerprint
+        for row in report:
+            if row.get("status") == "fixed":
+                fix_manifest.record(
+                    row.get("input"),
+                    row.get("input_hash"),
+                    fingerprint,
+                    row.get("output_hash"),
+                )
+        fix_manifest.close()
+
+    errors = sum(1 for row in report if row.get("status") == "error")
+    unchanged = sum(1 for row in report if row.get("status") == "unchanged")
+    logging.info(
+        "{} files fixed, {} unchanged, {} errors, into {}".format(
+            len(report) - errors - unchanged, unchanged, errors, output_dir
+        )
+    )
+    return report
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    fixer = MetadataIso19139Fixer()
+    print(
+        fixer.fix_file(
+            Path("tests/fixtures/iso19139/sample_19139.xml"),
+            Path("tests/output/fixed_19139.xml"),
+        )
+    )
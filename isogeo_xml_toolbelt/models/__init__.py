@@ -2,3 +2,4 @@
 #! python3  # noqa: E265
 
 from .xml_19139_fields import Contact  # noqa: F401,F403
+from .xml_19110_feature_types import FeatureType, FeatureTypes  # noqa: F401,F403
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Feature types
+
+    Purpose:     Feature types of a catalogue stored into XML ISO 19110, each one
+    keeping its attributes in columns (parallel tuples).
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import sys
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class FeatureType(object):
+    """Feature type of a catalogue in XML 19110. Attributes are stored in columns:
+    `names`, `definitions`, `types`, `cardinalities` and `listedValues` are tuples
+    of the same length, types and cardinalities being interned.
+
+    :param str name: type name.
+    :param str uuid: type uuid.
+    :param str definition: type definition.
+    :param attributes: iterable of tuples (name, definition, type, cardinality,
+        listed values).
+    """
+
+    __slots__ = (
+        "name",
+        "uuid",
+        "definition",
+        "names",
+        "definitions",
+        "types",
+        "cardinalities",
+        "listedValues",
+        "_positions",
+    )
+
+    def __init__(self, name: str, uuid: str = "", definition: str = "", attributes=()):
+        """Instanciation."""
+        self.name = name
+        self.uuid = uuid
+        self.definition = definition
+        columns = tuple(zip(*attributes)) or ((),) * 5
+        self.names, self.definitions, types, cardinalities, listed_values = columns
+        self.types = tuple(sys.intern(i) for i in types)
+        self.cardinalities = tuple(sys.intern(i) for i in cardinalities)
+        self.listedValues = tuple(tuple(i) for i in listed_values)
+        self._positions = None
+
+    def __repr__(self):
+        return "FeatureType({!r}, {} attributes)".format(self.name, len(self))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        """Yield the attributes as tuples (name, definition, type, cardinality,
+        listed values)."""
+        return zip(
+            self.names, self.definitions, self.types, self.cardinalities, self.listedValues
+        )
+
+    def get(self, name: str) -> tuple:
+        """Return the first attribute with a name, or None.
+
+        :param str name: attribute name.
+        """
+        if self._positions is None:
+            self._positions = {}
+            for position, attr_name in enumerate(self.names):
+                self._positions.setdefault(attr_name, position)
+        position = self._positions.get(name)
+        if position is None:
+            return None
+        return (
+            self.names[position],
+            self.definitions[position],
+            self.types[position],
+            self.cardinalities[position],
+            self.listedValues[position],
+        )
+
+    def asDict(self) -> dict:
+        """Return the feature type as a dict, attributes being {name: [[definition,
+        type], ...]} like the featureAttributes of the reader."""
+        attributes = {}
+        for attr_name, definition, attr_type in zip(self.names, self.definitions, self.types):
+            attributes.setdefault(attr_name, []).append([definition, attr_type])
+        return {
+            "name": self.name,
+            "uuid": self.uuid,
+            "definition": self.definition,
+            "attributes": attributes,
+        }
+
+
+class FeatureTypes(object):
+    """Feature types of a catalogue in XML 19110, looked up by name or uuid.
+
+    :param feature_types: iterable of FeatureType, in document order.
+    """
+
+    def __init__(self, feature_types=()):
+        """Instanciation."""
+        self.types = tuple(feature_types)
+        self.by_name = {}
+        self.by_uuid = {}
+        for feature_type in self.types:
+            if feature_type.name:
+                self.by_name.setdefault(feature_type.name, feature_type)
+            if feature_type.uuid:
+                self.by_uuid.setdefault(feature_type.uuid, feature_type)
+
+    def __repr__(self):
+        return "FeatureTypes({})".format(", ".join(i.name for i in self.types))
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.by_name or key in self.by_uuid
+
+    def get(self, key: str) -> FeatureType:
+        """Return a feature type by its name or its uuid, or None.
+
+        :param str key: type name or uuid.
+        """
+        feature_type = self.by_name.get(key)
+        if feature_type is None:
+            feature_type = self.by_uuid.get(key)
+        return feature_type
+
+    def attributesDict(self) -> dict:
+        """Return the attributes of all the feature types merged into
+        {name: [[definition, type], ...]}, as the reader used to store them."""
+        attributes = {}
+        for feature_type in self.types:
+            for attr_name, values in feature_type.asDict().get("attributes").items():
+                attributes.setdefault(attr_name, []).extend(values)
+        return attributes
+
+    def asDict(self) -> dict:
+        """Return the names and the uuids of the feature types, comma separated,
+        as the reader used to store them: feature types without name are skipped."""
+        return {
+            "name": ", ".join(i.name for i in self.types if i.name),
+            "uuid": ", ".join(i.uuid for i in self.types if i.uuid),
+        }
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    feature_types = FeatureTypes(
+        [
+            FeatureType(
+                "COURS_EAU",
+                "9b1f2c3d-4e5f-4a6b-8c7d-0e1f2a3b4c5d",
+                attributes=[("ID", "Identifiant", "Integer", "1..1", ())],
+            )
+        ]
+    )
+    print(feature_types.get("COURS_EAU").get("ID"), feature_types.asDict())
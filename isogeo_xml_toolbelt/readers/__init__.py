@@ -1,5 +1,6 @@
 # coding: utf-8
 #! python3  # noqa: E265
 
-from .reader_iso19110 import MetadataIso19110
+from .reader_iso19110 import FeatureAttribute, MetadataIso19110, iter_feature_attributes
 from .reader_iso19139 import MetadataIso19139
+from .reader_factory import READERS, get_reader, iter_metadata_folder, read_metadata
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Readers factory
+
+    Purpose:     Pick the right reader for a metadata stored into XML, sniffing its
+    schema when it's not known, so that mixed folders can be read.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import logging
+from pathlib import Path
+
+# submodules
+from isogeo_xml_toolbelt.readers.reader_iso19110 import MetadataIso19110
+from isogeo_xml_toolbelt.readers.reader_iso19139 import MetadataIso19139
+from isogeo_xml_toolbelt.utils.xml_sniffer import sniff_metadata_schema
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# readers by schema
+READERS = {"iso19139": MetadataIso19139, "iso19110": MetadataIso19110}
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def get_reader(xml: Path, schema: str = None):
+    """Return the reader class matching a metadata file, or None if the schema
+    is not supported.
+
+    :param pathlib.Path xml: path to the XML file.
+    :param str schema: metadata schema (iso19139 or iso19110). If not set or not
+        supported, the schema is sniffed from the beginning of the file.
+    """
+    if schema in READERS:
+        return READERS.get(schema)
+
+    sniffed = sniff_metadata_schema(xml)
+    if sniffed.wrapper:
+        logging.warning(
+            "Metadata wrapped into {} is not supported: {}".format(sniffed.wrapper, xml)
+        )
+        return None
+    if sniffed.schema not in READERS:
+        logging.warning(
+            "Metadata type not supported: {} ({})".format(sniffed.tag, xml)
+        )
+        return None
+    return READERS.get(sniffed.schema)
+
+
+def read_metadata(xml: Path, schema: str = None):
+    """Read a metadata with the reader matching its schema. Return None if the
+    schema is not supported.
+
+    :param pathlib.Path xml: path to the XML file.
+    :param str schema: metadata schema. Sniffed if not set or not supported.
+    """
+    reader = get_reader(xml, schema)
+    if reader is None:
+        return None
+    return reader(xml=xml)
+
+
+def iter_metadata_folder(folder: Path, pattern: str = "**/*.xml"):
+    """Read the metadata stored into a folder whatever their schema, yielding
+    tuples (path, metadata). Files which are not supported are skipped.
+
+    :param pathlib.Path folder: path to the folder to parse.
+    :param str pattern: glob pattern of the files to read. Default: `**/*.xml`.
+    """
+    for xml_path in sorted(Path(folder).glob(pattern)):
+        md = read_metadata(xml_path)
+        if md is not None:
+            yield xml_path, md
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    for xml_path, md in iter_metadata_folder(Path(r"tests/fixtures")):
+        print(xml_path, type(md).__name__, md.asDict().get("title"))
@@ -17,6 +17,7 @@
 import datetime
 import logging
 import os
+from collections import namedtuple
 from pathlib import Path
 from uuid import UUID
 
@@ -24,6 +25,7 @@ from uuid import UUID
 from lxml import etree
 
 # submodules
+from isogeo_xml_toolbelt.models import FeatureType, FeatureTypes
 from isogeo_xml_toolbelt.utils import XmlUtils
 
 # #############################################################################
@@ -36,6 +38,159 @@ logging.basicConfig(level=logging.INFO)
 # utils
 utils = XmlUtils()
 
+# tags of the feature types and attributes elements
+GCO = "{http://www.isotc211.org/2005/gco}"
+GFC = "{http://www.isotc211.org/2005/gfc}"
+TAG_FEATURE_TYPE = GFC + "FC_FeatureType"
+TAG_TYPE_NAME = GFC + "typeName"
+TAG_CARRIER = GFC + "carrierOfCharacteristics"
+TAG_FEATURE_ATTRIBUTE = GFC + "FC_FeatureAttribute"
+TAG_MEMBER_NAME = GFC + "memberName"
+TAG_DEFINITION = GFC + "definition"
+TAG_CARDINALITY = GFC + "cardinality"
+TAG_VALUE_TYPE = GFC + "valueType"
+TAG_LISTED_VALUE = GFC + "listedValue"
+TAG_LOWER = GCO + "lower"
+TAG_UPPER = GCO + "upper"
+
+# feature attribute, as yielded by iter_feature_attributes
+FeatureAttribute = namedtuple(
+    "FeatureAttribute",
+    ["featureType", "name", "definition", "type", "cardinality", "listedValues"],
+)
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def first_text(elem) -> str:
+    """Return the first not blank text of a subtree, stripped, or an empty string.
+
+    :param lxml.etree._Element elem: root of the subtree.
+    """
+    for text in elem.itertext():
+        if text.strip():
+            return text.strip()
+    return ""
+
+
+def read_cardinality(cardinality) -> str:
+    """Return a cardinality as `lower..upper`, an unlimited upper bound being `*`.
+
+    :param lxml.etree._Element cardinality: `gfc:cardinality` element.
+    """
+    lower = upper = ""
+    for bound in cardinality.iter(TAG_LOWER, TAG_UPPER):
+        if bound.tag == TAG_LOWER:
+            lower = first_text(bound)
+            continue
+        upper = first_text(bound)
+        value = next(bound.iterchildren(tag=etree.Element), None)
+        if value is not None and value.get("isInfinite") == "true":
+            upper = "*"
+    if not upper:
+        return lower
+    return "{}..{}".format(lower, upper)
+
+
+def read_carrier(carrier) -> tuple:
+    """Read a feature attribute in one descent: (name, definition, type,
+    cardinality, listed values labels), missing values being empty strings.
+    Return None if the carrier of characteristics is not a feature attribute.
+
+    :param lxml.etree._Element carrier: `gfc:carrierOfCharacteristics` element.
+    """
+    attribute = next(carrier.iterchildren(TAG_FEATURE_ATTRIBUTE), None)
+    if attribute is None:
+        return None
+    name = definition = value_type = cardinality = ""
+    listed_values = []
+    for child in attribute.iterchildren(tag=etree.Element):
+        if child.tag == TAG_MEMBER_NAME:
+            name = first_text(child)
+        elif child.tag == TAG_DEFINITION:
+            definition = first_text(child)
+        elif child.tag == TAG_VALUE_TYPE:
+            value_type = first_text(child)
+        elif child.tag == TAG_CARDINALITY:
+            cardinality = read_cardinality(child)
+        elif child.tag == TAG_LISTED_VALUE:
+            listed_values.append(first_text(child))
+    return name, definition, value_type, cardinality, tuple(listed_values)
+
+
+def read_feature_type(feature_type, filename: str = "") -> FeatureType:
+    """Read a feature type and its attributes in one descent. Attributes without
+    name are ignored.
+
+    :param lxml.etree._Element feature_type: `gfc:FC_FeatureType` element.
+    :param str filename: name of the read file, for the logs.
+    """
+    name = definition = ""
+    attributes = []
+    for child in feature_type.iterchildren(TAG_TYPE_NAME, TAG_DEFINITION, TAG_CARRIER):
+        if child.tag == TAG_TYPE_NAME:
+            name = first_text(child)
+        elif child.tag == TAG_DEFINITION:
+            definition = first_text(child)
+        else:
+            attribute = read_carrier(child)
+            if attribute is None:
+                continue
+            if not attribute[0]:
+                logging.warning(
+                    "Feature attribute without name ignored (line {}): {}".format(
+                        child.sourceline, filename
+                    )
+                )
+                continue
+            attributes.append(attribute)
+    return FeatureType(name, feature_type.get("uuid", ""), definition, attributes)
+
+
+def iter_feature_attributes(source):
+    """Yield the feature attributes of a catalogue as FeatureAttribute tuples
+    (featureType being the type name), parsing it incrementally: elements are
+    dropped once read, so that memory doesn't grow with the catalogue.
+
+    :param source: path (pathlib.Path or str) or binary file object of the
+        catalogue.
+    """
+    if isinstance(source, Path):
+        source = str(source)
+    feature_type = ""
+    context = etree.iterparse(
+        source,
+        events=("start", "end"),
+        tag=(TAG_FEATURE_TYPE, TAG_TYPE_NAME, TAG_CARRIER),
+        remove_blank_text=True,
+        resolve_entities=False,
+    )
+    for event, elem in context:
+        if event == "start":
+            if elem.tag == TAG_FEATURE_TYPE:
+                feature_type = ""
+            continue
+        parent = elem.getparent()
+        if elem.tag == TAG_TYPE_NAME:
+            if parent is not None and parent.tag == TAG_FEATURE_TYPE:
+                feature_type = first_text(elem)
+            continue
+        if elem.tag == TAG_CARRIER:
+            attribute = read_carrier(elem)
+            if attribute is not None:
+                yield FeatureAttribute(feature_type, *attribute)
+        elif parent is not None:
+            # feature type: drop its gfc:featureType wrapper too
+            elem, parent = parent, parent.getparent()
+        # drop the read elements
+        elem.clear(keep_tail=True)
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+    del context
+
 # #############################################################################
 # ########## Classes ###############
 # ##################################
@@ -129,42 +284,16 @@ class MetadataIso19110(object):
             ),
         }
 
-        # feature types
-        featTypeName = utils.xmlGetTextNodes(
-            self.md,
-            "/gfc:FC_FeatureCatalogue/gfc:featureType/gfc:FC_FeatureType/gfc:typeName/gco:LocalName/text()",
-            self.namespaces,
-        )
-        featTypeUuid = utils.xmlGetTextNodes(
-            self.md,
-            "/gfc:FC_FeatureCatalogue/gfc:featureType/gfc:FC_FeatureType/@uuid",
-            self.namespaces,
-        )
-        self.featureTypes = {"name": featTypeName, "uuid": featTypeUuid}
-
-        # attributes
-        self.featureAttributes = {}
-
-        for item in self.md.xpath(
-            "/gfc:FC_FeatureCatalogue/gfc:featureType/gfc:FC_FeatureType/gfc:carrierOfCharacteristics",
-            namespaces=self.namespaces,
-        ):
-            attrName = item.xpath(
-                "gfc:FC_FeatureAttribute/gfc:memberName/gco:LocalName/text()",
+        # feature types, with their attributes
+        self.featureTypes = FeatureTypes(
+            read_feature_type(item, self.filename)
+            for item in self.md.xpath(
+                "/gfc:FC_FeatureCatalogue/gfc:featureType/gfc:FC_FeatureType",
                 namespaces=self.namespaces,
-            )[0]
-            attrDescr = item.xpath(
-                "gfc:FC_FeatureAttribute/gfc:definition/gco:CharacterString/text()",
-                namespaces=self.namespaces,
-            )[0]
-            attrtype = item.xpath(
-                "gfc:FC_FeatureAttribute/gfc:valueType/gco:TypeName/gco:aName/gco:CharacterString/text()",
-                namespaces=self.namespaces,
-            )[0]
-
-            self.featureAttributes.setdefault(attrName, []).append(
-                [attrDescr, attrtype]
             )
+        )
+        # attributes of all types, merged
+        self.featureAttributes = self.featureTypes.attributesDict()
         # print(self.featureAttributes)
 
     def __repr__(self):
@@ -184,7 +313,7 @@ class MetadataIso19110(object):
             "date": self.date,
             "OrganisationName": self.OrganisationName,
             "contact": self.contact,
-            "featureTypes": self.featureTypes,
+            "featureTypes": self.featureTypes.asDict(),
             "featureAttributes": self.featureAttributes,
         }
 
@@ -2,3 +2,6 @@
 #! python3  # noqa: E265
 
 from .csv_reporter import CsvReporter  # noqa: F401,F403
+from .sqlite_reporter import SqliteReporter  # noqa: F401,F403
+from .partitioned_reporter import PartitionedCsvReporter  # noqa: F401,F403
+from .flattener import FlattenPlan  # noqa: F401,F403
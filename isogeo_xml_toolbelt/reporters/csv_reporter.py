@@ -11,13 +11,25 @@
 
 # Standard library
 import csv
+import gzip
+import io
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 
+# 3rd party library (optional)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # #############################################################################
 # ########## Globals ###############
 # ##################################
 
+# supported streaming compressions and their default level
+COMPRESSIONS = {"gzip": 6, "zstd": 3}
+
 
 # #############################################################################
 # ########## Classes ###############
@@ -37,6 +49,9 @@ class CsvReporter(object):
         csvpath: Path = Path("./report.csv"),
         headers: list = ["header1", "header2"],
         extrahead: str = "ignore",
+        compression: str = None,
+        compresslevel: int = None,
+        append: bool = False,
     ):
         """
             Instanciate class, check parameters and add object attributes.
@@ -46,6 +61,12 @@ class CsvReporter(object):
             :param str extrahead: linked to the `extrasection` option passed to the writer.
                 It's the mode to handle cases where data is transmitted without header matching.
                 Can be one of : `raise` or `ignore`. Default: `ignore`.
+            :param str compression: compress the output on the fly. Can be one of: `gzip` or `zstd`
+                (requires the `zstandard` package). The output file stays open until `close()`
+                is called. Default: `None` (no compression).
+            :param int compresslevel: compression level. Default: `6` for gzip, `3` for zstd.
+            :param bool append: append rows to an existing report instead of overwriting it,
+                for example to resume an interrupted run. Default: `False`.
         """
         # check parameters
         if not isinstance(csvpath, Path):
@@ -62,20 +83,90 @@ class CsvReporter(object):
             raise ValueError(
                 "extrahead ({}) must be 'raise' or 'ignore'".format(extrahead)
             )
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(
+                "compression ({}) must be one of: {}".format(
+                    compression, ", ".join(COMPRESSIONS)
+                )
+            )
+        if compression == "zstd" and zstandard is None:
+            raise ImportError(
+                "zstd compression requires the 'zstandard' package: "
+                "pip install isogeo-xml-toolbelt[zstd]"
+            )
         # attributes
         csv.register_dialect("semicolon", delimiter=";")  # create dialect
         self.dialect = "semicolon"
         self.extrahead = "ignore"
         self.headers = headers
         self.csvpath = csvpath
+        self.compression = compression
+        if compresslevel is None:
+            compresslevel = COMPRESSIONS.get(compression)
+        self.compresslevel = compresslevel
+        self._stream = None
 
         # write headers
-        self.write_headers()
+        if append and self.csvpath.is_file() and self.csvpath.stat().st_size:
+            logging.debug("Appending to existing report: {}".format(self.csvpath))
+        else:
+            self.write_headers()
         logging.debug("CsvReporter instanciated")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def flush(self):
+        """Flush the compressed stream, if any. Nothing to do for an uncompressed
+        report, closed after each write."""
+        if self._stream is not None:
+            self._stream.flush()
+
+    def close(self):
+        """Close the compressed stream, if any, writing the end of the compressed
+        frame. Nothing to do for an uncompressed report."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            logging.debug("Compressed stream closed: {}".format(self.csvpath.name))
+
+    @contextmanager
+    def open_stream(self, mode: str = "a"):
+        """Yield the text stream to write into. Uncompressed reports are opened
+        and closed at each call whereas compressed ones are opened once and kept
+        open until `close()`, streaming rows through the compressor.
+
+        :param str mode: opening mode, `w` or `a`. Default: `a`.
+        """
+        if self.compression is None:
+            with self.csvpath.open(mode=mode, newline="", encoding="utf-8") as csvout:
+                yield csvout
+            return
+
+        if self._stream is None:
+            if self.compression == "gzip":
+                self._stream = gzip.open(
+                    str(self.csvpath),
+                    mode=mode + "t",
+                    compresslevel=self.compresslevel,
+                    encoding="utf-8",
+                    newline="",
+                )
+            else:
+                compressor = zstandard.ZstdCompressor(level=self.compresslevel)
+                self._stream = io.TextIOWrapper(
+                    compressor.stream_writer(self.csvpath.open(mode=mode + "b")),
+                    encoding="utf-8",
+                    newline="",
+                )
+        yield self._stream
+
     def write_headers(self):
         """Write headers to the CSV."""
-        with self.csvpath.open(mode="w", newline="",  encoding="utf-8") as csvout:
+        with self.open_stream(mode="w") as csvout:
             writer = csv.DictWriter(
                 csvout, dialect=self.dialect, fieldnames=self.headers
             )
@@ -92,7 +183,7 @@ class CsvReporter(object):
         if not isinstance(in_data, dict):
             raise TypeError
         # add line
-        with self.csvpath.open(mode="a", newline="",  encoding="utf-8") as csvout:
+        with self.open_stream() as csvout:
             writer = csv.DictWriter(
                 csvout,
                 dialect=self.dialect,
@@ -114,7 +205,7 @@ class CsvReporter(object):
             raise TypeError
 
         # add line
-        with self.csvpath.open(mode="a", newline="", encoding="utf-8") as csvout:
+        with self.open_stream() as csvout:
             writer = csv.DictWriter(
                 csvout,
                 dialect=self.dialect,
@@ -0,0 +1,205 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Module to flatten nested metadata dictionaries into tabular rows
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import json
+import logging
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# flattening modes
+EXPLODE = "explode"  # one row per item
+FIRST = "first"  # keep the N first items, joined
+JOIN = "join"  # join items with the separator
+JSON = "json"  # JSON-encode the value
+
+MODES = (EXPLODE, FIRST, JOIN, JSON)
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class FlattenPlan(object):
+    """Compiled plan to flatten nested values returned by readers' `asDict()`
+    (`contacts`, `keywords`...) into rows suitable for tabular reporters.
+
+    The plan is computed once from the headers, then applied to each record
+    without inspecting the values. Headers are either a key of the record
+    (`keywords`) or a key and a sub-key of the items stored in a list
+    (`contacts.name`).
+
+    :param list headers: output column names.
+    :param dict rules: flattening mode by record key. Values are a mode
+        (`explode`, `join`, `json`) or a tuple `(first, N)`. Keys without rule
+        are passed through as they are, except sub-keys (`contacts.name`) which
+        are joined.
+    :param str separator: separator used by `join` and `first` modes. Default: `|`.
+
+    Example:
+
+        plan = FlattenPlan(
+            headers=["title", "keywords", "contacts.name"],
+            rules={"keywords": "join", "contacts": ("first", 1)},
+        )
+        csv_report = CsvReporter(csvpath=Path("report.csv"), headers=plan.headers)
+        csv_report.add_multiple(plan.apply(md.asDict()))
+    """
+
+    def __init__(self, headers: list, rules: dict = None, separator: str = "|"):
+        """Instanciate class, check parameters and compile the plan."""
+        # check parameters
+        if not isinstance(headers, list):
+            raise TypeError(
+                "Headers names must be a list, not {}".format(type(headers))
+            )
+        rules = rules or {}
+        if not isinstance(rules, dict):
+            raise TypeError("Rules must be a dict, not {}".format(type(rules)))
+        # attributes
+        self.headers = headers
+        self.separator = separator
+        self.rules = {key: self._parse_rule(rule) for key, rule in rules.items()}
+        # compiled plan
+        self._columns = []  # [(header, function applied to the record)]
+        self._exploded_key = None
+        self._exploded_columns = []  # [(header, function applied to each item)]
+        self.compile()
+        logging.debug("FlattenPlan compiled: {}".format(self.rules))
+
+    def _parse_rule(self, rule) -> tuple:
+        """Normalize a rule into a tuple (mode, N)."""
+        if isinstance(rule, str):
+            mode, count = rule, None
+        else:
+            mode, count = rule
+        if mode not in MODES:
+            raise ValueError(
+                "Flattening mode ({}) must be one of: {}".format(mode, ", ".join(MODES))
+            )
+        if mode == FIRST and (not isinstance(count, int) or count < 1):
+            raise ValueError("'first' mode requires a positive number of items")
+        return mode, count
+
+    def compile(self):
+        """Build the functions extracting each column."""
+        for header in self.headers:
+            key, _, subkey = header.partition(".")
+            mode, count = self.rules.get(key, (None, None))
+
+            if mode == EXPLODE:
+                if self._exploded_key not in (None, key):
+                    raise ValueError(
+                        "Only one key can be exploded: {} and {}".format(
+                            self._exploded_key, key
+                        )
+                    )
+                self._exploded_key = key
+                self._exploded_columns.append((header, _item_getter(subkey)))
+            else:
+                self._columns.append(
+                    (header, self._record_getter(key, subkey, mode, count))
+                )
+
+    def _record_getter(self, key: str, subkey: str, mode: str, count: int):
+        """Return the function extracting a column from a record."""
+        separator = self.separator
+
+        if mode is None and not subkey:
+            return lambda record: record.get(key)
+
+        # values picked from the items of the list
+        if subkey:
+
+            def values(record):
+                return [item.get(subkey) for item in record.get(key) or ()]
+
+        else:
+
+            def values(record):
+                return record.get(key) or ()
+
+        if mode == JSON:
+            return lambda record: json.dumps(
+                values(record), default=str, ensure_ascii=False
+            )
+        if mode == FIRST and count == 1:
+            return lambda record: next(iter(values(record)), None)
+        if mode == FIRST:
+            return lambda record: separator.join(
+                str(i) for i in values(record)[:count] if i is not None
+            )
+        return lambda record: separator.join(
+            str(i) for i in values(record) if i is not None
+        )
+
+    def apply(self, record: dict) -> list:
+        """Flatten a record into a list of rows. The list contains a single row
+        unless a key is exploded.
+
+        :param dict record: record to flatten, as returned by readers' `asDict()`.
+        """
+        row = {header: getter(record) for header, getter in self._columns}
+        if self._exploded_key is None:
+            return [row]
+
+        rows = []
+        for item in record.get(self._exploded_key) or (None,):
+            exploded = dict(row)
+            for header, getter in self._exploded_columns:
+                exploded[header] = getter(item)
+            rows.append(exploded)
+        return rows
+
+    def apply_multiple(self, records) -> list:
+        """Flatten a set of records into a list of rows.
+
+        :param records: iterable of records to flatten.
+        """
+        rows = []
+        for record in records:
+            rows.extend(self.apply(record))
+        return rows
+
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def _item_getter(subkey: str):
+    """Return the function extracting a value from an exploded item."""
+    if not subkey:
+        return lambda item: item
+    return lambda item: item.get(subkey) if item is not None else None
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    plan = FlattenPlan(
+        headers=["title", "keywords", "contacts.name", "contacts.organisation"],
+        rules={"keywords": JOIN, "contacts": EXPLODE},
+    )
+    print(
+        plan.apply(
+            {
+                "title": "Data",
+                "keywords": ["water", "river"],
+                "contacts": [
+                    {"name": "John", "organisation": "Isogeo"},
+                    {"name": "Jane", "organisation": "Orano"},
+                ],
+            }
+        )
+    )
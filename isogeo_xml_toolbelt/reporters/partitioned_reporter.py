@@ -0,0 +1,212 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Module to manage CSV reporting split into partitions (catalog / schema)
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import csv
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class PartitionedCsvReporter(object):
+    """Produce CSV reports routed by catalog UUID and schema:
+    `<root>/<cat_uuid>/<schema>.csv`.
+
+    Open files are kept in a LRU-bounded pool: when the limit is reached, the
+    least recently used partition is closed and will be reopened in append mode
+    if it receives rows again.
+
+    See:
+      - https://docs.python.org/fr/3.6/library/csv.html#csv.DictWriter
+    """
+
+    def __init__(
+        self,
+        root: Path = Path("./report"),
+        headers: list = ["header1", "header2"],
+        extrahead: str = "ignore",
+        max_open_files: int = 64,
+        append: bool = False,
+    ):
+        """
+            Instanciate class, check parameters and add object attributes.
+
+            :param pathlib.Path root: Path to the output folder. Default: `./report`.
+            :param list headers: list of CSV headers names (CSv first line). Default: `["header1", "header2"]`.
+            :param str extrahead: linked to the `extrasection` option passed to the writer.
+                It's the mode to handle cases where data is transmitted without header matching.
+                Can be one of : `raise` or `ignore`. Default: `ignore`.
+            :param int max_open_files: maximum number of partitions kept open at the same time. Default: `64`.
+            :param bool append: append rows to existing partitions instead of overwriting them,
+                for example to resume an interrupted run. Default: `False`.
+        """
+        # check parameters
+        if not isinstance(root, Path):
+            raise TypeError(
+                "Root path must be a 'pathlib.Path' instance not {}".format(type(root))
+            )
+        if not isinstance(headers, list):
+            raise TypeError(
+                "Headers names must be a list, not {}".format(type(headers))
+            )
+        if extrahead.lower() not in ("raise", "ignore"):
+            raise ValueError(
+                "extrahead ({}) must be 'raise' or 'ignore'".format(extrahead)
+            )
+        if not isinstance(max_open_files, int) or max_open_files < 1:
+            raise ValueError(
+                "max_open_files ({}) must be a positive integer".format(max_open_files)
+            )
+        # attributes
+        csv.register_dialect("semicolon", delimiter=";")  # create dialect
+        self.dialect = "semicolon"
+        self.extrahead = extrahead.lower()
+        self.headers = headers
+        self.root = root
+        self.max_open_files = max_open_files
+        self.append = append
+
+        # pool of open partitions: {(cat_uuid, schema): (file, writer)}
+        self._pool = OrderedDict()
+        # partitions already initialized (headers written) during this run
+        self._partitions = set()
+        logging.debug("PartitionedCsvReporter instanciated")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def partitions(self) -> tuple:
+        """Paths to the partitions written so far."""
+        return tuple(sorted(self.get_partition_path(*i) for i in self._partitions))
+
+    def get_partition_path(self, cat_uuid: str, schema: str) -> Path:
+        """Return the path of the CSV file for a partition.
+
+        :param str cat_uuid: catalog UUID
+        :param str schema: metadata schema (iso19139, iso19110...)
+        """
+        return self.root / str(cat_uuid) / "{}.csv".format(schema)
+
+    def get_writer(self, cat_uuid: str, schema: str) -> csv.DictWriter:
+        """Return the writer of a partition, opening it if necessary.
+
+        :param str cat_uuid: catalog UUID
+        :param str schema: metadata schema (iso19139, iso19110...)
+        """
+        key = (cat_uuid, schema)
+        if key in self._pool:
+            self._pool.move_to_end(key)
+            return self._pool.get(key)[1]
+
+        # make room in the pool
+        while len(self._pool) >= self.max_open_files:
+            evicted_key, (evicted_file, _) = self._pool.popitem(last=False)
+            evicted_file.close()
+            logging.debug("Partition closed: {}".format(evicted_key))
+
+        # open partition: headers are written only the first time
+        csvpath = self.get_partition_path(cat_uuid, schema)
+        is_new = key not in self._partitions
+        if is_new and self.append and csvpath.is_file() and csvpath.stat().st_size:
+            # partition written by a previous run
+            self._partitions.add(key)
+            is_new = False
+        if is_new:
+            csvpath.parent.mkdir(parents=True, exist_ok=True)
+        csvout = csvpath.open(mode="w" if is_new else "a", newline="", encoding="utf-8")
+        writer = csv.DictWriter(
+            csvout,
+            dialect=self.dialect,
+            fieldnames=self.headers,
+            extrasaction=self.extrahead,
+        )
+        if is_new:
+            writer.writeheader()
+            self._partitions.add(key)
+            logging.debug("Partition created: {}".format(csvpath))
+
+        self._pool[key] = (csvout, writer)
+        return writer
+
+    def add_unique(self, in_data: dict, cat_uuid: str, schema: str):
+        """Add a single row to the partition from the input data dictionary
+
+        :param dict in_data: Dictionary of data to be added.
+            Expected structure: `{header: value}`
+        :param str cat_uuid: catalog UUID
+        :param str schema: metadata schema (iso19139, iso19110...)
+        """
+        # check parameters
+        if not isinstance(in_data, dict):
+            raise TypeError
+        self.get_writer(cat_uuid, schema).writerow(in_data)
+
+    def add_multiple(self, in_data: list, cat_uuid: str, schema: str):
+        """Add a set of rows to the partition from the input list of data dictionaries.
+
+        :param list in_data: list of dictionaries of data to be added.
+            Expected structure: `[{header1: valueA}, {header2: valueB}]`
+        :param str cat_uuid: catalog UUID
+        :param str schema: metadata schema (iso19139, iso19110...)
+        """
+        # check parameters
+        if not isinstance(in_data, list):
+            raise TypeError
+        self.get_writer(cat_uuid, schema).writerows(in_data)
+
+    def flush(self):
+        """Flush every open partition."""
+        for csvout, _ in self._pool.values():
+            csvout.flush()
+
+    def close(self):
+        """Close every open partition."""
+        while self._pool:
+            _, (csvout, _) = self._pool.popitem(last=False)
+            csvout.close()
+        logging.debug("{} partitions written".format(len(self._partitions)))
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    # logging
+    logging.basicConfig(
+        format="%(asctime)s || %(levelname)s "
+        "|| %(module)s || %(funcName)s || %(lineno)s "
+        "|| %(message)s",
+        level=logging.DEBUG,
+    )
+    logging.debug("Standalone execution")
+    # usage
+    with PartitionedCsvReporter(
+        root=Path("./report"), headers=["Nom", "Objets"], max_open_files=2
+    ) as csv_report:
+        d = {"Nom": "Data", "Objets": 25}
+        csv_report.add_unique(d, "cat1", "iso19139")
+        csv_report.add_multiple([d, d], "cat2", "iso19110")
+        csv_report.add_unique(d, "cat3", "iso19139")
+        csv_report.add_unique(d, "cat1", "iso19139")
@@ -0,0 +1,308 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Module to manage SQLite reporting
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+import sqlite3
+from pathlib import Path
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# columns of the main table, matching the keys returned by readers' asDict()
+METADATA_COLUMNS = (
+    "filename",
+    "fileIdentifier",
+    "MD_Identifier",
+    "title",
+    "name",
+    "abstract",
+    "fieldOfApplication",
+    "processContext",
+    "processStep",
+    "updateFrequency",
+    "OrganisationName",
+    "formatName",
+    "formatVersion",
+    "md_date",
+    "date",
+    "geometry",
+    "resolution",
+    "scale",
+    "srs",
+    "latmin",
+    "latmax",
+    "lonmin",
+    "lonmax",
+    "featureCount",
+    "featureCatalogs",
+    "storageType",
+    "parentidentifier",
+)
+
+# columns of the contacts table, matching the keys of Contact.asDict()
+CONTACT_COLUMNS = (
+    "name",
+    "organisation",
+    "role",
+    "rue",
+    "ville",
+    "cp",
+    "country",
+    "mail",
+    "telephone",
+)
+
+# indexes are created once the load is finished: maintaining them row by row
+# during bulk inserts is much slower than building them at the end
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_metadata_fileIdentifier ON metadata (fileIdentifier)",
+    "CREATE INDEX IF NOT EXISTS idx_contacts_metadata ON contacts (metadata_id)",
+    "CREATE INDEX IF NOT EXISTS idx_contacts_organisation ON contacts (organisation)",
+    "CREATE INDEX IF NOT EXISTS idx_keywords_metadata ON keywords (metadata_id)",
+    "CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords (keyword)",
+    "CREATE INDEX IF NOT EXISTS idx_feature_attributes_metadata ON feature_attributes (metadata_id)",
+    "CREATE INDEX IF NOT EXISTS idx_feature_attributes_name ON feature_attributes (name)",
+)
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class SqliteReporter(object):
+    """Produce a SQLite report with normalised tables: `metadata`, `contacts`,
+    `keywords` and `feature_attributes`.
+
+    Rows are buffered and written with `executemany` in a single transaction per
+    batch. Use it as a context manager or call `close()` to flush the last batch
+    and build the indexes.
+
+    See:
+      - https://docs.python.org/3/library/sqlite3.html
+      - https://www.sqlite.org/wal.html
+    """
+
+    def __init__(self, dbpath: Path = Path("./report.sqlite"), batch_size: int = 10000):
+        """
+            Instanciate class, check parameters, open the database and create tables.
+
+            :param pathlib.Path dbpath: Path to the output database. Default: `./report.sqlite`.
+            :param int batch_size: number of metadata to buffer before writing them. Default: `10000`.
+        """
+        # check parameters
+        if not isinstance(dbpath, Path):
+            raise TypeError(
+                "Database path must be a 'pathlib.Path' instance not {}".format(
+                    type(dbpath)
+                )
+            )
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError(
+                "batch_size ({}) must be a positive integer".format(batch_size)
+            )
+        # attributes
+        self.dbpath = dbpath
+        self.batch_size = batch_size
+        self._buffer = {
+            "metadata": [],
+            "contacts": [],
+            "keywords": [],
+            "feature_attributes": [],
+        }
+        self._buffered_count = 0
+
+        # connection
+        self.conn = sqlite3.connect(str(self.dbpath))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+        # identifiers are set by the reporter so that child rows can be batched
+        # together with their parent row
+        self._next_id = (
+            self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM metadata").fetchone()[0]
+            + 1
+        )
+        logging.debug("SqliteReporter instanciated")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def create_tables(self):
+        """Create the tables if they don't exist yet."""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (id INTEGER PRIMARY KEY, {})".format(
+                    ", ".join(METADATA_COLUMNS)
+                )
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS contacts (metadata_id INTEGER, {})".format(
+                    ", ".join(CONTACT_COLUMNS)
+                )
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS keywords (metadata_id INTEGER, keyword)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS feature_attributes "
+                "(metadata_id INTEGER, name, definition, type)"
+            )
+        logging.debug("Tables created in: {}".format(self.dbpath.name))
+
+    def add_unique(self, in_data: dict):
+        """Add a single metadata to the database from the input data dictionary.
+
+        :param dict in_data: Dictionary of data to be added, as returned by readers' `asDict()`.
+        """
+        # check parameters
+        if not isinstance(in_data, dict):
+            raise TypeError
+        md_id = self._next_id
+        self._next_id += 1
+
+        # main table
+        self._buffer["metadata"].append(
+            (md_id,) + tuple(_to_sql(in_data.get(col)) for col in METADATA_COLUMNS)
+        )
+        # contacts: list of dicts for ISO 19139, dict of lists for ISO 19110
+        contacts = in_data.get("contacts") or []
+        if in_data.get("contact"):
+            contacts = contacts + [_contact_from_19110(in_data.get("contact"))]
+        self._buffer["contacts"].extend(
+            (md_id,) + tuple(_to_sql(ct.get(col)) for col in CONTACT_COLUMNS)
+            for ct in contacts
+        )
+        # keywords
+        self._buffer["keywords"].extend(
+            (md_id, kw) for kw in in_data.get("keywords") or [] if kw
+        )
+        # feature attributes: {name: [[definition, type], ...]}
+        for attr_name, attr_values in (in_data.get("featureAttributes") or {}).items():
+            self._buffer["feature_attributes"].extend(
+                (md_id, attr_name, _to_sql(descr), _to_sql(attr_type))
+                for descr, attr_type in attr_values
+            )
+
+        self._buffered_count += 1
+        if self._buffered_count >= self.batch_size:
+            self.flush()
+
+    def add_multiple(self, in_data: list):
+        """Add a set of metadata to the database from the input list of data dictionaries.
+
+        :param list in_data: list of dictionaries of data to be added.
+        """
+        # check parameters
+        if not isinstance(in_data, list):
+            raise TypeError
+        for md in in_data:
+            self.add_unique(md)
+
+    def flush(self):
+        """Write buffered rows into the database within a single transaction."""
+        if not self._buffered_count:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO metadata VALUES ({})".format(
+                    ", ".join("?" * (len(METADATA_COLUMNS) + 1))
+                ),
+                self._buffer.get("metadata"),
+            )
+            self.conn.executemany(
+                "INSERT INTO contacts VALUES ({})".format(
+                    ", ".join("?" * (len(CONTACT_COLUMNS) + 1))
+                ),
+                self._buffer.get("contacts"),
+            )
+            self.conn.executemany(
+                "INSERT INTO keywords VALUES (?, ?)", self._buffer.get("keywords")
+            )
+            self.conn.executemany(
+                "INSERT INTO feature_attributes VALUES (?, ?, ?, ?)",
+                self._buffer.get("feature_attributes"),
+            )
+        logging.debug(
+            "{} metadata written to the database: {}".format(
+                self._buffered_count, self.dbpath.name
+            )
+        )
+        for rows in self._buffer.values():
+            rows.clear()
+        self._buffered_count = 0
+
+    def create_indexes(self):
+        """Create indexes. Called at the end of the load."""
+        with self.conn:
+            for statement in INDEXES:
+                self.conn.execute(statement)
+        logging.debug("Indexes created in: {}".format(self.dbpath.name))
+
+    def close(self):
+        """Flush remaining rows, build indexes and close the connection."""
+        if self.conn is None:
+            return
+        self.flush()
+        self.create_indexes()
+        self.conn.close()
+        self.conn = None
+
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def _to_sql(value):
+    """Convert a value into a type supported by SQLite."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def _contact_from_19110(contact: dict) -> dict:
+    """Convert the contact structure of MetadataIso19110 into Contact.asDict()
+    structure."""
+    return {
+        "mail": ", ".join(contact.get("email") or []) or None,
+        "rue": ", ".join(contact.get("address") or []) or None,
+        "cp": ", ".join(contact.get("postalCode") or []) or None,
+        "ville": ", ".join(contact.get("city") or []) or None,
+        "role": "producer",
+    }
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    # logging
+    logging.basicConfig(
+        format="%(asctime)s || %(levelname)s "
+        "|| %(module)s || %(funcName)s || %(lineno)s "
+        "|| %(message)s",
+        level=logging.DEBUG,
+    )
+    logging.debug("Standalone execution")
+    # usage
+    with SqliteReporter(dbpath=Path("./report.sqlite")) as sqlite_report:
+        d = {
+            "title": "Data",
+            "keywords": ["water", "river"],
+            "contacts": [{"name": "John", "organisation": "Isogeo"}],
+        }
+        sqlite_report.add_unique(d)
+        sqlite_report.add_multiple([d, d, d])
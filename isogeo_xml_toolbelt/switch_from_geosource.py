@@ -16,10 +16,14 @@
 
 # standard library
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+import os
 from os import rename
 from pathlib import Path
 import re
-import shutil
+from threading import Lock
 from uuid import UUID
 
 # 3rd party library
@@ -27,21 +31,132 @@ import click
 from lxml import etree
 
 # modules
-from csv_reporter import CsvReporter
-from reader_iso19139 import MetadataIso19139
-from reader_iso19110 import MetadataIso19110
+from isogeo_xml_toolbelt.readers import MetadataIso19110, MetadataIso19139, get_reader
+from isogeo_xml_toolbelt.reporters import CsvReporter, PartitionedCsvReporter
+from isogeo_xml_toolbelt.utils import (
+    PLACEMENT_MODES,
+    AttachmentTransfer,
+    CheckpointJournal,
+    bounded_map,
+    place_file,
+)
+from isogeo_xml_toolbelt.validators import validate_many
+from isogeo_xml_toolbelt.validators.xsd_validator import (
+    REPORT_HEADERS as VALIDATION_HEADERS,
+    iter_report_rows,
+)
 
 # #############################################################################
 # ########## Globals ###############
 # ##################################
 
-# required subfolders
-input_dir = Path("input/").mkdir(exist_ok=True)
-output_dir = Path("output/").mkdir(exist_ok=True)
-
 # logging
 logging.basicConfig(level=logging.INFO)
 
+# GeoSource folder structure
+GEOSOURCE_SUBFOLDERS = frozenset(("metadata", "private", "public"))
+
+# journal of completed folders, stored into the output folder
+JOURNAL_FILENAME = ".switch_from_geosource.journal"
+
+# destination filenames reserved by the metadata folders, stored into the output folder
+NAMES_FILENAME = ".switch_from_geosource.names"
+
+# checksums of copied attached files, stored into the output folder
+MANIFEST_FILENAME = "attachments_manifest.csv"
+
+# XSD validation report of the placed metadata, stored into the output folder
+VALIDATION_FILENAME = "validation_report.csv"
+
+# folders which failed to be migrated, stored into the output folder
+ERRORS_FILENAME = "errors_report.csv"
+ERRORS_HEADERS = ["folder", "md_path", "dest_path", "error"]
+
+# lengths of the strings accepted by uuid.UUID (hex, canonical, braces, urn)
+UUID_LENGTHS = frozenset((32, 36, 38, 45))
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class DestinationNames(object):
+    """Reserve the metadata destination filenames of a migration, so that records
+    with the same title don't overwrite each other, even when placed by
+    concurrent workers. A name already reserved or existing is suffixed with the
+    UUID of the metadata folder.
+
+    Reservations can be written into a file before the metadata are placed: a
+    resumed run gives the same names to the folders placed but not journaled by
+    the interrupted one, instead of placing them again under suffixed names.
+
+    :param pathlib.Path path: path to the reservations file, one `folder UUID`
+        and destination path by line, tab separated. Default: None (in memory).
+    :param bool resume: load the existing reservations and append to them.
+        Default: False.
+    """
+
+    def __init__(self, path: Path = None, resume: bool = False):
+        """Instanciation: load the reservations and open the file."""
+        self._lock = Lock()
+        self._reserved = set()
+        self._by_folder = {}
+        self._file = None
+        if path is None:
+            return
+
+        torn_line = False
+        if resume and path.is_file():
+            lines = path.read_text(encoding="utf-8").split("\n")
+            # last element is empty unless the last line was torn by a crash
+            torn_line = bool(lines[-1])
+            for line in lines[:-1]:
+                folder_name, _, dest_filename = line.partition("\t")
+                if dest_filename:
+                    self._by_folder[folder_name] = Path(dest_filename)
+            self._reserved.update(self._by_folder.values())
+            logging.info(
+                "{} destination names loaded: {}".format(len(self._by_folder), path)
+            )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open(mode="a" if resume else "w", encoding="utf-8")
+        if torn_line:
+            self._file.write("\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def reserve(self, dest_dir: Path, stem: str, folder_name: str) -> Path:
+        """Return a destination filename not used by another record: the one
+        reserved by a previous run for the same folder, if any.
+
+        :param pathlib.Path dest_dir: destination folder.
+        :param str stem: filename without extension, from the metadata title.
+        :param str folder_name: name (UUID) of the metadata folder.
+        """
+        with self._lock:
+            if folder_name in self._by_folder:
+                return self._by_folder.get(folder_name)
+            dest_filename = dest_dir / (stem + ".xml")
+            if dest_filename in self._reserved or dest_filename.exists():
+                dest_filename = dest_dir / "{}_{}.xml".format(stem, folder_name)
+            self._reserved.add(dest_filename)
+            self._by_folder[folder_name] = dest_filename
+            if self._file is not None:
+                # flushed before the file is placed
+                self._file.write("{}\t{}\n".format(folder_name, dest_filename))
+                self._file.flush()
+        return dest_filename
+
+    def close(self):
+        """Close the reservations file."""
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
 # #############################################################################
 # ########## Functions #############
 # ##################################
@@ -64,35 +179,76 @@ def list_metadata_folder(folder: str, kind: str = "geosource") -> tuple:
         d-----             0135b681-5a76-4824-b7fa-0c492df3182d/public
         ------      858    0135b681-5a76-4824-b7fa-0c492df3182d/info.xml
     """
-    li_metadata_folders = []
-    # parse folder structure
-    for subfolder in folder.glob("**"):
-        # if foldername is a valid UUID, it's a geosource subfolder
+    return tuple(iter_metadata_folders(folder, kind))
+
+
+def iter_metadata_folders(folder: str, kind: str = "geosource"):
+    """Walk a directory structure and yield metadata folders as they are found.
+
+    Built on `os.scandir`: the file types returned with directory entries are
+    reused instead of calling `stat` on each path, and GeoSource folders are not
+    walked into. See list_metadata_folder for the expected structure.
+
+    :param str folder: path to the parent folder to parse.
+    :param str kind: tool structure to check. Until now, only geosource.
+    """
+    root = Path(folder).resolve()
+    if is_uuid(root.name) and is_geosource_folder(str(root)):
+        yield root
+        return
+
+    stack = [str(root)]
+    while stack:
         try:
-            UUID(subfolder.name)
-        except ValueError:
-            continue
-        # check if required subfolders are present
-        if not check_folder_structure(subfolder):
-            logging.info("Folder ignored because of bad structure.")
-            continue
-        # check if required metadata.xml is present
-        if not get_md_path(subfolder):
-            logging.info("Folder ignored because of missing metadata file.")
+            with os.scandir(stack.pop()) as entries:
+                subfolders = [i for i in entries if i.is_dir(follow_symlinks=False)]
+        except OSError as err:
+            logging.error("Folder can't be listed: {}".format(err))
             continue
-        # append to the list
-        li_metadata_folders.append(subfolder.resolve())
-    return tuple(li_metadata_folders)
+
+        for entry in subfolders:
+            # if foldername is a valid UUID, it's a geosource subfolder
+            if is_uuid(entry.name) and is_geosource_folder(entry.path):
+                yield Path(entry.path)
+            else:
+                stack.append(entry.path)
+
+
+def is_uuid(name: str) -> bool:
+    """Check if a string is a valid UUID, without trying to parse strings
+    which can't be one.
+
+    :param str name: string to check.
+    """
+    if len(name) not in UUID_LENGTHS:
+        return False
+    try:
+        UUID(name)
+    except ValueError:
+        return False
+    return True
 
 
-def check_folder_structure(folder: str, kind: str = "geosource") -> bool:
-    """Check folder structure.
+def is_geosource_folder(folder: str) -> bool:
+    """Check that a folder has the GeoSource structure: required subfolders
+    and metadata/metadata.xml file.
 
     :param str folder: path to the folder to check.
-    :param str kind: tool structure to check. Until now, only geosource.
     """
-    subfolders = [x.name for x in folder.iterdir() if x.is_dir()]
-    return set(["metadata", "private", "public"]).issubset(subfolders)
+    try:
+        with os.scandir(folder) as entries:
+            subfolders = {i.name for i in entries if i.is_dir()}
+    except OSError:
+        return False
+    # check if required subfolders are present
+    if not GEOSOURCE_SUBFOLDERS.issubset(subfolders):
+        logging.info("Folder ignored because of bad structure.")
+        return False
+    # check if required metadata.xml is present
+    if not os.path.isfile(os.path.join(folder, "metadata", "metadata.xml")):
+        logging.info("Folder ignored because of missing metadata file.")
+        return False
+    return True
 
 
 def get_md_global_info(folder: str) -> tuple:
@@ -163,14 +319,17 @@ def get_metadata(metadata_path: str, metadata_type: str = "iso19139") -> tuple:
     """Load metadata as an object and get required information (title, SRS...).
 
     :param str metadata_path: path to the metadata.
-    :param str metadata_type: type of metadata. iso19139 or iso19110.
+    :param str metadata_type: type of metadata. iso19139 or iso19110. If another
+        type is given (GeoSource profiles like iso19139.fra...), it's sniffed from
+        the file.
     """
     # load depending on the ISO format
-    if metadata_type == "iso19139":
-        md = MetadataIso19139(xml=metadata_path)
+    reader = get_reader(metadata_path, metadata_type)
+    if reader is MetadataIso19139:
+        md = reader(xml=metadata_path)
         d_md = {"title": md.title}
-    elif metadata_type == "iso19110":
-        md = MetadataIso19110(xml=metadata_path)
+    elif reader is MetadataIso19110:
+        md = reader(xml=metadata_path)
         d_md = {"title": md.name}
     else:
         logging.warning("Metadata type not supported: {}".format(metadata_type))
@@ -180,6 +339,172 @@ def get_metadata(metadata_path: str, metadata_type: str = "iso19139") -> tuple:
     return d_md
 
 
+def parse_metadata_folder(folder: Path) -> dict:
+    """Read the info.xml and the metadata of a GeoSource folder. Errors are
+    stored into the returned dictionary rather than raised, so the function can
+    be run in a pool of processes.
+
+    :param pathlib.Path folder: path to the metadata folder.
+
+    Structure of the returned dict:
+
+        {"folder": folder path,
+         "cat_uuid": catalog UUID,
+         "md_path": absolute path to the metadata.xml,
+         "md_type": metadata type (ISO number),
+         "files": list of absolute paths to attached files,
+         "md": metadata information returned by get_metadata,
+         "error": error message or None,
+         }
+    """
+    record = {"folder": folder, "md": None, "error": None}
+    try:
+        info = get_md_global_info(folder)
+    except Exception as err:
+        record["error"] = "Reading info file of {} returned an error: {}".format(
+            folder, err
+        )
+        return record
+    if not info:
+        record["error"] = "Info file not found."
+        return record
+    record.update(zip(("cat_uuid", "md_path", "md_type", "files"), info))
+
+    try:
+        record["md"] = get_metadata(record.get("md_path"), record.get("md_type"))
+    except Exception as err:
+        record["error"] = "Parsing {} returned an error: {}".format(
+            record.get("md_path"), err
+        )
+        return record
+    if not record.get("md"):
+        record["error"] = "Metadata type not supported: {}".format(
+            record.get("md_type")
+        )
+    return record
+
+
+def place_metadata_files(
+    record: dict,
+    output_dir: Path,
+    placement: str = "copy",
+    transfer: AttachmentTransfer = None,
+    names: DestinationNames = None,
+) -> dict:
+    """Place the metadata file of a parsed folder into
+    `<output_dir>/<catalog UUID>/<metadata type>/<title>.xml` and its attached
+    files into `<output_dir>/<catalog UUID>/<metadata type>/<folder UUID>/<public|private>/`.
+    Errors are stored into the record rather than raised.
+
+    :param dict record: parsed folder, as returned by parse_metadata_folder.
+    :param pathlib.Path output_dir: path to the output folder.
+    :param str placement: how files are placed: copy, hardlink, reflink or move. Default: `copy`.
+    :param AttachmentTransfer transfer: if set, attached files are copied through it,
+        with checksums and deduplication, whatever the placement. Default: `None`.
+    :param DestinationNames names: reserved destination filenames, shared by the
+        records of a migration. Default: `None` (records with the same title
+        overwrite each other).
+    """
+    if record.get("error"):
+        return record
+    try:
+        _place_record(record, output_dir, placement, transfer, names)
+    except Exception as err:
+        record["error"] = "Placing {} returned an error: {}".format(
+            record.get("md_path"), err
+        )
+    return record
+
+
+def _place_record(
+    record: dict,
+    output_dir: Path,
+    placement: str,
+    transfer: AttachmentTransfer,
+    names: DestinationNames,
+):
+    """Place the files of a record, see place_metadata_files."""
+    # ensure that the dest folder is created
+    dest_dir = output_dir.joinpath(record.get("cat_uuid"), record.get("md_type"))
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    # format output filename
+    md_title = record.get("md").get("title")
+    if not md_title:
+        md_title = "NoTitle"
+        logging.warning("Title is missing: {}".format(record.get("md_path")))
+    stem = re.sub(r"[^\w\-_\. ]", "", md_title)
+    if names is None:
+        dest_filename = dest_dir.joinpath(stem + ".xml")
+    else:
+        dest_filename = names.reserve(dest_dir, stem, record.get("folder").name)
+    # metadata
+    place_file(record.get("md_path"), dest_filename.resolve(), placement)
+    record["dest_path"] = dest_filename
+
+    # attached files, keeping their public/private folder
+    record["dest_files"] = [
+        dest_dir.joinpath(
+            record.get("folder").name, attached_file.parent.name, attached_file.name
+        )
+        for attached_file in record.get("files")
+    ]
+    if transfer is not None:
+        rows = transfer.transfer_many(
+            list(zip(record.get("files"), record.get("dest_files")))
+        )
+        errors = [row.get("error") for row in rows if row.get("error")]
+        if errors:
+            raise IOError("; ".join(errors))
+        return
+    for attached_file, dest_file in zip(record.get("files"), record.get("dest_files")):
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
+        place_file(attached_file, dest_file, placement)
+
+
+def migrate_metadata_folders(
+    folders,
+    output_dir: Path,
+    jobs: int = 1,
+    placement: str = "copy",
+    transfer: AttachmentTransfer = None,
+    names: DestinationNames = None,
+):
+    """Staged pipeline: metadata folder → info.xml and metadata parsing →
+    copy. Yield parsed records once copied, for the report stage. A record
+    which failed is yielded with its `error`, the next ones being processed.
+
+    With several jobs, parsing (CPU-bound) runs in a pool of processes and copies
+    (I/O-bound) in a pool of threads, stages being connected by bounded queues.
+
+    :param folders: iterable of metadata folders, as listed by list_metadata_folder.
+    :param pathlib.Path output_dir: path to the output folder.
+    :param int jobs: number of parallel workers. Default: 1 (sequential).
+    :param str placement: how files are placed: copy, hardlink, reflink or move. Default: `copy`.
+    :param AttachmentTransfer transfer: if set, attached files are copied through it. Default: `None`.
+    :param DestinationNames names: reserved destination filenames, for example
+        loaded from a previous run. Default: `None` (reserved in memory).
+    """
+    copy = partial(
+        place_metadata_files,
+        output_dir=output_dir,
+        placement=placement,
+        transfer=transfer,
+        names=names or DestinationNames(),
+    )
+    if jobs <= 1:
+        for folder in folders:
+            yield copy(parse_metadata_folder(folder))
+        return
+
+    max_pending = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as parsers, ThreadPoolExecutor(
+        max_workers=jobs
+    ) as copiers:
+        parsed = bounded_map(parsers, parse_metadata_folder, folders, max_pending)
+        for record in bounded_map(copiers, copy, parsed, max_pending):
+            yield record
+
+
 # #############################################################################
 # ####### Command-line ############
 # #################################
@@ -195,13 +520,58 @@ def get_metadata(metadata_path: str, metadata_type: str = "iso19139") -> tuple:
     help="Path to the output folder. Default: './output'.",
 )
 @click.option("--csv", default=1, help="Summarize into a CSV file. Default: True.")
+@click.option(
+    "--partition",
+    default=0,
+    help="Split the CSV report into './report/<catalog UUID>/<schema>.csv' files. Default: False.",
+)
 @click.option(
     "--limit",
     default=None,
     help="Parse only the specified number of files (useful for tests). Leave blank for no limit (default).",
 )
+@click.option(
+    "--jobs",
+    default=1,
+    help="Number of parallel workers to parse and copy metadata. Default: 1.",
+)
+@click.option(
+    "--placement",
+    default="copy",
+    type=click.Choice(PLACEMENT_MODES),
+    help="How metadata and attached files are placed into the output folder. "
+    "hardlink and reflink require input and output on the same filesystem. Default: copy.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip folders completed by a previous run and append to its reports.",
+)
+@click.option(
+    "--validate",
+    is_flag=True,
+    help="Validate the placed metadata against their XSD into "
+    "'<output_dir>/{}'.".format(VALIDATION_FILENAME),
+)
+@click.option(
+    "--xsd_dir",
+    default=None,
+    help="Local copy of the XSD schemas. Default: $ISOGEO_XSD_DIR, else './xsd'.",
+)
 @click.option("--log", default="DEBUG", help="Log level. Default: ERROR.")
-def cli_switch_from_geosource(input_dir, output_dir, csv, limit, log):
+def cli_switch_from_geosource(
+    input_dir,
+    output_dir,
+    csv,
+    partition,
+    limit,
+    jobs,
+    placement,
+    resume,
+    validate,
+    xsd_dir,
+    log,
+):
     """
     """
     # logging option
@@ -218,59 +588,102 @@ def cli_switch_from_geosource(input_dir, output_dir, csv, limit, log):
     output_dir = Path(output_dir)
     if not output_dir.exists():
         output_dir.mkdir(parents=True, exist_ok=True)
-    # get list of metadata
-    li_metadata_folders = list_metadata_folder(input_folder)
-    logging.info(
-        "{} compatible metadata folders found.".format(len(li_metadata_folders))
-    )
-    # guess if it's a 19110 or a 19139 metadata
-    d_metadata = {i: get_md_global_info(i) for i in li_metadata_folders}
     # csv report
+    report_headers = ["name", "filename", "title", "format", "Format"]
     if not csv:
         logging.debug("CSV export disabled.")
-    csv_report = CsvReporter(
-        csvpath=Path("./report.csv"),
-        headers=["name", "filename", "title", "format", "Format"],
+    elif partition:
+        csv_report = PartitionedCsvReporter(
+            root=Path("./report"), headers=report_headers, append=resume
+        )
+    else:
+        csv_report = CsvReporter(
+            csvpath=Path("./report.csv"), headers=report_headers, append=resume
+        )
+    # copied attached files are checksummed into a manifest
+    transfer = None
+    if placement == "copy":
+        transfer = AttachmentTransfer(
+            manifest=output_dir / MANIFEST_FILENAME, jobs=jobs, append=resume
+        )
+    # journal of completed folders
+    journal = CheckpointJournal(
+        output_dir / JOURNAL_FILENAME,
+        resume=resume,
+        before_sync=csv_report.flush if csv else None,
     )
-
-    # parse dict
+    # folders which failed
+    errors_report = CsvReporter(
+        csvpath=output_dir / ERRORS_FILENAME, headers=ERRORS_HEADERS, append=resume
+    )
+    # destination names, reserved before the metadata are placed
+    names = DestinationNames(output_dir / NAMES_FILENAME, resume=resume)
+
+    # list metadata folders: parsing starts as soon as the first one is found
+    metadata_folders = iter_metadata_folders(input_folder)
+    if resume:
+        metadata_folders = (i for i in metadata_folders if i.name not in journal)
+    if limit:
+        metadata_folders = islice(metadata_folders, int(limit))
+
+    # parse, copy and report
+    count_folders = 0
+    placed = []  # metadata files to validate
     with click.progressbar(
-        d_metadata, label="Parsing metadata...", length=len(d_metadata)
-    ) as dico_mds:
-        for i in dico_mds:
-            # print(i)
-            # print(d_metadata.get(i)[2], get_md_title(
-            #     d_metadata.get(i)[1], d_metadata.get(i)[2]))
-            # print(d_metadata.get(i)[0], d_metadata.get(i)[2])
-
-            # ensure that the dest folder is created
-            dest_dir = output_dir.joinpath(d_metadata.get(i)[0], d_metadata.get(i)[2])
-            dest_dir.mkdir(parents=True, exist_ok=True)
-            # format output filename
-            try:
-                md = get_metadata(d_metadata.get(i)[1], d_metadata.get(i)[2])
-            except Exception as err:
-                logging.error(
-                    "Parsing {} returned an error: {}".format(d_metadata.get(i)[1], err)
+        migrate_metadata_folders(
+            metadata_folders,
+            output_dir,
+            jobs=jobs,
+            placement=placement,
+            transfer=transfer,
+            names=names,
+        ),
+        label="Parsing metadata...",
+    ) as records:
+        for record in records:
+            if record.get("error"):
+                logging.error(record.get("error"))
+                errors_report.add_unique(
+                    {key: record.get(key) or "" for key in ERRORS_HEADERS}
                 )
                 continue
-            # print(md)
-            if not md:
-                continue
-            md_title = md.get("title")
-            if not md_title:
-                md_title = "NoTitle"
-                logging.warning("Title is missing: {}".format(d_metadata.get(i)[1]))
-            dest_filename = dest_dir.joinpath(
-                re.sub(r"[^\w\-_\. ]", "", md_title) + ".xml"
-            )
-            # copy
-            # print(dest_filename.resolve())
-            shutil.copy(str(d_metadata.get(i)[1]), str(dest_filename.resolve()))
+            count_folders += 1
 
             # report
-            if csv:
-                csv_report.add_unique(md)
+            if csv and partition:
+                csv_report.add_unique(
+                    record.get("md"),
+                    cat_uuid=record.get("cat_uuid"),
+                    schema=record.get("md_type"),
+                )
+            elif csv:
+                csv_report.add_unique(record.get("md"))
+            journal.add(record.get("folder").name)
+            if validate:
+                placed.append(record.get("dest_path"))
+
+    logging.info("{} compatible metadata folders found.".format(count_folders))
+
+    # close journal and reports
+    journal.close()
+    names.close()
+    errors_report.close()
+    if csv:
+        csv_report.close()
+    if transfer is not None:
+        transfer.close()
+
+    # validate placed metadata
+    if validate:
+        results = validate_many(
+            placed, xsd_dir=Path(xsd_dir) if xsd_dir else None, jobs=jobs
+        )
+        with CsvReporter(
+            csvpath=output_dir / VALIDATION_FILENAME,
+            headers=VALIDATION_HEADERS,
+            append=resume,
+        ) as validation_report:
+            validation_report.add_multiple(list(iter_report_rows(results)))
 
 
 # #############################################################################
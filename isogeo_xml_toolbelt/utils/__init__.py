@@ -2,3 +2,8 @@
 #! python3  # noqa: E265
 
 from .xml_utils import XmlUtils  # noqa: F401,F403
+from .file_placement import PLACEMENT_MODES, place_file  # noqa: F401,F403
+from .checkpoint_journal import CheckpointJournal  # noqa: F401,F403
+from .attachment_transfer import AttachmentTransfer  # noqa: F401,F403
+from .xml_sniffer import SniffedSchema, sniff_metadata_schema  # noqa: F401,F403
+from .parallel_map import bounded_map  # noqa: F401,F403
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Attachment transfer
+
+    Purpose:     Copy attached files over a pool of threads, computing their checksum
+    during the copy, deduplicating identical files and writing a manifest.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import csv
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event, Lock
+
+# submodules
+from isogeo_xml_toolbelt.reporters import CsvReporter
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# supported checksum algorithms
+CHECKSUM_ALGORITHMS = ("blake2b", "sha256")
+
+# manifest columns
+MANIFEST_HEADERS = [
+    "source",
+    "destination",
+    "size",
+    "algorithm",
+    "checksum",
+    "linked_to",
+    "error",
+]
+
+# size of the chunks read from the source files
+READ_CHUNK = 1024 * 1024
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class AttachmentTransfer(object):
+    """Transfer attached files, deduplicating identical files: a file with the
+    same checksum as a file already transferred is hardlinked to it instead of
+    being stored twice, without being written into the destination folder.
+
+    A file whose size differs from the transferred ones can't be a duplicate: it's
+    read once, its checksum being computed while it's copied. Other files are
+    hashed before being copied or linked. Files are copied into a temporary file
+    of the destination folder, then moved into place.
+
+    :param pathlib.Path manifest: path to the CSV manifest to write.
+    :param str algorithm: checksum algorithm, `blake2b` or `sha256`. Default: `blake2b`.
+    :param int jobs: number of threads copying files. Default: 4.
+    :param bool append: append to an existing manifest, files it lists being
+        deduplicated too. Default: False.
+    """
+
+    def __init__(
+        self,
+        manifest: Path = Path("./attachments_manifest.csv"),
+        algorithm: str = "blake2b",
+        jobs: int = 4,
+        append: bool = False,
+    ):
+        """Instanciation."""
+        if algorithm not in CHECKSUM_ALGORITHMS:
+            raise ValueError(
+                "Checksum algorithm ({}) must be one of: {}".format(
+                    algorithm, ", ".join(CHECKSUM_ALGORITHMS)
+                )
+            )
+        self.algorithm = algorithm
+        self._executor = ThreadPoolExecutor(max_workers=max(jobs, 1))
+        self._lock = Lock()
+        # events are set once the file is in place
+        self._by_checksum = {}  # {checksum: (first destination, event)}
+        self._by_size = {}  # {size: event of the first file of this size}
+        if append and Path(manifest).is_file():
+            self._load_manifest(Path(manifest))
+        self.manifest = CsvReporter(
+            csvpath=manifest, headers=MANIFEST_HEADERS, append=append
+        )
+
+    def _load_manifest(self, manifest: Path):
+        """Register the files copied by a previous run, listed in its manifest."""
+        done = Event()
+        done.set()
+        with manifest.open(newline="", encoding="utf-8") as in_csv:
+            for row in csv.DictReader(in_csv, delimiter=";"):
+                if row.get("error") or row.get("linked_to"):
+                    continue
+                if row.get("algorithm") != self.algorithm:
+                    continue
+                destination = Path(row.get("destination"))
+                if not destination.is_file():
+                    continue
+                self._by_checksum.setdefault(row.get("checksum"), (destination, done))
+                self._by_size.setdefault(int(row.get("size")), done)
+        logging.info(
+            "{} transferred files loaded from manifest: {}".format(
+                len(self._by_checksum), manifest
+            )
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, src: Path, dst: Path):
+        """Schedule the transfer of a file. Return a future of the manifest row.
+
+        :param pathlib.Path src: path to the source file.
+        :param pathlib.Path dst: path to the destination file.
+        """
+        return self._executor.submit(self.transfer, src, dst)
+
+    def transfer_many(self, files: list) -> list:
+        """Transfer a set of files over the pool of threads and return the
+        manifest rows.
+
+        :param list files: list of tuples (source path, destination path).
+        """
+        futures = [self.submit(src, dst) for src, dst in files]
+        return [future.result() for future in futures]
+
+    def add_error(self, src: Path, dst: Path, error: str) -> dict:
+        """Write an error row into the manifest and return it.
+
+        :param pathlib.Path src: path to the source file.
+        :param pathlib.Path dst: path to the destination file.
+        :param str error: error message.
+        """
+        row = {"source": str(src), "destination": str(dst), "error": error}
+        with self._lock:
+            self.manifest.add_unique(row)
+        return row
+
+    def transfer(self, src: Path, dst: Path) -> dict:
+        """Transfer a single file and return its manifest row. Errors are
+        logged and written into the manifest rather than raised.
+
+        :param pathlib.Path src: path to the source file.
+        :param pathlib.Path dst: path to the destination file.
+        """
+        try:
+            return self._transfer(Path(src), Path(dst))
+        except Exception as err:
+            logging.error("Transferring {} failed: {}".format(src, err))
+            return self.add_error(src, dst, "{}: {}".format(type(err).__name__, err))
+
+    def _transfer(self, src: Path, dst: Path) -> dict:
+        """Transfer a single file, see transfer."""
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        size = src.stat().st_size
+        linked_to = None
+        with self._lock:
+            first_of_size = self._by_size.get(size)
+            if first_of_size is None:
+                done = self._by_size[size] = Event()
+
+        if first_of_size is None:
+            # not a duplicate: checksum computed while copying
+            try:
+                checksum = self._copy_and_hash(src, dst)
+                with self._lock:
+                    self._by_checksum.setdefault(checksum, (dst, done))
+            finally:
+                done.set()
+        else:
+            # compared once the first file of this size is registered
+            first_of_size.wait()
+            checksum = self._hash_file(src)
+            with self._lock:
+                first = self._by_checksum.get(checksum)
+                if first is None:
+                    done = Event()
+                    self._by_checksum[checksum] = (dst, done)
+            if first is None:
+                try:
+                    self._copy_and_hash(src, dst)
+                except BaseException:
+                    # duplicates waiting for it copy themselves
+                    with self._lock:
+                        del self._by_checksum[checksum]
+                    raise
+                finally:
+                    done.set()
+            else:
+                linked_to = self._link_duplicate(src, dst, *first)
+
+        row = {
+            "source": str(src),
+            "destination": str(dst),
+            "size": size,
+            "algorithm": self.algorithm,
+            "checksum": checksum,
+            "linked_to": str(linked_to) if linked_to else "",
+            "error": "",
+        }
+        with self._lock:
+            self.manifest.add_unique(row)
+        return row
+
+    def _new_hash(self):
+        """Return a new hash object."""
+        return hashlib.new(self.algorithm)
+
+    def _hash_file(self, src: Path) -> str:
+        """Compute the checksum of a file."""
+        file_hash = self._new_hash()
+        with src.open("rb") as fsrc:
+            for chunk in iter(lambda: fsrc.read(READ_CHUNK), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def _copy_and_hash(self, src: Path, dst: Path) -> str:
+        """Copy a file into a temporary file moved into place, computing its
+        checksum in the same read pass."""
+        fd, tmp_dst = tempfile.mkstemp(
+            prefix=".{}.".format(dst.name), suffix=".part", dir=str(dst.parent)
+        )
+        tmp_dst = Path(tmp_dst)
+        file_hash = self._new_hash()
+        try:
+            with src.open("rb") as fsrc, os.fdopen(fd, "wb") as fdst:
+                for chunk in iter(lambda: fsrc.read(READ_CHUNK), b""):
+                    file_hash.update(chunk)
+                    fdst.write(chunk)
+            # temporary files are created private
+            shutil.copymode(str(src), str(tmp_dst))
+            os.replace(str(tmp_dst), str(dst))
+        finally:
+            if tmp_dst.exists():
+                tmp_dst.unlink()
+        return file_hash.hexdigest()
+
+    def _link_duplicate(self, src: Path, dst: Path, first: Path, ready: Event):
+        """Hardlink the destination to the file already transferred with the
+        same checksum, once it's in place. Return the linked file, or None if
+        the file is copied because the first one is missing."""
+        ready.wait()
+        if not first.is_file():
+            logging.warning("Duplicated file missing ({}), file copied: {}".format(first, dst))
+            self._copy_and_hash(src, dst)
+            return None
+        if dst.exists():
+            dst.unlink()
+        try:
+            os.link(str(first), str(dst))
+        except OSError as err:
+            logging.warning("Hardlink not possible ({}), file copied: {}".format(err, dst))
+            shutil.copyfile(str(first), str(dst))
+        return first
+
+    def close(self):
+        """Wait for pending transfers and close the manifest."""
+        self._executor.shutdown(wait=True)
+        self.manifest.close()
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    with AttachmentTransfer(manifest=Path("./manifest.csv")) as transfer:
+        print(
+            transfer.transfer_many(
+                [(Path(__file__), Path("./a.py")), (Path(__file__), Path("./b.py"))]
+            )
+        )
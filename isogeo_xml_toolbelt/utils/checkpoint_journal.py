@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Checkpoint journal
+
+    Purpose:     Append-only journal of completed items (folder UUIDs...) used to
+    resume an interrupted run.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import logging
+import os
+from pathlib import Path
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class CheckpointJournal(object):
+    """Append-only journal storing one completed item per line.
+
+    Lines are fsynced by batches: after a crash, the items of the last batch may
+    be processed again. A line torn by a crash is ignored when the journal is
+    loaded.
+
+    :param pathlib.Path path: path to the journal file.
+    :param bool resume: load the existing journal and append to it. If False,
+        the journal is reset. Default: False.
+    :param int sync_every: number of items written between two fsync. Default: 100.
+    :param before_sync: optional callable executed before each fsync, for example
+        to flush reporters so that reported rows are on disk before their items are
+        marked as completed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        resume: bool = False,
+        sync_every: int = 100,
+        before_sync=None,
+    ):
+        """Instanciation: load the completed items and open the journal."""
+        # check parameters
+        if not isinstance(path, Path):
+            raise TypeError(
+                "Journal path must be a 'pathlib.Path' instance not {}".format(
+                    type(path)
+                )
+            )
+        if not isinstance(sync_every, int) or sync_every < 1:
+            raise ValueError(
+                "sync_every ({}) must be a positive integer".format(sync_every)
+            )
+        # attributes
+        self.path = path
+        self.sync_every = sync_every
+        self.before_sync = before_sync
+        self.completed = set()
+        self._pending = 0
+
+        # load completed items
+        torn_line = False
+        if resume and self.path.is_file():
+            content = self.path.read_text(encoding="utf-8")
+            lines = content.split("\n")
+            # last element is empty unless the last line was torn
+            torn_line = bool(lines[-1])
+            self.completed.update(i for i in lines[:-1] if i)
+            logging.info(
+                "{} completed items loaded from journal: {}".format(
+                    len(self.completed), self.path
+                )
+            )
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open(mode="a" if resume else "w", encoding="utf-8")
+        if torn_line:
+            self._file.write("\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def add(self, item: str):
+        """Mark an item as completed.
+
+        :param str item: completed item (must not contain a line break).
+        """
+        self._file.write("{}\n".format(item))
+        self.completed.add(item)
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Write pending items to the disk."""
+        if self.before_sync is not None:
+            self.before_sync()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        """Sync pending items and close the journal."""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    with CheckpointJournal(Path("./test.journal")) as journal:
+        journal.add("0135b681-5a76-4824-b7fa-0c492df3182d")
+    with CheckpointJournal(Path("./test.journal"), resume=True) as journal:
+        print("0135b681-5a76-4824-b7fa-0c492df3182d" in journal)
+    os.remove("./test.journal")
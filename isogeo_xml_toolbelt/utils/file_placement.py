@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - File placement
+
+    Purpose:     Place files into the output folder without copying bytes through
+    userspace when the filesystem allows it: hardlink, reflink, kernel copy or move.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import errno
+import logging
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# available placement modes
+PLACEMENT_MODES = ("copy", "hardlink", "reflink", "move")
+
+# Linux ioctl to share the extents of a file (btrfs, xfs...): FICLONE
+FICLONE = 0x40049409
+
+# errors meaning that a fast path is not supported and a fallback must be used
+UNSUPPORTED_ERRNOS = frozenset(
+    i
+    for i in (
+        getattr(errno, "EXDEV", None),
+        getattr(errno, "ENOSYS", None),
+        getattr(errno, "EINVAL", None),
+        getattr(errno, "ENOTSUP", None),
+        getattr(errno, "EOPNOTSUPP", None),
+        getattr(errno, "ENOTTY", None),
+        getattr(errno, "EPERM", None),
+        getattr(errno, "EBADF", None),
+    )
+    if i is not None
+)
+
+# chunk size for kernel copies
+COPY_CHUNK = 64 * 1024 * 1024
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def place_file(src: Path, dst: Path, mode: str = "copy") -> str:
+    """Place a file at the destination path, overwriting an existing file.
+    Hardlinks and reflinks fall back to a copy when the filesystem doesn't
+    support them (different devices, unsupported filesystem...).
+
+    :param pathlib.Path src: path to the source file.
+    :param pathlib.Path dst: path to the destination file.
+    :param str mode: placement mode, one of PLACEMENT_MODES. Default: `copy`.
+
+    :return: placement mode actually used.
+    """
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(
+            "Placement mode ({}) must be one of: {}".format(
+                mode, ", ".join(PLACEMENT_MODES)
+            )
+        )
+    src, dst = str(src), str(dst)
+
+    if mode == "move":
+        shutil.move(src, dst)
+        return mode
+
+    if mode == "hardlink":
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+            return mode
+        except OSError as err:
+            if err.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            logging.warning(
+                "Hardlink not possible ({}), file copied instead: {}".format(err, src)
+            )
+
+    if mode == "reflink" and reflink_file(src, dst):
+        return mode
+
+    copy_file(src, dst)
+    return "copy"
+
+
+def reflink_file(src: str, dst: str) -> bool:
+    """Clone a file sharing its data blocks (copy-on-write), using the Linux
+    FICLONE ioctl. Return False if the filesystem doesn't support it.
+
+    :param str src: path to the source file.
+    :param str dst: path to the destination file.
+    """
+    if fcntl is None:
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as err:
+            if err.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            logging.debug("Reflink not supported ({}): {}".format(err, src))
+            return False
+    shutil.copymode(src, dst)
+    return True
+
+
+def copy_file(src: str, dst: str):
+    """Copy a file data and permission bits, letting the kernel move the bytes
+    with `os.copy_file_range` or `os.sendfile` when available. Fall back to a
+    buffered copy otherwise.
+
+    :param str src: path to the source file.
+    :param str dst: path to the destination file.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(in_fd).st_size
+        copied = _kernel_copy(in_fd, out_fd, size)
+        if copied < size:
+            # resume from where the kernel copy stopped
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            shutil.copyfileobj(fsrc, fdst)
+    shutil.copymode(src, dst)
+
+
+def _kernel_copy(in_fd: int, out_fd: int, size: int) -> int:
+    """Copy bytes between two file descriptors within the kernel. Return the
+    number of bytes copied, which is lower than size if no fast path is available.
+    """
+    offset = 0
+    for func in ("copy_file_range", "sendfile"):
+        if not hasattr(os, func):
+            continue
+        try:
+            while offset < size:
+                count = min(COPY_CHUNK, size - offset)
+                if func == "copy_file_range":
+                    sent = os.copy_file_range(
+                        in_fd, out_fd, count, offset_src=offset, offset_dst=offset
+                    )
+                else:
+                    os.lseek(out_fd, offset, os.SEEK_SET)
+                    sent = os.sendfile(out_fd, in_fd, offset, count)
+                if not sent:
+                    break
+                offset += sent
+            return offset
+        except OSError as err:
+            if err.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            logging.debug("{} not supported: {}".format(func, err))
+    return offset
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    for placement in PLACEMENT_MODES[:-1]:
+        print(placement, place_file(Path(__file__), Path("./test_placement.py"), placement))
+    os.remove("./test_placement.py")
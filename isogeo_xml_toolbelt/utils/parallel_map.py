@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Parallel map
+
+    Purpose:     Map a function over an iterable with a pool of workers, keeping
+    a bounded number of tasks in flight.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def bounded_map(executor, func, iterable, max_pending: int):
+    """Submit items of an iterable to an executor and yield results as they
+    complete, keeping at most `max_pending` items in flight. The iterable is
+    consumed lazily, so it acts as a bounded queue between two stages.
+
+    :param concurrent.futures.Executor executor: pool to submit tasks to.
+    :param func: function to apply to each item.
+    :param iterable: items to process.
+    :param int max_pending: maximum number of submitted and not yet yielded items.
+    """
+    pending = set()
+    for item in iterable:
+        pending.add(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in pending:
+        yield future.result()
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    with ThreadPoolExecutor(max_workers=2) as workers:
+        print(sorted(bounded_map(workers, abs, range(-5, 5), 4)))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Schema sniffer
+
+    Purpose:     Guess the metadata schema of a XML file (ISO 19139, 19110, 19115-3)
+    from its root element and namespace, reading only the beginning of the file.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import logging
+from collections import namedtuple
+from pathlib import Path
+
+# 3rd party library
+from lxml import etree
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# metadata root elements: {(namespace, local name): schema}
+ROOT_ELEMENTS = {
+    ("http://www.isotc211.org/2005/gmd", "MD_Metadata"): "iso19139",
+    ("http://www.isotc211.org/2005/gmi", "MI_Metadata"): "iso19139",
+    ("http://www.isotc211.org/2005/gfc", "FC_FeatureCatalogue"): "iso19110",
+    ("http://standards.iso.org/iso/19115/-3/mdb/1.0", "MD_Metadata"): "iso19115-3",
+    ("http://standards.iso.org/iso/19115/-3/mdb/2.0", "MD_Metadata"): "iso19115-3",
+    ("http://standards.iso.org/iso/19115/-3/mdb/2.0", "MI_Metadata"): "iso19115-3",
+}
+
+# wrappers around metadata records (CSW responses)
+WRAPPER_NAMESPACES = frozenset(
+    (
+        "http://www.opengis.net/cat/csw/2.0.2",
+        "http://www.opengis.net/cat/csw/3.0",
+    )
+)
+
+# bytes read at each step and maximum bytes read before giving up
+SNIFF_CHUNK = 4096
+SNIFF_MAX_BYTES = 65536
+
+# result of the sniffing
+SniffedSchema = namedtuple("SniffedSchema", ["schema", "tag", "wrapper"])
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+def sniff_metadata_schema(
+    xml: Path, max_bytes: int = SNIFF_MAX_BYTES
+) -> SniffedSchema:
+    """Guess the schema of a metadata XML file reading only its prolog and
+    first elements: the document is not fully parsed.
+
+    :param pathlib.Path xml: path to the XML file.
+    :param int max_bytes: maximum number of bytes to read. Default: 65536.
+
+    :return: named tuple (schema, tag, wrapper) where schema is one of
+        `iso19139`, `iso19110`, `iso19115-3` or None if unknown, tag is the
+        qualified name of the metadata element and wrapper the qualified name of
+        the root element if the record is wrapped (CSW response), else None.
+    """
+    parser = etree.XMLPullParser(events=("start",))
+    wrapper = None
+    read_bytes = 0
+    with Path(xml).open("rb") as in_xml:
+        while read_bytes < max_bytes:
+            chunk = in_xml.read(SNIFF_CHUNK)
+            if not chunk:
+                break
+            read_bytes += len(chunk)
+            try:
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    qname = etree.QName(elem)
+                    if qname.namespace in WRAPPER_NAMESPACES:
+                        wrapper = wrapper or qname.text
+                        continue
+                    return SniffedSchema(
+                        ROOT_ELEMENTS.get((qname.namespace, qname.localname)),
+                        qname.text,
+                        wrapper,
+                    )
+            except etree.XMLSyntaxError as err:
+                logging.debug("Not a XML file ({}): {}".format(err, xml))
+                break
+
+    return SniffedSchema(None, None, wrapper)
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    for xml_path in sorted(Path(r"tests/fixtures").glob("**/*.xml")):
+        print(xml_path, sniff_metadata_schema(xml_path))
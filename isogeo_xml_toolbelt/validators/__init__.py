@@ -0,0 +1,9 @@
+# coding: utf-8
+#! python3  # noqa: E265
+
+from .xsd_validator import (  # noqa: F401,F403
+    OfflineResolver,
+    XsdError,
+    XsdValidator,
+    validate_many,
+)
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - XSD validator
+
+    Purpose:     Validate ISO 19139 / 19110 XML files against their XSD schemas,
+    loaded from a local copy: schemas are never downloaded and each one is
+    compiled once per process.
+    Authors:     Isogeo
+    Python:      3.6.x
+
+    The local copy mirrors the schemas URLs: `<xsd_dir>/<host>/<path>`, for
+    example `xsd/www.isotc211.org/2005/gmd/gmd.xsd`, as downloaded by
+    `wget --mirror --no-parent http://www.isotc211.org/2005/`. Schemas imported
+    by absolute URLs (GML, XLink...) must be mirrored the same way.
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# standard library
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# 3rd party library
+from lxml import etree
+
+# submodules
+from isogeo_xml_toolbelt.utils.xml_sniffer import sniff_metadata_schema
+
+# #############################################################################
+# ########## Globals ###############
+# ##################################
+
+# local copy of the schemas, if not specified
+XSD_DIR_VARIABLE = "ISOGEO_XSD_DIR"
+DEFAULT_XSD_DIR = Path("xsd")
+
+# schema of the metadata elements: {namespace: schema URL}
+SCHEMA_LOCATIONS = {
+    "http://www.isotc211.org/2005/gmd": "http://www.isotc211.org/2005/gmd/gmd.xsd",
+    "http://www.isotc211.org/2005/gmi": "http://www.isotc211.org/2005/gmi/gmi.xsd",
+    "http://www.isotc211.org/2005/gfc": "http://www.isotc211.org/2005/gfc/gfc.xsd",
+}
+
+# validation error
+XsdError = namedtuple("XsdError", ["line", "column", "level", "type", "message"])
+
+# columns of the validation report: one row per error, or per valid file
+REPORT_HEADERS = ["path", "schema", "status", "line", "column", "level", "type", "message"]
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class OfflineResolver(etree.Resolver):
+    """Resolve schemas URLs to their local copy. URLs without local copy are not
+    resolved, the network access being forbidden to the parser.
+
+    :param pathlib.Path xsd_dir: local copy of the schemas.
+    """
+
+    def __init__(self, xsd_dir: Path):
+        """Instanciation."""
+        super(OfflineResolver, self).__init__()
+        self.xsd_dir = Path(xsd_dir)
+
+    def local_path(self, url: str) -> Path:
+        """Return the local copy of an URL, or None.
+
+        :param str url: schema URL.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return None
+        local = self.xsd_dir.joinpath(parts.netloc, parts.path.lstrip("/"))
+        return local if local.is_file() else None
+
+    def resolve(self, url, pubid, context):
+        local = self.local_path(url)
+        if local is None:
+            logging.debug("No local copy of {} in {}".format(url, self.xsd_dir))
+            return None
+        return self.resolve_filename(str(local), context)
+
+
+class XsdValidator(object):
+    """Validate metadata XML files against their XSD schema, picked from the
+    namespace of the metadata element. Schemas are compiled when first needed,
+    then kept.
+
+    :param pathlib.Path xsd_dir: local copy of the schemas. Default: the
+        `ISOGEO_XSD_DIR` environment variable, else `./xsd`.
+    """
+
+    def __init__(self, xsd_dir: Path = None):
+        """Instanciation."""
+        if xsd_dir is None:
+            xsd_dir = os.environ.get(XSD_DIR_VARIABLE, DEFAULT_XSD_DIR)
+        self.xsd_dir = Path(xsd_dir)
+        if not self.xsd_dir.is_dir():
+            raise IOError("Schemas folder doesn't exist: {}".format(self.xsd_dir))
+        self.resolver = OfflineResolver(self.xsd_dir)
+        self.schemas = {}  # {schema URL: compiled schema}
+        # documents are not allowed to load anything
+        self.parser = etree.XMLParser(
+            no_network=True, resolve_entities=False, load_dtd=False
+        )
+
+    def get_schema(self, url: str) -> etree.XMLSchema:
+        """Return the compiled schema of an URL.
+
+        :param str url: schema URL, see SCHEMA_LOCATIONS.
+        """
+        schema = self.schemas.get(url)
+        if schema is None:
+            local = self.resolver.local_path(url)
+            if local is None:
+                raise IOError("No local copy of {} in {}".format(url, self.xsd_dir))
+            parser = etree.XMLParser(no_network=True)
+            parser.resolvers.add(self.resolver)
+            schema = etree.XMLSchema(etree.parse(str(local), parser))
+            self.schemas[url] = schema
+            logging.info("Schema compiled: {}".format(url))
+        return schema
+
+    def validate_file(self, xml: Path) -> dict:
+        """Validate a metadata XML file. A metadata wrapped into a CSW response
+        is validated alone.
+
+        :param pathlib.Path xml: path to the XML file.
+
+        :return: dict with path, schema (URL), status (`valid`, `invalid` or
+            `unknown` if there is no schema for the metadata) and errors (list of
+            XsdError).
+        """
+        result = {"path": str(xml), "schema": "", "status": "unknown", "errors": []}
+        sniffed = sniff_metadata_schema(xml)
+        url = SCHEMA_LOCATIONS.get(etree.QName(sniffed.tag).namespace) if sniffed.tag else None
+        if url is None:
+            return result
+        result["schema"] = url
+        schema = self.get_schema(url)
+
+        tree = etree.parse(str(xml), self.parser)
+        elem = tree.getroot()
+        if sniffed.wrapper:
+            elem = next(elem.iter(sniffed.tag))
+        if schema.validate(elem):
+            result["status"] = "valid"
+        else:
+            result["status"] = "invalid"
+            result["errors"] = [
+                XsdError(i.line, i.column, i.level_name, i.type_name, i.message)
+                for i in schema.error_log
+            ]
+        return result
+
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+# validator of the current worker process, created by init_validator
+_VALIDATOR = None
+
+
+def init_validator(xsd_dir: Path = None):
+    """Create the validator of the current process: schemas are compiled once
+    per worker.
+
+    :param pathlib.Path xsd_dir: local copy of the schemas.
+    """
+    global _VALIDATOR
+    _VALIDATOR = XsdValidator(xsd_dir)
+
+
+def validate_one(xml: Path) -> dict:
+    """Validate a file with the validator of the current process. Errors
+    preventing the validation are reported with the `error` status instead of
+    raised.
+
+    :param pathlib.Path xml: path to the XML file.
+    """
+    try:
+        return _VALIDATOR.validate_file(xml)
+    except Exception as err:
+        logging.error("Validating {} failed: {}".format(xml, err))
+        return {
+            "path": str(xml),
+            "schema": "",
+            "status": "error",
+            "errors": [XsdError(0, 0, "FATAL", type(err).__name__, str(err))],
+        }
+
+
+def validate_many(inputs, xsd_dir: Path = None, jobs: int = 1) -> list:
+    """Validate a set of XML files over a pool of processes.
+
+    :param inputs: iterable of paths to the XML files.
+    :param pathlib.Path xsd_dir: local copy of the schemas.
+    :param int jobs: number of worker processes. Default: 1 (sequential).
+
+    :return: list of results (see XsdValidator.validate_file), in inputs order.
+    """
+    paths = [Path(xml) for xml in inputs]
+    if jobs <= 1:
+        init_validator(xsd_dir)
+        results = [validate_one(i) for i in paths]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_validator, initargs=(xsd_dir,)
+        ) as workers:
+            chunksize = max(1, len(paths) // (jobs * 8))
+            results = list(workers.map(validate_one, paths, chunksize=chunksize))
+
+    invalid = sum(1 for i in results if i.get("status") != "valid")
+    logging.info("{} files validated, {} not valid".format(len(results), invalid))
+    return results
+
+
+def iter_report_rows(results):
+    """Yield the validation report rows (see REPORT_HEADERS): one row per error,
+    or a single row for a file without errors.
+
+    :param results: validation results, as returned by validate_many.
+    """
+    for result in results:
+        row = {
+            "path": result.get("path"),
+            "schema": result.get("schema"),
+            "status": result.get("status"),
+        }
+        if not result.get("errors"):
+            yield row
+        for error in result.get("errors"):
+            yield dict(row, **error._asdict())
+
+
+# #############################################################################
+# ### Stand alone execution #######
+# #################################
+if __name__ == "__main__":
+    """Test parameters for a stand-alone run."""
+    for result in validate_many(sorted(Path("tests/fixtures").glob("iso*/*.xml"))):
+        print(result.get("path"), result.get("status"), len(result.get("errors")))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Fixer benchmark
+    Purpose:     Compare the legacy ISO 19139 fixer (xml.etree, one search per fix,
+    minidom pretty-printing) with the lxml one-pass fixer on synthetic records, and
+    check both produce equivalent outputs.
+    Authors:     Isogeo
+    Python:      3.6.x
+
+    Usage from the repo root folder:
+
+    ```python
+    python scripts/benchmarks/bench_fixer.py --records 10000
+    ```
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import click
+from lxml import etree
+
+from isogeo_xml_toolbelt.fixers import MetadataIso19139Fixer
+
+from legacy_fixer import LegacyIso19139Fixer
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+SAMPLE_XML = Path("tests/fixtures/iso19139/sample_19139.xml").resolve()
+
+# legacy fixer tags typos, corrected by the lxml fixer
+LEGACY_TYPOS = {
+    "{http://www.isotc211.org/2005/gmd}CI_date": "{http://www.isotc211.org/2005/gmd}CI_Date",
+    "{http://www.isotc211.org/2005/gco}date": "{http://www.isotc211.org/2005/gco}Date",
+}
+
+# #############################################################################
+# ######## Functions #################
+# ##################################
+
+
+def run_legacy(records: list, output_dir: Path):
+    """Fix records with the legacy fixer, pretty-printing its output."""
+    fixer = LegacyIso19139Fixer()
+    for xml_path in records:
+        fixer.fix_file(xml_path, output_dir / xml_path.name)
+
+
+def run_lxml(records: list, output_dir: Path):
+    """Fix records with the lxml fixer."""
+    fixer = MetadataIso19139Fixer()
+    for xml_path in records:
+        fixer.fix_file(xml_path, output_dir / xml_path.name)
+
+
+def signature(xml_path: Path, typos: dict = None) -> list:
+    """Return the elements of a XML file ignoring indentation: (tag, attributes,
+    text) in document order."""
+    typos = typos or {}
+    return [
+        (
+            typos.get(elem.tag, elem.tag),
+            sorted(elem.attrib.items()),
+            (elem.text or "").strip(),
+        )
+        for elem in etree.parse(str(xml_path)).iter()
+        if isinstance(elem.tag, str)
+    ]
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+@click.command()
+@click.option("--records", default=10000, show_default=True, help="Number of records to fix")
+def main(records):
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        input_dir = tmp_dir / "input"
+        input_dir.mkdir()
+        list_records = []
+        for i in range(records):
+            xml_path = input_dir / "record_{:05d}.xml".format(i)
+            shutil.copyfile(str(SAMPLE_XML), str(xml_path))
+            list_records.append(xml_path)
+
+        timings = {}
+        for name, func in (("legacy", run_legacy), ("lxml", run_lxml)):
+            output_dir = tmp_dir / name
+            output_dir.mkdir()
+            start = time.perf_counter()
+            func(list_records, output_dir)
+            timings[name] = time.perf_counter() - start
+
+        # equivalent outputs
+        for xml_path in list_records[:100]:
+            assert signature(
+                tmp_dir / "legacy" / xml_path.name, LEGACY_TYPOS
+            ) == signature(tmp_dir / "lxml" / xml_path.name), xml_path.name
+
+    click.echo("{} records fixed with equivalent results".format(records))
+    click.echo("legacy: {:.2f}s".format(timings.get("legacy")))
+    click.echo(
+        "lxml:   {:.2f}s (x{:.1f})".format(
+            timings.get("lxml"), timings.get("legacy") / timings.get("lxml")
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
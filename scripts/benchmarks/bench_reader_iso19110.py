@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - ISO 19110 reader benchmark
+    Purpose:     Compare the legacy feature attributes extraction (three XPath
+    queries per carrier of characteristics) with the single descent of the reader
+    on a synthetic catalogue, and check both extract the same attributes.
+    Authors:     Isogeo
+    Python:      3.6.x
+
+    Usage from the repo root folder:
+
+    ```python
+    python scripts/benchmarks/bench_reader_iso19110.py --attributes 5000
+    ```
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import click
+from lxml import etree
+
+from isogeo_xml_toolbelt.readers import MetadataIso19110, iter_feature_attributes
+from isogeo_xml_toolbelt.readers.reader_iso19110 import read_carrier
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+SAMPLE_XML = Path("tests/fixtures/iso19110/sample_19110.xml").resolve()
+
+NAMESPACES = {
+    "gco": "http://www.isotc211.org/2005/gco",
+    "gfc": "http://www.isotc211.org/2005/gfc",
+}
+
+CARRIERS_XPATH = (
+    "/gfc:FC_FeatureCatalogue/gfc:featureType/gfc:FC_FeatureType/"
+    "gfc:carrierOfCharacteristics"
+)
+
+# #############################################################################
+# ######## Functions #################
+# ##################################
+
+
+def generate_catalogue(xml_path: Path, attributes: int, per_type: int = 100):
+    """Write a catalogue of `attributes` attributes, `per_type` by feature type,
+    copying the carriers of the sample."""
+    sample = etree.parse(str(SAMPLE_XML))
+    root = sample.getroot()
+    feature_types = root.findall("gfc:featureType", NAMESPACES)
+    carriers = root.findall("gfc:featureType/*/gfc:carrierOfCharacteristics", NAMESPACES)
+    template = feature_types[0]
+    for feature_type in feature_types:
+        root.remove(feature_type)
+    for carrier in carriers:
+        carrier.getparent().remove(carrier)
+
+    for index in range(attributes):
+        if index % per_type == 0:
+            feature_type = etree.fromstring(etree.tostring(template))
+            feature_type[0].set("uuid", "type-{:05d}".format(index // per_type))
+            root.append(feature_type)
+        carrier = etree.fromstring(etree.tostring(carriers[index % len(carriers)]))
+        carrier.find("*/gfc:memberName/gco:LocalName", NAMESPACES).text = "ATTR_{:05d}".format(index)
+        feature_type[0].append(carrier)
+    sample.write(str(xml_path), encoding="utf-8", xml_declaration=True)
+
+
+def legacy_attributes(md: etree._ElementTree) -> dict:
+    """Extract the attributes as the reader did before: three XPath queries per
+    carrier of characteristics."""
+    attributes = {}
+    for item in md.xpath(CARRIERS_XPATH, namespaces=NAMESPACES):
+        attrName = item.xpath(
+            "gfc:FC_FeatureAttribute/gfc:memberName/gco:LocalName/text()",
+            namespaces=NAMESPACES,
+        )[0]
+        attrDescr = item.xpath(
+            "gfc:FC_FeatureAttribute/gfc:definition/gco:CharacterString/text()",
+            namespaces=NAMESPACES,
+        )[0]
+        attrtype = item.xpath(
+            "gfc:FC_FeatureAttribute/gfc:valueType/gco:TypeName/gco:aName/gco:CharacterString/text()",
+            namespaces=NAMESPACES,
+        )[0]
+        attributes.setdefault(attrName, []).append([attrDescr, attrtype])
+    return attributes
+
+
+def single_descent_attributes(md: etree._ElementTree) -> dict:
+    """Extract the attributes with one descent per carrier of characteristics."""
+    attributes = {}
+    for item in md.xpath(CARRIERS_XPATH, namespaces=NAMESPACES):
+        attrName, attrDescr, attrtype = read_carrier(item)[:3]
+        attributes.setdefault(attrName, []).append([attrDescr, attrtype])
+    return attributes
+
+
+def best_of(func, md: etree._ElementTree, repeat: int) -> tuple:
+    """Return (best time, result) of `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(md)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+@click.command()
+@click.option("--attributes", default=5000, show_default=True, help="Number of attributes")
+@click.option("--repeat", default=5, show_default=True, help="Runs per measure")
+def main(attributes, repeat):
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = Path(tmp_dir) / "catalogue.xml"
+        generate_catalogue(xml_path, attributes)
+        md = etree.parse(str(xml_path))
+
+        legacy, legacy_result = best_of(legacy_attributes, md, repeat)
+        single, single_result = best_of(single_descent_attributes, md, repeat)
+        assert legacy_result == single_result
+        start = time.perf_counter()
+        MetadataIso19110(xml_path)
+        reader = time.perf_counter() - start
+        start = time.perf_counter()
+        assert sum(1 for _ in iter_feature_attributes(xml_path)) == attributes
+        streamed = time.perf_counter() - start
+
+    click.echo("{} attributes extracted with equivalent results".format(attributes))
+    click.echo("legacy:         {:.3f}s".format(legacy))
+    click.echo("single descent: {:.3f}s (x{:.1f})".format(single, legacy / single))
+    click.echo("whole reader:   {:.3f}s".format(reader))
+    click.echo("streamed:       {:.3f}s".format(streamed))
+
+
+if __name__ == "__main__":
+    main()
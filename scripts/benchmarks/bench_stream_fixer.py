@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Streaming fixer benchmark
+    Purpose:     Compare the peak memory and time of the parsed and streamed fixes
+    on large synthetic records (many content information blocks, or a single one
+    holding a large feature catalogue, and a big embedded thumbnail), and check
+    both produce equivalent outputs.
+    Authors:     Isogeo
+    Python:      3.6.x
+
+    Usage from the repo root folder (Unix only, peak memory being read with the
+    resource module):
+
+    ```python
+    python scripts/benchmarks/bench_stream_fixer.py --sizes 10 --sizes 100
+    ```
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+import base64
+import logging
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import click
+from lxml import etree
+
+from isogeo_xml_toolbelt.fixers import MetadataIso19139Fixer
+from isogeo_xml_toolbelt.fixers.fix_rules import NAMESPACES
+
+from bench_fixer import SAMPLE_XML, signature
+
+# #############################################################################
+# ######## Functions #################
+# ##################################
+
+
+def generate_record(xml_path: Path, size_mb: int, subtree: bool = False):
+    """Write a record of about `size_mb` MB: the sample record followed by
+    content information blocks, with an embedded thumbnail of up to 8 MB (libxml2
+    text nodes limit being 10 MB).
+
+    :param bool subtree: write a single content information block, whose feature
+        types fill the record, instead of many small blocks.
+    """
+    gmd = "{{{}}}".format(NAMESPACES.get("gmd"))
+    gco = "{{{}}}".format(NAMESPACES.get("gco"))
+    sample = etree.parse(str(SAMPLE_XML))
+    identification = sample.getroot().find("gmd:identificationInfo/*", NAMESPACES)
+    overview = etree.SubElement(identification, gmd + "graphicOverview")
+    thumbnail = etree.SubElement(overview, gco + "CharacterString")
+    thumbnail_size = min(size_mb * 2 ** 19, 8 * 2 ** 20)
+    thumbnail.text = base64.b64encode(os.urandom(thumbnail_size * 3 // 4)).decode()
+    head, tail = etree.tostring(
+        sample, encoding="utf-8", xml_declaration=True
+    ).rsplit(b"</gmd:MD_Metadata>", 1)
+    # prefixes declared by the root element
+    if subtree:
+        opening = b"<gmd:contentInfo><gmd:MD_FeatureCatalogueDescription>\n"
+        closing = b"</gmd:MD_FeatureCatalogueDescription></gmd:contentInfo>\n"
+        block = b"<gmd:featureTypes><gco:LocalName>type</gco:LocalName></gmd:featureTypes>\n"
+    else:
+        opening = closing = b""
+        block = (
+            b"<gmd:contentInfo><gmd:MD_FeatureCatalogueDescription><gmd:includedWithDataset>"
+            b"<gco:Boolean>true</gco:Boolean></gmd:includedWithDataset>"
+            b"</gmd:MD_FeatureCatalogueDescription></gmd:contentInfo>\n"
+        )
+    with xml_path.open("wb") as out_xml:
+        out_xml.write(head + opening)
+        for _ in range((size_mb * 2 ** 20 - thumbnail_size) // len(block)):
+            out_xml.write(block)
+        out_xml.write(closing + b"</gmd:MD_Metadata>" + tail)
+
+
+def measure(xml_path: Path, output: Path, streaming: bool, queue):
+    """Fix a record in a new process, putting its time and peak memory (MB)."""
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    MetadataIso19139Fixer(streaming=streaming).fix_file(xml_path, output)
+    duration = time.perf_counter() - start
+    queue.put((duration, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run(xml_path: Path, output: Path, streaming: bool) -> tuple:
+    """Return (time, peak memory) of a fix, in a new process forked from the fork
+    server, not to inherit the peak memory of the benchmark."""
+    context = multiprocessing.get_context("forkserver")
+    queue = context.Queue()
+    process = context.Process(
+        target=measure, args=(xml_path, output, streaming, queue)
+    )
+    process.start()
+    process.join()
+    if process.exitcode:
+        raise RuntimeError("Fixing {} failed".format(xml_path))
+    return queue.get()
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+@click.command()
+@click.option("--sizes", multiple=True, type=int, default=(10, 50), show_default=True, help="Records sizes, in MB")
+def main(sizes):
+    # started before any record is loaded
+    multiprocessing.forkserver.ensure_running()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        for size_mb in sizes:
+            for subtree in (False, True):
+                xml_path = tmp_dir / "record_{}.xml".format(size_mb)
+                generate_record(xml_path, size_mb, subtree)
+                parsed = run(xml_path, tmp_dir / "parsed.xml", False)
+                streamed = run(xml_path, tmp_dir / "streamed.xml", True)
+                assert signature(tmp_dir / "parsed.xml") == signature(
+                    tmp_dir / "streamed.xml"
+                )
+                click.echo(
+                    "{:>5.0f} MB, {:<7}: parsed {:.2f}s, {:.0f} MB peak | "
+                    "streamed {:.2f}s, {:.0f} MB peak".format(
+                        xml_path.stat().st_size / 2 ** 20,
+                        "subtree" if subtree else "blocks",
+                        *parsed,
+                        *streamed
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
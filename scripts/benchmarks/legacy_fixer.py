@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo XML Toolbelt - Legacy ISO 19139 fixer
+    Purpose:     Baseline of the fixer benchmark: the first fixer of the toolbelt,
+    built on xml.etree with one search per fix and minidom pretty-printing. Kept
+    as it was, tags typos included, without its folders checks.
+    Authors:     Isogeo
+    Python:      3.6.x
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+from xml.dom import minidom
+from xml.etree import ElementTree as ET
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# customize script
+ds_character_set = "utf-8"
+ds_creation_date = "2015-09-08"
+ds_srs_code = "urn:ogc:def:crs:EPSG:2154"
+ds_license_lbl = "Licence ouverte ETALAB 1.0"
+ds_license_url = "http://www.etalab.gouv.fr/licence-ouverte-open-licence"
+
+# #############################################################################
+# ########### Classes #############
+# #################################
+
+
+class LegacyIso19139Fixer(object):
+    """Legacy ISO 19139 XML fixer, applying its fixes to the parsed record set as
+    `tpl_root`."""
+
+    def __init__(self):
+        """Instanciation."""
+        self.ns = self.add_namespaces()
+        self.tpl = None
+        self.tpl_root = None
+
+    def fix_file(self, xml_path, output):
+        """Apply the fixes to a XML file and write it pretty-printed.
+
+        :param pathlib.Path xml_path: path to the input XML file.
+        :param pathlib.Path output: path to the output XML file.
+        """
+        self.tpl = ET.parse(str(xml_path))
+        self.tpl_root = self.tpl.getroot()
+        self.add_ds_creation_date()
+        self.add_md_character_set()
+        self.fix_srs()
+        self.fix_cgus()
+        output.write_text(self.prettify(self.tpl_root), encoding="utf-8")
+
+    def add_namespaces(self):
+        """Add ISO19139 namespaces."""
+        ns = {
+            "gts": "http://www.isotc211.org/2005/gts",
+            "gml": "http://www.opengis.net/gml",
+            "xsi": "http://www.w3.org/2001/XMLSchema-instance",
+            "gco": "http://www.isotc211.org/2005/gco",
+            "gmd": "http://www.isotc211.org/2005/gmd",
+            "gmx": "http://www.isotc211.org/2005/gmx",
+            "srv": "http://www.isotc211.org/2005/srv",
+            "xl": "http://www.w3.org/1999/xlink",
+        }
+
+        # register namespaces
+        for namespace in ns:
+            ET.register_namespace(namespace, ns.get(namespace))
+        return ns
+
+    # -------- Methods to add missing XML parts ------------------------------
+
+    def add_ds_creation_date(self):
+        """Add metadata creation date into metadata XML.
+
+        Under /MD_Metadata/identificationInfo/MD_DataIdentification/citation/CI_Citation/date
+        <date>
+            <CI_Date>
+                <date>
+                    <gco:Date>2010-07-07Z</gco:Date>
+                </date>
+                <dateType>
+                    <CI_DateTypeCode codeList="http://standards.iso.org/ittf/PubliclyAvailableStandards/ISO_19139_Schemas/resources/codelist/ML_gmxCodelists.xml#CI_DateTypeCode" codeListValue="creation">creation</CI_DateTypeCode>
+                </dateType>
+            </CI_Date>
+        </date>
+        """
+        ci_citation = self.get_md_ci_citation()
+        # creating sub element structure
+        parent_date = ET.SubElement(ci_citation, "gmd:date")
+        ci_date = ET.SubElement(parent_date, "gmd:CI_date")
+        sub_date = ET.SubElement(ci_date, "gmd:date")
+        # date value
+        value_date = ET.SubElement(sub_date, "gco:date")
+        value_date.text = "{}Z".format(ds_creation_date)
+        # date type
+        sub_date_type = ET.SubElement(ci_date, "gmd:dateType")
+        sub_ci_date_typecode = ET.SubElement(sub_date_type, "gmd:CI_DateTypeCode")
+        sub_ci_date_typecode.set(
+            "codeList",
+            "http://standards.iso.org/ittf/PubliclyAvailableStandards/ISO_19139_Schemas/resources/codelist/ML_gmxCodelists.xml#CI_DateTypeCode",
+        )
+        sub_ci_date_typecode.set("codeListValue", "creation")
+        sub_ci_date_typecode.text = "creation"
+
+    def add_md_character_set(self):
+        """Add metadata creation date into metadata XML.
+
+        Under /MD_Metadata/characterSet
+        AND /MD_Metadata/identificationInfo/MD_DataIdentification/characterSet
+        <characterSet>
+            <MD_CharacterSetCode codeList="http://standards.iso.org/ittf/PubliclyAvailableStandards/ISO_19139_Schemas/resources/codelist/ML_gmxCodelists.xml#MD_CharacterSetCode" codeListValue="utf8">utf-8</MD_CharacterSetCode>
+        </characterSet>
+        """
+        # metadata root
+        char_set = ET.SubElement(self.tpl_root, "gmd:characterSet")
+        sub_char_set_code = ET.SubElement(char_set, "gmd:MD_CharacterSetCode")
+        sub_char_set_code.set(
+            "codeList",
+            "http://standards.iso.org/ittf/PubliclyAvailableStandards/ISO_19139_Schemas/resources/codelist/ML_gmxCodelists.xml#MD_CharacterSetCode",
+        )
+        sub_char_set_code.set("codeListValue", "utf8")
+        sub_char_set_code.text = ds_character_set
+        # data identification
+        md_data_identification = self.get_md_data_identification()
+        char_set = ET.SubElement(md_data_identification, "gmd:characterSet")
+        sub_char_set_code = ET.SubElement(char_set, "gmd:MD_CharacterSetCode")
+        sub_char_set_code.set(
+            "codeList",
+            "http://standards.iso.org/ittf/PubliclyAvailableStandards/ISO_19139_Schemas/resources/codelist/ML_gmxCodelists.xml#MD_CharacterSetCode",
+        )
+        sub_char_set_code.set("codeListValue", "utf8")
+        sub_char_set_code.text = ds_character_set
+
+    def fix_srs(self):
+        """Fix Spatial Reference System.
+
+        Under /MD_Metadata/referenceSystemInfo/MD_ReferenceSystem/referenceSystemIdentifier/RS_Identifier
+        <referenceSystemInfo>
+            <MD_ReferenceSystem>
+                <referenceSystemIdentifier>
+                    <RS_Identifier>
+                        <code>
+                            <gco:CharacterString>urn:ogc:def:crs:EPSG:2154</gco:CharacterString>
+                        </code>
+                    </RS_Identifier>
+                </referenceSystemIdentifier>
+            </MD_ReferenceSystem>
+        </referenceSystemInfo>
+        """
+        rs_identifier = self.get_rs_identifier()
+        # fix SRS syntax
+        code = rs_identifier.find("gmd:code/gco:CharacterString", self.ns)
+        code.text = ds_srs_code
+
+        # remove useless codeSpace
+        code_space = rs_identifier.find("gmd:codeSpace", self.ns)
+        rs_identifier.remove(code_space)
+
+    def fix_cgus(self):
+        """Add dataset usage conditions and limitations into metadata XML.
+
+        Under /MD_Metadata/identificationInfo/MD_DataIdentification/resourceConstraints
+
+        <resourceConstraints>
+            <MD_Constraints>
+                <useLimitation>
+                    <gmx:Anchor xl:href="http://www.etalab.gouv.fr/licence-ouverte-open-licence" xl:title="Licence ouverte ETALAB 1.0" />
+                </useLimitation>
+                <useLimitation>
+                    <gco:CharacterString>Conditions sur [geopaysdebrest.fr &gt; Usage des données](https://geo.pays-de-brest.fr/usages/Pages/default.aspx).</gco:CharacterString>
+                </useLimitation>
+            </MD_Constraints>
+        </resourceConstraints>
+        <resourceConstraints>
+            <MD_LegalConstraints>
+                <useLimitation>
+                    <gco:CharacterString>Pas de restriction d’accès public selon INSPIRE</gco:CharacterString>
+                </useLimitation>
+                <useLimitation>
+                    <gco:CharacterString>Conditions sur [geopaysdebrest.fr &gt; Usage des données](https://geo.pays-de-brest.fr/usages/Pages/default.aspx).</gco:CharacterString>
+                </useLimitation>
+                <accessConstraints>
+                    <MD_RestrictionCode codeList="http://standards.iso.org/ittf/PubliclyAvailableStandards/ISO_19139_Schemas/resources/codelist/gmxCodelists.xml#MD_RestrictionCode" codeListValue="license">license</MD_RestrictionCode>
+                </accessConstraints>
+            </MD_LegalConstraints>
+        </resourceConstraints>
+        """
+        rs_ident = self.get_md_data_identification()
+        rs_constraints = self.get_rs_constraints()
+        # clean up before adding
+        if rs_constraints:
+            for i in rs_constraints:
+                rs_ident.remove(i)
+        else:
+            pass
+        # add new constraints
+        constraint_use = ET.SubElement(rs_ident, "gmd:resourceConstraints")
+        md_constraint = ET.SubElement(constraint_use, "gmd:MD_Constraints")
+        use_limit = ET.SubElement(md_constraint, "gmd:useLimitation")
+        use_anchor = ET.SubElement(
+            use_limit, "{http://www.isotc211.org/2005/gmx}Anchor"
+        )
+        use_anchor.set("{http://www.w3.org/1999/xlink}title", ds_license_lbl)
+        use_anchor.set("{http://www.w3.org/1999/xlink}href", ds_license_url)
+
+    # -------- Methods to get XML parts --------------------------------------
+
+    def get_md_data_identification(self):
+        """Get Character_set level items."""
+        pth_character_set = "gmd:identificationInfo/" "gmd:MD_DataIdentification"
+        return self.tpl_root.find(pth_character_set, self.ns)
+
+    def get_md_ci_citation(self):
+        """Get CI_Citation level items."""
+        pth_ci_citation = (
+            "gmd:identificationInfo/"
+            "gmd:MD_DataIdentification/"
+            "gmd:citation/gmd:CI_Citation"
+        )
+        return self.tpl_root.find(pth_ci_citation, self.ns)
+
+    def get_rs_identifier(self):
+        """Get RS_Identifier level items."""
+        pth_rs_identifer = (
+            "gmd:referenceSystemInfo/"
+            "gmd:MD_ReferenceSystem/"
+            "gmd:referenceSystemIdentifier/"
+            "gmd:RS_Identifier"
+        )
+        return self.tpl_root.find(pth_rs_identifer, self.ns)
+
+    def get_rs_constraints(self):
+        """Get resourceConstraints level items."""
+        pth_rs_constraints = (
+            "gmd:identificationInfo/"
+            "gmd:MD_DataIdentification/"
+            "gmd:resourceConstraints"
+        )
+        return self.tpl_root.findall(pth_rs_constraints, self.ns)
+
+    # -------- XML utils ----------------------------------------------------
+
+    def prettify(self, elem):
+        """Return a pretty-printed XML string for the Element."""
+        rough_string = ET.tostring(elem, "utf-8")
+        reparsed = minidom.parseString(rough_string)
+        return reparsed.toprettyxml(indent="  ")
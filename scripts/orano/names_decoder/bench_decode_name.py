@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo - Orano's names Decoder - Benchmark
+    Purpose:     Compare the legacy decoder (configuration parsed and scanned for
+    every name) with the codebook decoder, and check they return the same results.
+    Authors:     Isogeo
+    Python:      3.7.x
+
+    Usage from the repo root folder:
+
+    ```python
+    python scripts/orano/names_decoder/bench_decode_name.py --names 2000
+    ```
+
+    Without `--config`, a synthetic Axinite's configuration is generated since the
+    real one is not versioned.
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+import logging
+import random
+import tempfile
+import timeit
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import click
+
+from codebook import Codebook
+from decode_name import decode_name, decode_names, iter_rows
+
+# #############################################################################
+# ######## Functions #################
+# ##################################
+
+
+def legacy_decode_name(name: str, path: str, config: Path) -> dict:
+    """Legacy implementation (configuration parsed and scanned for every name),
+    kept as a reference."""
+    name_country = name_region = name_maintheme = year = None
+    name_scale = name_theme2 = name_theme3 = None
+
+    code_country = name[0:2]
+    if code_country == "GA":
+        code_region, code_maintheme, year_str = name[3:10], name[11:13], name[14:18]
+        code_scale, start = name[19:24], 25
+    else:
+        code_region, code_maintheme, year_str = name[3:7], name[8:10], name[11:15]
+        code_scale, start = name[16:21], 22
+    code_theme2 = name[start : start + 2]
+    code_theme3 = name[start + 2 : start + 4]
+    try:
+        number = int(year_str)
+        if number >= 1900 and number <= 2100:
+            year = number
+    except ValueError:
+        pass
+
+    root = ET.parse(str(config)).getroot()
+    countries, mainthemes, scales = root[0], root[1], root[2]
+
+    for country in countries:
+        if code_country == country.get("code"):
+            name_country = country.get("desc")
+            for region in country[0]:
+                if code_region == region.get("code"):
+                    name_region = region.get("desc")
+                    break
+            break
+
+    for maintheme in mainthemes:
+        if code_maintheme == maintheme.get("code"):
+            name_maintheme = maintheme.get("desc")
+            for subtheme in maintheme:
+                if code_theme2 == subtheme.get("code"):
+                    name_theme2 = subtheme.get("desc")
+                elif code_theme3 == subtheme.get("code"):
+                    name_theme3 = subtheme.get("desc")
+                elif name[start : start + 3] == subtheme.get("code"):
+                    name_theme2 = subtheme.get("desc")
+                elif name[start : start + 4] == subtheme.get("code"):
+                    name_theme2 = subtheme.get("desc")
+
+    for scale in scales:
+        if code_scale == scale.get("code"):
+            name_scale = scale.get("desc")
+
+    return {
+        "Name": name,
+        "Country": name_country,
+        "Region": name_region,
+        "Main Theme": name_maintheme,
+        "Year": year,
+        "Scale": name_scale,
+        "Theme 2": name_theme2,
+        "Theme 3": name_theme3,
+        "Path": path,
+    }
+
+
+def check_overlapping_codes(config: Path):
+    """Check the decoders agree on names mixing 2 characters codes and the
+    exceptions extending them, written into a minimal configuration."""
+    root = ET.Element("axinite")
+    country = ET.SubElement(ET.SubElement(root, "countries"), "country", code="FR", desc="France")
+    ET.SubElement(ET.SubElement(country, "regions"), "region", code="BRET", desc="Bretagne")
+    maintheme = ET.SubElement(ET.SubElement(root, "mainthemes"), "maintheme", code="GE", desc="Geology")
+    for code_subtheme in ("PR", "OB", "E_", "__", "PRO", "PROB", "E___"):
+        ET.SubElement(maintheme, "subtheme", code=code_subtheme, desc="Subtheme " + code_subtheme)
+    ET.SubElement(ET.SubElement(root, "scales"), "scale", code="00050", desc="1:50 000")
+    ET.ElementTree(root).write(str(config), encoding="utf-8")
+
+    codebook = Codebook.from_xml(config)
+    for codes, theme2, theme3 in (
+        ("PROB", "PROB", "OB"),  # 4 characters exception, its end being a code too
+        ("PROX", "PRO", None),
+        ("PRPR", "PR", None),  # same code twice: no theme 3
+        ("E___", "E___", "__"),
+        ("E_OB", "E_", "OB"),
+    ):
+        name = "FR_BRET_GE_2001_00050_{}01".format(codes)
+        decoded = decode_name(name, "", codebook)
+        assert decoded == legacy_decode_name(name, "", config), name
+        assert decoded.get("Theme 2") == "Subtheme " + theme2, name
+        assert decoded.get("Theme 3") == (theme3 and "Subtheme " + theme3), name
+
+
+def codebook_decode_names(names: list, config: Path) -> list:
+    """Load the codebook once, then decode every name with it."""
+    codebook = Codebook.from_xml(config)
+    return [decode_name(name, "", codebook) for name in names]
+
+
+def generate_config(config: Path, seed: int = 0):
+    """Write a synthetic Axinite's configuration."""
+    rand = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+    def code(length, letters=letters):
+        return "".join(rand.choice(letters) for _ in range(length))
+
+    def subtheme_codes():
+        # 3 and 4 characters exceptions extend 2 characters codes (PR → PROB,
+        # E_ → E___), their last characters being often a 2 characters code too.
+        # As in the real configuration, they are listed after the codes they
+        # extend: the legacy decoder keeping the last matching code, it's the
+        # longest one
+        codes = [code(2, letters + "_") for _ in range(45)]
+        for _ in range(15):
+            length = rand.choice((3, 4))
+            codes.append(rand.choice(codes[:45]) + rand.choice(codes[:45] + ["__"])[: length - 2])
+        return sorted(set(codes), key=lambda i: (len(i), codes.index(i)))
+
+    root = ET.Element("axinite")
+    countries_elem = ET.SubElement(root, "countries")
+    mainthemes_elem = ET.SubElement(root, "mainthemes")
+    scales_elem = ET.SubElement(root, "scales")
+
+    for code_country in ["GA"] + [code(2) for _ in range(40)]:
+        country = ET.SubElement(countries_elem, "country", code=code_country, desc="Country " + code_country)
+        regions = ET.SubElement(country, "regions")
+        length = 7 if code_country == "GA" else 4
+        for code_region in [code(length) for _ in range(30)]:
+            ET.SubElement(regions, "region", code=code_region, desc="Region " + code_region)
+
+    for code_maintheme in [code(2) for _ in range(20)]:
+        maintheme = ET.SubElement(mainthemes_elem, "maintheme", code=code_maintheme, desc="Theme " + code_maintheme)
+        for code_subtheme in subtheme_codes():
+            ET.SubElement(maintheme, "subtheme", code=code_subtheme, desc="Subtheme " + code_subtheme)
+
+    for code_scale in [code(5) for _ in range(20)]:
+        ET.SubElement(scales_elem, "scale", code=code_scale, desc="Scale " + code_scale)
+
+    ET.ElementTree(root).write(str(config), encoding="utf-8")
+
+
+def generate_names(codebook: Codebook, count: int, seed: int = 0) -> list:
+    """Generate names from the codes of a configuration."""
+    rand = random.Random(seed)
+    countries = [i for i in codebook.countries if codebook.countries.get(i)[1]]
+    mainthemes = [i for i in codebook.mainthemes if codebook.mainthemes.get(i)[1]]
+    scales = list(codebook.scales)
+    names = []
+    for _ in range(count):
+        code_country = rand.choice(countries)
+        code_maintheme = rand.choice(mainthemes)
+        subthemes = list(codebook.mainthemes.get(code_maintheme)[1])
+        code_subthemes = rand.choice(subthemes)
+        if len(code_subthemes) == 2:
+            code_subthemes += rand.choice(subthemes)[:2]
+        names.append(
+            "_".join(
+                (
+                    code_country,
+                    rand.choice(list(codebook.countries.get(code_country)[1])),
+                    code_maintheme,
+                    str(rand.randint(1950, 2020)),
+                    rand.choice(scales),
+                    code_subthemes.ljust(4, "_") + "01",
+                )
+            )
+        )
+    return names
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+@click.command()
+@click.option("--config", type=click.Path(exists=True, dir_okay=False), default=None, help="Path to axinite.xml")
+@click.option("--names", default=1000, show_default=True, help="Number of names to decode")
+@click.option("--repeat", default=3, show_default=True, help="Number of timed runs")
+def main(config, names, repeat):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logging.disable(logging.CRITICAL)
+        check_overlapping_codes(Path(tmp_dir) / "overlapping.xml")
+        logging.disable(logging.NOTSET)
+        if config is None:
+            config = Path(tmp_dir) / "axinite.xml"
+            generate_config(config)
+        config = Path(config)
+        codebook = Codebook.from_xml(config)
+        list_names = generate_names(codebook, names)
+        logging.disable(logging.CRITICAL)
+
+        # same results
+        for name in list_names:
+            legacy = legacy_decode_name(name, "", config)
+            assert legacy == decode_name(name, "", codebook), name
+        assert list(iter_rows(decode_names(list_names, [""] * len(list_names), codebook))) == [
+            legacy_decode_name(name, "", config) for name in list_names
+        ]
+
+        legacy_time = min(
+            timeit.repeat(
+                lambda: [legacy_decode_name(i, "", config) for i in list_names],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        codebook_time = min(
+            timeit.repeat(
+                lambda: codebook_decode_names(list_names, config),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        # configuration loading: parsed XML vs cache
+        parse_time = min(timeit.repeat(lambda: Codebook.from_xml(config), number=1, repeat=repeat))
+        cache_path = Path(tmp_dir) / "axinite.cache"
+        Codebook.load(config, cache_path)
+        assert Codebook.load(config, cache_path).as_tuple() == codebook.as_tuple()
+        cache_time = min(
+            timeit.repeat(lambda: Codebook.load(config, cache_path), number=1, repeat=repeat)
+        )
+        batch_time = min(
+            timeit.repeat(
+                lambda: decode_names(list_names, codebook=Codebook.from_xml(config)),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        logging.disable(logging.NOTSET)
+
+    click.echo("{} names decoded with identical results".format(len(list_names)))
+    click.echo("legacy:   {:.3f}s".format(legacy_time))
+    click.echo("codebook: {:.3f}s (x{:.0f})".format(codebook_time, legacy_time / codebook_time))
+    click.echo("batch:    {:.3f}s (x{:.0f})".format(batch_time, legacy_time / batch_time))
+    click.echo("configuration parsed in {:.1f}ms, loaded from cache in {:.1f}ms".format(parse_time * 1000, cache_time * 1000))
+
+
+if __name__ == "__main__":
+    main()
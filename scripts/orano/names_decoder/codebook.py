@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo - Orano's names Decoder - Codebook
+    Purpose:     Load Axinite's configuration (axinite.xml) once into dictionaries,
+    so that names are decoded with constant time lookups. The dictionaries are
+    cached next to the XML and rebuilt when it changes.
+    Authors:     Isogeo
+    Python:      3.7.x
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+import hashlib
+import logging
+import marshal
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# default configuration, next to this module
+AXINITE_PATH = Path(__file__).parent / "axinite.xml"
+
+# cache format version, to increment when the dictionaries structure changes
+CACHE_VERSION = 2
+
+# length of the subthemes codes in a name: theme 2 (2 to 4 characters) and theme 3
+SUBTHEMES_LENGTH = 4
+
+# #############################################################################
+# ######## Classes #################
+# ##################################
+
+
+class Codebook(object):
+    """Axinite's configuration indexed by codes.
+
+    Subthemes codes have a variable length (usually 2 characters, 3 or 4 for
+    exceptions): they are indexed in a prefix tree per main theme, so that the
+    longest code is matched in a single pass over the name.
+
+    :param dict countries: {country code: (description, {region code: description})}
+    :param dict mainthemes: {main theme code: (description, {subtheme code: description})}
+    :param dict scales: {scale code: description}
+    """
+
+    def __init__(self, countries: dict, mainthemes: dict, scales: dict):
+        """Instanciation."""
+        self.countries = countries
+        self.mainthemes = mainthemes
+        self.scales = scales
+        # {main theme code: subthemes prefix tree}
+        self.subthemes_tries = {
+            code: build_trie(subthemes) for code, (_, subthemes) in mainthemes.items()
+        }
+
+    @classmethod
+    def from_xml(cls, xml_path: Path = AXINITE_PATH):
+        """Parse Axinite's configuration XML: countries (with their regions), main
+        themes (with their subthemes) and scales are the three first children of
+        the root element.
+
+        :param pathlib.Path xml_path: path to axinite.xml.
+        """
+        root = ET.parse(str(xml_path)).getroot()
+        countries_elem, mainthemes_elem, scales_elem = root[0], root[1], root[2]
+
+        # first match wins for countries and regions
+        countries = {}
+        for country in countries_elem:
+            regions = {}
+            for region in country[0] if len(country) else ():
+                regions.setdefault(region.get("code"), region.get("desc"))
+            countries.setdefault(country.get("code"), (country.get("desc"), regions))
+
+        # last match wins for main themes, subthemes and scales
+        mainthemes = {}
+        for maintheme in mainthemes_elem:
+            subthemes = {subtheme.get("code"): subtheme.get("desc") for subtheme in maintheme}
+            mainthemes[maintheme.get("code")] = (maintheme.get("desc"), subthemes)
+
+        scales = {scale.get("code"): scale.get("desc") for scale in scales_elem}
+
+        logging.info(
+            "Codebook loaded from {}: {} countries, {} main themes, {} scales".format(
+                xml_path, len(countries), len(mainthemes), len(scales)
+            )
+        )
+        return cls(countries, mainthemes, scales)
+
+    @classmethod
+    def load(cls, xml_path: Path = AXINITE_PATH, cache_path: Path = None):
+        """Load the codebook from its cache, or parse the XML and write the cache
+        if there is none or if it's outdated.
+
+        The cache is valid if the XML modification time and size did not change. If
+        they did, the XML content hash is compared to the cached one before parsing
+        it again (the file may have been touched or copied without being modified).
+
+        :param pathlib.Path xml_path: path to axinite.xml.
+        :param pathlib.Path cache_path: path to the cache file. Default: next to the XML,
+            with `.cache` extension.
+        """
+        xml_path = Path(xml_path)
+        cache_path = cache_path or xml_path.with_suffix(".cache")
+        stat = xml_path.stat()
+        key = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+        cache = read_cache(cache_path)
+        if cache and all(cache.get(k) == v for k, v in key.items()):
+            logging.debug("Codebook loaded from cache: {}".format(cache_path))
+            return cls(*cache.get("data"))
+
+        sha256 = hashlib.sha256(xml_path.read_bytes()).hexdigest()
+        if cache and cache.get("sha256") == sha256:
+            codebook = cls(*cache.get("data"))
+            logging.debug("Codebook cache still valid, XML unchanged: {}".format(cache_path))
+        else:
+            codebook = cls.from_xml(xml_path)
+        write_cache(cache_path, dict(key, sha256=sha256, data=codebook.as_tuple()))
+        return codebook
+
+    def as_tuple(self) -> tuple:
+        """Return the dictionaries (countries, mainthemes, scales)."""
+        return self.countries, self.mainthemes, self.scales
+
+    def get_country(self, code_country: str, code_region: str) -> tuple:
+        """Return the description of a country and of its region.
+
+        :param str code_country: country code
+        :param str code_region: region code
+        """
+        country = self.countries.get(code_country)
+        if country is None:
+            return None, None
+        return country[0], country[1].get(code_region)
+
+    def get_themes(self, code_maintheme: str, name: str, start: int) -> tuple:
+        """Return the descriptions of a main theme and its subthemes.
+
+        The theme 2 is the longest subtheme code found at the start position. The
+        theme 3 is the 2 characters code following the 2 first characters, as the
+        legacy decoder read it: it's looked up whatever the length of the theme 2,
+        and ignored if it's the same code as the 2 first characters.
+
+        :param str code_maintheme: main theme code
+        :param str name: name to decode
+        :param int start: position of the subthemes codes in the name
+        """
+        maintheme = self.mainthemes.get(code_maintheme)
+        if maintheme is None:
+            return None, None, None
+        trie = self.subthemes_tries.get(code_maintheme)
+
+        name_theme2 = match_longest(trie, name[start : start + SUBTHEMES_LENGTH])[1]
+        code_theme3 = name[start + 2 : start + 4]
+        name_theme3 = None
+        if code_theme3 != name[start : start + 2]:
+            name_theme3 = maintheme[1].get(code_theme3)
+        return maintheme[0], name_theme2, name_theme3
+
+    def get_scale(self, code_scale: str) -> str:
+        """Return the description of a scale.
+
+        :param str code_scale: scale code
+        """
+        return self.scales.get(code_scale)
+
+
+# #############################################################################
+# ######## Functions ###############
+# ##################################
+_CODEBOOK = None
+# key of the values in prefix tree nodes (codes characters are strings)
+_TRIE_VALUE = None
+
+
+def build_trie(codes: dict) -> dict:
+    """Build a prefix tree of codes: nested dictionaries by character, the
+    value of a code being stored under the None key of its last node.
+
+    :param dict codes: {code: value}
+    """
+    trie = {}
+    for code, value in codes.items():
+        if not code:
+            continue
+        node = trie
+        for char in code:
+            node = node.setdefault(char, {})
+        node[_TRIE_VALUE] = (code, value)
+    return trie
+
+
+def match_longest(trie: dict, text: str, start: int = 0) -> tuple:
+    """Return the longest code of the prefix tree found at the start position
+    of the text and its value: (code, value), or (None, None) if there is none.
+
+    :param dict trie: prefix tree built by `build_trie`
+    :param str text: text to search
+    :param int start: position in the text
+    """
+    match = (None, None)
+    node = trie
+    for char in text[start:]:
+        node = node.get(char)
+        if node is None:
+            break
+        match = node.get(_TRIE_VALUE, match)
+    return match
+
+
+def read_cache(cache_path: Path) -> dict:
+    """Read a codebook cache. Return None if it's missing, unreadable or written
+    with another format version.
+
+    :param pathlib.Path cache_path: path to the cache file.
+    """
+    try:
+        # loading from bytes is much faster than from the file object
+        cache = marshal.loads(cache_path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError) as err:
+        logging.debug("No usable codebook cache ({}): {}".format(err, cache_path))
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return None
+    return cache
+
+
+def write_cache(cache_path: Path, cache: dict):
+    """Write a codebook cache atomically: concurrent jobs never read a partial file.
+
+    :param pathlib.Path cache_path: path to the cache file.
+    :param dict cache: cache content (key and data).
+    """
+    cache["version"] = CACHE_VERSION
+    tmp_path = cache_path.with_name("{}.{}.tmp".format(cache_path.name, os.getpid()))
+    try:
+        with tmp_path.open("wb") as cache_file:
+            marshal.dump(cache, cache_file)
+        os.replace(str(tmp_path), str(cache_path))
+    except OSError as err:
+        logging.warning("Codebook cache not written ({}): {}".format(err, cache_path))
+        if tmp_path.exists():
+            tmp_path.unlink()
+        return
+    logging.debug("Codebook cache written: {}".format(cache_path))
+
+
+def get_codebook() -> Codebook:
+    """Return the default codebook, loaded once from axinite.xml or its cache."""
+    global _CODEBOOK
+    if _CODEBOOK is None:
+        _CODEBOOK = Codebook.load(AXINITE_PATH)
+    return _CODEBOOK
@@ -12,21 +12,69 @@
 # ########## Libraries #############
 # ##################################
 
-import xml.etree.ElementTree as ET
 import logging
 import csv
 import os.path
+from collections import Counter, namedtuple
+from pathlib import Path
+
+try:
+    from .codebook import SUBTHEMES_LENGTH, Codebook, get_codebook
+except ImportError:  # executed as a script
+    from codebook import SUBTHEMES_LENGTH, Codebook, get_codebook
+
+
+# #############################################################################
+# ######## Log #################
+# ##################################
+
+# log file of the stand-alone program, next to this module
+LOG_PATH = Path(__file__).parent / "log.log"
 
 
 # #############################################################################
-# ######## Intialize log #################
+# ######## Names layout #################
 # ##################################
-logging.basicConfig(
-    filename="scripts/orano/names_decoder/log.log",
-    format="%(asctime)s || %(funcName)s || %(levelname)s || %(message)s",
-    level=logging.DEBUG,
+
+# decoded fields, in the CSV result order
+FIELDNAMES = [
+    "Name",
+    "Country",
+    "Region",
+    "Main Theme",
+    "Year",
+    "Scale",
+    "Theme 2",
+    "Theme 3",
+    "Path",
+]
+
+# positions of the codes in a name
+NameTemplate = namedtuple(
+    "NameTemplate", ["region", "maintheme", "year", "scale", "themes"]
 )
 
+# XX_XXXX_XX_XXXX_XXXXX_XXXX01
+DEFAULT_TEMPLATE = NameTemplate(
+    region=slice(3, 7),
+    maintheme=slice(8, 10),
+    year=slice(11, 15),
+    scale=slice(16, 21),
+    themes=22,
+)
+
+# exceptions by country code
+NAME_TEMPLATES = {
+    # Gabon: region's code containts 7 characters, GA_C__KAYA_XX_XXXX_XXXXX_XXXX01
+    "GA": NameTemplate(
+        region=slice(3, 10),
+        maintheme=slice(11, 13),
+        year=slice(14, 18),
+        scale=slice(19, 24),
+        themes=25,
+    )
+}
+
 
 def list_filenames_xml_from_directory(path: str) -> list:
 
@@ -49,19 +97,24 @@ def list_filenames_xml_from_directory(path: str) -> list:
     return list_filenames_xml
 
 
-def decode_name(name: str, path: str) -> dict:
+def parse_year(year_str: str) -> int:
+    """Return the year if the string is a year between 1900 and 2100, else None."""
+    try:
+        number = int(year_str)
+    except ValueError:
+        return None
+    if number >= 1900 and number <= 2100:
+        return number
+    return None
+
+
+def decode_name(name: str, path: str, codebook: Codebook = None) -> dict:
 
     # #############################################################################
     # ######## Intialize variable #################
     # ##################################
 
-    name_country = None
-    name_region = None
-    name_maintheme = None
-    year = None
-    name_scale = None
-    name_theme2 = None
-    name_theme3 = None
+    codebook = codebook or get_codebook()
 
     # #############################################################################
     # ######## Extract content from string name #################
@@ -69,61 +122,22 @@ def decode_name(name: str, path: str) -> dict:
     logging.info("Split name : {}".format(name))
 
     code_country = name[0:2]
-    if (
-        code_country == "GA"
-    ):  # exception for Gabon GA_C__KAYA_XX_XXXX_XXXXX_____01 → Country = Gabon Region = C_KAYA_KAYA
-        code_region = name[3:10]
-        code_maintheme = name[11:13]
-        try:
-            # verify year format and date
-            number = int(name[14:18])
-            if number >= 1900 and number <= 2100:
-                year = number
-                logging.info("Year = {}".format(year))
-        except:
-            logging.error("No Year found")
-        code_scale = name[19:24]
-        code_theme2 = name[25:27]
-        code_theme3 = name[27:29]
-        logging.warning("Gabon exception : Region's code will containt 6 characters. ")
+    template = NAME_TEMPLATES.get(code_country, DEFAULT_TEMPLATE)
+    code_region = name[template.region]
+    code_maintheme = name[template.maintheme]
+    year_str = name[template.year]
+    code_scale = name[template.scale]
+
+    year = parse_year(year_str)
+    if year:
+        logging.info("Year = {}".format(year))
     else:
-        code_region = name[3:7]
-        code_maintheme = name[8:10]
-        try:
-            # verify year format and date
-            number = int(name[11:15])
-            if number >= 1900 and number <= 2100:
-                year = number
-                logging.info("Year = {}".format(year))
-        except:
-            logging.error("No Year found")
-        code_scale = name[16:21]
-        code_theme2 = name[22:24]
-        code_theme3 = name[24:26]
-
-    # #############################################################################
-    # ######## Parse configuration XML #################
-    # ##################################
-
-    tree = ET.parse("scripts/orano/names_decoder/axinite.xml")
-    root = tree.getroot()
-    countries = root[0]
-    mainthemes = root[1]
-    scales = root[2]
+        logging.error("No Year found")
 
     # #############################################################################
     # ######## Search Country and Region #################
     # ##################################
-    logging.info("Search Country and Region...")
-    for country in countries:
-        if code_country == country.get("code"):
-            name_country = country.get("desc")
-            regions = country[0]
-            for region in regions:
-                if code_region == region.get("code"):
-                    name_region = region.get("desc")
-                    break
-            break
+    name_country, name_region = codebook.get_country(code_country, code_region)
 
     if name_country:
         logging.info("Country = {}".format(name_country))
@@ -142,60 +156,9 @@ def decode_name(name: str, path: str) -> dict:
     # #############################################################################
     # ######## Search Mainthemes and SubThemes #################
     # ##################################
-    logging.info("Search Main theme and Subtheme(s)...")
-    if code_country == "GA":  # Gabon exception
-        for maintheme in mainthemes:
-            if code_maintheme == maintheme.get("code"):
-                name_maintheme = maintheme.get("desc")
-                logging.info("Main theme is :  {} ".format(name_maintheme))
-                for subtheme in maintheme:
-                    if code_theme2 == subtheme.get("code"):
-                        name_theme2 = subtheme.get("desc")
-                        logging.info("Theme 2 is : {}".format(name_theme2))
-                    elif code_theme3 == subtheme.get("code"):
-                        name_theme3 = subtheme.get("desc")
-                    elif name[25:28] == subtheme.get(
-                        "code"
-                    ):  # Subtheme exceptions (when theme 2 composed by 3 characters)
-                        logging.warning(
-                            "Theme 2 containt 3 characters, so  there is no theme 3"
-                        )
-                        name_theme2 = subtheme.get("desc")
-                        code_theme2 = name[25:28]
-                    elif name[25:29] == subtheme.get(
-                        "code"
-                    ):  # Subtheme exceptions (when theme 2 composed by 4 characters)
-                        logging.warning(
-                            "Theme 2 containt 4 characters, so there is no theme 3"
-                        )
-                        name_theme2 = subtheme.get("desc")
-                        code_theme2 = name[25:29]
-
-    else:
-        for maintheme in mainthemes:
-            if code_maintheme == maintheme.get("code"):
-                name_maintheme = maintheme.get("desc")
-                for subtheme in maintheme:
-                    if code_theme2 == subtheme.get("code"):
-                        name_theme2 = subtheme.get("desc")
-                    elif code_theme3 == subtheme.get("code"):
-                        name_theme3 = subtheme.get("desc")
-                    elif name[22:25] == subtheme.get(
-                        "code"
-                    ):  # Subtheme exceptions (when theme 2 composed by 3 characters)
-                        logging.warning(
-                            "Theme 2 containt 3 characters, so there is no theme 3"
-                        )
-                        name_theme2 = subtheme.get("desc")
-                        code_theme2 = name[22:25]
-                    elif name[22:26] == subtheme.get(
-                        "code"
-                    ):  # Subtheme exceptions (when theme 2 composed by 4 characters)
-                        logging.warning(
-                            "Theme 2 containt 4 characters, so there is no theme 3"
-                        )
-                        name_theme2 = subtheme.get("desc")
-                        code_theme2 = name[22:26]
+    name_maintheme, name_theme2, name_theme3 = codebook.get_themes(
+        code_maintheme, name, template.themes
+    )
 
     if name_maintheme:
         logging.info("Main theme = {}".format(name_maintheme))
@@ -214,10 +177,7 @@ def decode_name(name: str, path: str) -> dict:
     # #############################################################################
     # ######## Search scale #################
     # ##################################
-    logging.info("Search Scale...")
-    for scale in scales:
-        if code_scale == scale.get("code"):
-            name_scale = scale.get("desc")
+    name_scale = codebook.get_scale(code_scale)
 
     if name_scale:
         logging.info("Scale is {} ".format(name_scale))
@@ -241,60 +201,117 @@ def decode_name(name: str, path: str) -> dict:
     return result
 
 
+def decode_names(names, paths=None, codebook: Codebook = None) -> dict:
+    """Decode a batch of names and return the results by column: each field is
+    extracted for the whole batch at once, and codes are mapped through the
+    codebook once per distinct code. Instead of logging each name, the number of
+    names with missing fields is logged once.
+
+    :param names: iterable of names to decode
+    :param paths: iterable of the paths of the names, in the same order. Optional.
+    :param Codebook codebook: codebook to use. Default: loaded from axinite.xml.
+
+    :return: {field: list of values}, fields being the FIELDNAMES.
+    """
+    codebook = codebook or get_codebook()
+    names = list(names)
+    paths = list(paths) if paths is not None else [None] * len(names)
+    if len(paths) != len(names):
+        raise ValueError(
+            "Names ({}) and paths ({}) must have the same length".format(
+                len(names), len(paths)
+            )
+        )
+    templates = [NAME_TEMPLATES.get(name[0:2], DEFAULT_TEMPLATE) for name in names]
+
+    # codes → descriptions, once per distinct code
+    codes_country = [
+        (name[0:2], name[template.region]) for name, template in zip(names, templates)
+    ]
+    countries = {code: codebook.get_country(*code) for code in set(codes_country)}
+    codes_themes = [
+        (
+            name[template.maintheme],
+            name[template.themes : template.themes + SUBTHEMES_LENGTH],
+        )
+        for name, template in zip(names, templates)
+    ]
+    themes = {code: codebook.get_themes(code[0], code[1], 0) for code in set(codes_themes)}
+    codes_year = [name[template.year] for name, template in zip(names, templates)]
+    years = {code: parse_year(code) for code in set(codes_year)}
+    codes_scale = [name[template.scale] for name, template in zip(names, templates)]
+
+    decoded_countries = [countries.get(code) for code in codes_country]
+    decoded_themes = [themes.get(code) for code in codes_themes]
+    result = {
+        "Name": names,
+        "Country": [i[0] for i in decoded_countries],
+        "Region": [i[1] for i in decoded_countries],
+        "Main Theme": [i[0] for i in decoded_themes],
+        "Year": [years.get(code) for code in codes_year],
+        "Scale": [codebook.get_scale(code) for code in codes_scale],
+        "Theme 2": [i[1] for i in decoded_themes],
+        "Theme 3": [i[2] for i in decoded_themes],
+        "Path": paths,
+    }
+
+    missing = Counter(
+        {field: values.count(None) for field, values in result.items() if field != "Path"}
+    )
+    logging.info(
+        "{} names decoded. Missing values: {}".format(
+            len(names),
+            ", ".join("{} {}".format(count, field) for field, count in missing.items() if count)
+            or "none",
+        )
+    )
+    return result
+
+
+def iter_rows(result: dict):
+    """Yield the rows (dictionaries) of a decoding result by column.
+
+    :param dict result: result returned by `decode_names`
+    """
+    fields = list(result)
+    for values in zip(*result.values()):
+        yield dict(zip(fields, values))
+
+
 # #############################################################################
 # ##### Stand alone program ########
 # ##################################
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        filename=str(LOG_PATH),
+        format="%(asctime)s || %(funcName)s || %(levelname)s || %(message)s",
+        level=logging.DEBUG,
+    )
 
     path = "\\Users\LéoDARENGOSSE\ISOGEO\SIG - Documents\CLIENTS\85_ORANO\Echantillon"
 
     # write csv with decodage result
     with open("scripts/orano/names_decoder/name_decoder_result.csv", "w", newline="") as csvfile:
-        fieldnames = [
-            "Name",
-            "Country",
-            "Region",
-            "Main Theme",
-            "Year",
-            "Scale",
-            "Theme 2",
-            "Theme 3",
-            "Path",
-        ]
-
         csv.register_dialect("semicolon", delimiter=";")  # create dialect
 
         writer = csv.DictWriter(
-            csvfile, fieldnames=fieldnames, dialect="semicolon"
+            csvfile, fieldnames=FIELDNAMES, dialect="semicolon"
         )  # write csv with a dictionnary
         writer.writeheader()  # write header
 
         list_names_path = list_filenames_xml_from_directory(path)  # list names
+        result = decode_names(
+            [i.get("name") for i in list_names_path],
+            [i.get("path") for i in list_names_path],
+        )
 
-        counter_csv = 0
-        counter_undecodable = 0
-        for dict_name_path in list_names_path:        
-            name = dict_name_path.get("name")
-            path = dict_name_path.get("path")
-            result = decode_name(name, path)
-            country = result.get("Country")
-            if (
-                country is None
-            ):  # if the country can't be found, the name might be undecodable
-                logging.error(
-                    "Name {} might be undecodable and will no be added to CSV Result".format(
-                        result.get("Name")
-                    )
-                )
-                counter_undecodable += 1
-            else:
-                writer.writerow(result)  # add result dictionary to csv
-                logging.info("Add {} to CSV Result".format(result.get("Name")))
-                counter_csv += 1
+        # if the country can't be found, the name might be undecodable
+        rows = [row for row in iter_rows(result) if row.get("Country") is not None]
+        writer.writerows(rows)  # add result dictionaries to csv
 
     logging.info(
         "{} filenames have been added to CSV Result, {} not.".format(
-            counter_csv, counter_undecodable
+            len(rows), len(list_names_path) - len(rows)
         )
     )
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+#! python3
+
+"""
+    Isogeo - Orano's metadata pipeline
+    Purpose:     Read Orano's exported ISO 19139 metadata, decode their names with
+    Axinite's configuration, add decoded themes to keywords and report everything
+    into a CSV file. Files are processed by chunks over a pool of processes, each
+    worker loading the codebook once.
+    Authors:     Isogeo
+    Python:      3.7.x
+
+    Usage from the repo root folder:
+
+    ```python
+    python scripts/orano/orano_pipeline.py --input "/path/to/Echantillon" --output report_orano.csv --jobs 4
+    ```
+
+    or, as a module:
+
+    ```python
+    from scripts.orano.orano_pipeline import run_pipeline
+    ```
+"""
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+# 3rd party
+import click
+
+# Isogeo XML toolbelt
+from isogeo_xml_toolbelt.readers import MetadataIso19139
+from isogeo_xml_toolbelt.reporters import CsvReporter, FlattenPlan
+from isogeo_xml_toolbelt.reporters.flattener import FIRST, JOIN
+from isogeo_xml_toolbelt.utils import bounded_map
+
+# Modules
+try:
+    from .names_decoder.codebook import AXINITE_PATH, Codebook
+    from .names_decoder.decode_name import decode_names, iter_rows
+except ImportError:  # executed as a script
+    from names_decoder.codebook import AXINITE_PATH, Codebook
+    from names_decoder.decode_name import decode_names, iter_rows
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# keywords joined with "|", name and organisation of the last contact of the
+# record: build_record reverses the contacts list
+REPORT_PLAN = FlattenPlan(
+    headers=[
+        "name",
+        "abstract",
+        "keywords",
+        "country",
+        "region",
+        "year",
+        "date",
+        "resolution",
+        "scale",
+        "contacts.name",
+        "contacts.organisation",
+        "path",
+    ],
+    rules={"keywords": JOIN, "contacts": (FIRST, 1)},
+)
+REPORT_HEADERS = REPORT_PLAN.headers
+
+# codebook of the current worker, loaded by init_worker
+_CODEBOOK = None
+
+# #############################################################################
+# ######## Functions #################
+# ##################################
+
+
+def init_worker(axinite_path: Path = AXINITE_PATH):
+    """Load the codebook once per worker process.
+
+    :param pathlib.Path axinite_path: path to axinite.xml.
+    """
+    global _CODEBOOK
+    _CODEBOOK = Codebook.load(Path(axinite_path))
+
+
+def iter_xml_files(roots):
+    """Yield the XML files found under a set of root folders.
+
+    :param roots: iterable of folders paths.
+    """
+    for root in roots:
+        root = Path(root)
+        if not root.is_dir():
+            raise IOError("Input folder doesn't exist: {}".format(root))
+        for xml_path in root.rglob("*.xml"):
+            yield xml_path
+
+
+def iter_chunks(iterable, size: int):
+    """Yield lists of at most `size` items of an iterable.
+
+    :param iterable: items to group.
+    :param int size: chunk size.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def build_record(md: MetadataIso19139, decoded: dict, xml_path: Path) -> dict:
+    """Build the record of a metadata to report, flattened by REPORT_PLAN:
+    decoded themes are added to its keywords.
+
+    :param MetadataIso19139 md: metadata read from the XML.
+    :param dict decoded: decoded name, as returned by `decode_name`.
+    :param pathlib.Path xml_path: path to the XML file.
+    """
+    keywords = list(md.keywords)
+    for field in ("Main Theme", "Theme 2", "Theme 3"):
+        if decoded.get(field) and decoded.get(field) != "None":
+            keywords.append(decoded.get(field))
+
+    return {
+        "name": decoded.get("Name"),
+        "abstract": md.abstract,
+        "keywords": keywords,
+        "country": decoded.get("Country"),
+        "region": decoded.get("Region"),
+        "year": decoded.get("Year"),
+        "date": md.date,
+        "resolution": (md.resolution or "").split("m")[0],  # delete unity
+        "scale": (md.scale or "").replace(",", ""),
+        "contacts": md.list_contacts[::-1],  # the last contact is reported
+        "path": xml_path,
+    }
+
+
+def process_chunk(xml_paths: list) -> list:
+    """Read a chunk of metadata, decode their titles in a single batch and
+    return the report rows. Unreadable files are logged and skipped.
+
+    :param list xml_paths: paths to the XML files.
+    """
+    if _CODEBOOK is None:
+        init_worker()
+
+    mds = []
+    for xml_path in xml_paths:
+        try:
+            mds.append((MetadataIso19139(xml=xml_path), xml_path))
+        except Exception as err:
+            logging.error("Unreadable metadata ({}): {}".format(err, xml_path))
+
+    decoded = iter_rows(
+        decode_names(
+            [md.title for md, _ in mds],
+            [str(xml_path) for _, xml_path in mds],
+            codebook=_CODEBOOK,
+        )
+    )
+    return REPORT_PLAN.apply_multiple(
+        build_record(md, decoded_name, xml_path)
+        for (md, xml_path), decoded_name in zip(mds, decoded)
+    )
+
+
+def run_pipeline(
+    roots,
+    output: Path = Path("./report_orano.csv"),
+    jobs: int = 1,
+    chunk_size: int = 200,
+    axinite_path: Path = AXINITE_PATH,
+) -> int:
+    """Process every XML file found under the roots and report them into a
+    CSV file. Return the number of reported metadata.
+
+    :param roots: iterable of folders paths.
+    :param pathlib.Path output: path to the CSV report.
+    :param int jobs: number of worker processes. Default: 1 (sequential).
+    :param int chunk_size: number of files processed by a worker at once. Default: 200.
+    :param pathlib.Path axinite_path: path to axinite.xml.
+    """
+    csv_report = CsvReporter(csvpath=Path(output), headers=REPORT_HEADERS)
+    chunks = iter_chunks(iter_xml_files(roots), chunk_size)
+    counter = 0
+
+    if jobs <= 1:
+        init_worker(axinite_path)
+        for chunk in chunks:
+            rows = process_chunk(chunk)
+            csv_report.add_multiple(rows)
+            counter += len(rows)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_worker, initargs=(axinite_path,)
+        ) as workers:
+            for rows in bounded_map(workers, process_chunk, chunks, jobs * 2):
+                csv_report.add_multiple(rows)
+                counter += len(rows)
+
+    csv_report.close()
+    logging.info("{} metadata reported into {}".format(counter, output))
+    return counter
+
+
+# #############################################################################
+# ####### Command-line ############
+# #################################
+@click.command()
+@click.option(
+    "--input",
+    "roots",
+    multiple=True,
+    required=True,
+    help="Folder to parse. Can be repeated.",
+)
+@click.option(
+    "--output",
+    default="report_orano.csv",
+    help="Path to the CSV report. Default: './report_orano.csv'.",
+)
+@click.option(
+    "--jobs",
+    default=os.cpu_count() or 1,
+    help="Number of worker processes. Default: number of CPUs.",
+)
+@click.option(
+    "--chunk-size",
+    default=200,
+    help="Number of files processed by a worker at once. Default: 200.",
+)
+@click.option(
+    "--axinite",
+    default=str(AXINITE_PATH),
+    help="Path to Axinite's configuration. Default: next to the names decoder.",
+)
+def cli_orano_pipeline(roots, output, jobs, chunk_size, axinite):
+    """Report Orano's metadata with their decoded names."""
+    run_pipeline(
+        roots,
+        output=Path(output),
+        jobs=jobs,
+        chunk_size=chunk_size,
+        axinite_path=Path(axinite),
+    )
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    cli_orano_pipeline()
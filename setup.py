@@ -50,6 +50,8 @@ setup(
     extras_require={
         "dev": ["black", "python-dotenv"],
         "test": ["pytest", "pytest-cov"],
+        "yaml": ["pyyaml"],
+        "zstd": ["zstandard"],
     },
     python_requires=">=3.6, <4",
     # packaging
@@ -57,6 +59,7 @@ setup(
         exclude=["contrib", "docs", "*.tests", "*.tests.*", "tests.*", "tests"]
     ),
     include_package_data=True,
+    package_data={"isogeo_xml_toolbelt": ["fixers/rules/*.json"]},
     classifiers=[
         "Intended Audience :: Developers",
         "Intended Audience :: Information Technology",
@@ -0,0 +1,155 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_fix_rules
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import json
+from pathlib import Path
+import unittest
+
+# 3rd party
+from lxml import etree
+
+# modules
+from isogeo_xml_toolbelt.fixers import FixRuleSet, MetadataIso19139Fixer
+from isogeo_xml_toolbelt.fixers.fix_rules import NAMESPACES, yaml
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+CUSTOM_RULES = {
+    "name": "custom",
+    "version": "2",
+    "variables": {"language": "eng"},
+    "rules": [
+        {
+            "name": "set_language",
+            "anchor": "gmd:MD_Metadata/gmd:identificationInfo/gmd:MD_DataIdentification/gmd:language/gmd:LanguageCode",
+            "action": "set-attr",
+            "attribute": "codeListValue",
+            "value": "${language}",
+        },
+        {
+            "name": "replace_topic",
+            "anchor": "gmd:MD_Metadata/gmd:identificationInfo/gmd:MD_DataIdentification",
+            "action": "replace",
+            "target": "gmd:topicCategory",
+            "xml": "<gmd:topicCategory><gmd:MD_TopicCategoryCode>environment</gmd:MD_TopicCategoryCode></gmd:topicCategory>",
+        },
+        {
+            "name": "add_parent",
+            "anchor": "gmd:MD_Metadata",
+            "missing": "gmd:parentIdentifier",
+            "action": "insert",
+            "xml": "<gmd:parentIdentifier><gco:CharacterString>parent</gco:CharacterString></gmd:parentIdentifier>",
+        },
+        {
+            "name": "remove_extent",
+            "anchor": "gmd:MD_Metadata/gmd:identificationInfo/gmd:MD_DataIdentification",
+            "exists": "gmd:nonExistingElement",
+            "action": "remove",
+            "target": "gmd:extent",
+        },
+    ],
+}
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestFixRules(unittest.TestCase):
+    """Test the declarative fix rules."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.rules_path = Path("tests/output/custom_rules.json")
+        self.rules_path.write_text(json.dumps(CUSTOM_RULES), encoding="utf-8")
+
+    # -- TESTS ---------------------------------------------------------
+    def test_custom_rules(self):
+        """Custom rules are applied in a single pass."""
+        rule_set = FixRuleSet.from_file(self.rules_path, {"language": "ger"})
+        self.assertEqual(rule_set.version, "2")
+        self.assertEqual(len(rule_set.dispatch), 3)
+
+        fixer = MetadataIso19139Fixer(rule_set)
+        output = Path("tests/output/fixed_custom_19139.xml")
+        applied = fixer.fix_file(
+            Path("tests/fixtures/iso19139/sample_19139.xml"), output
+        )
+        self.assertEqual(applied, ["set_language", "replace_topic", "add_parent"])
+
+        md = etree.parse(str(output))
+        self.assertEqual(
+            md.xpath(
+                "//gmd:MD_DataIdentification/gmd:language/gmd:LanguageCode/@codeListValue",
+                namespaces=NAMESPACES,
+            ),
+            ["ger"],
+        )
+        self.assertEqual(
+            md.xpath("//gmd:MD_TopicCategoryCode/text()", namespaces=NAMESPACES),
+            ["environment"],
+        )
+        self.assertEqual(
+            len(md.xpath("//gmd:parentIdentifier", namespaces=NAMESPACES)), 1
+        )
+        self.assertEqual(len(md.xpath("//gmd:extent", namespaces=NAMESPACES)), 1)
+
+    def test_escaped_variables(self):
+        """Variables are escaped in predicates and XML fragments."""
+        label = "Licence d'usage <R&D>"
+        fixer = MetadataIso19139Fixer(license_label=label)
+        output = Path("tests/output/fixed_escaped_19139.xml")
+        applied = fixer.fix_file(
+            Path("tests/fixtures/iso19139/sample_19139.xml"), output
+        )
+        self.assertIn("fix_cgus", applied)
+        md = etree.parse(str(output))
+        self.assertEqual(
+            md.xpath("//gmx:Anchor/@xl:title", namespaces=NAMESPACES), [label]
+        )
+        # the predicate finds the inserted license
+        refixed = Path("tests/output/refixed_escaped_19139.xml")
+        self.assertEqual(fixer.fix_file(output, refixed), [])
+
+        with self.assertRaises(ValueError):
+            MetadataIso19139Fixer(license_label="""'both' "quotes\"""")
+
+    @unittest.skipIf(yaml is None, "PyYAML is not installed")
+    def test_yaml_rules(self):
+        """Rules can be written in YAML."""
+        yaml_path = Path("tests/output/custom_rules.yml")
+        yaml_path.write_text(yaml.safe_dump(CUSTOM_RULES), encoding="utf-8")
+        self.assertEqual(len(FixRuleSet.from_file(yaml_path).rules), 4)
+
+    def test_bad_rules(self):
+        """Invalid rules are rejected when loaded."""
+        bad_action = {"rules": [{"anchor": "gmd:MD_Metadata", "action": "move"}]}
+        with self.assertRaises(ValueError):
+            FixRuleSet(bad_action)
+        bad_variable = {
+            "rules": [
+                {"anchor": "gmd:MD_Metadata", "action": "insert", "xml": "<a>${b}</a>"}
+            ]
+        }
+        with self.assertRaises(ValueError):
+            FixRuleSet(bad_variable)
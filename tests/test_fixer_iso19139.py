@@ -0,0 +1,256 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_fixer_iso19139
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from pathlib import Path
+import shutil
+import stat
+import unittest
+
+# 3rd party
+from lxml import etree
+
+# modules
+from isogeo_xml_toolbelt.fixers import FixManifest, MetadataIso19139Fixer, fix_many
+from isogeo_xml_toolbelt.fixers.fix_manifest import FILE_MODE
+from isogeo_xml_toolbelt.fixers.fix_stream import StreamPlan
+from isogeo_xml_toolbelt.fixers.fixer_iso19139 import NAMESPACES
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+MINIMAL_19139 = """<?xml version="1.0" encoding="UTF-8"?>
+<gmd:MD_Metadata xmlns:gmd="http://www.isotc211.org/2005/gmd">
+  <gmd:fileIdentifier />
+</gmd:MD_Metadata>
+"""
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestFixerIso19139(unittest.TestCase):
+    """Test the ISO 19139 fixer."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.fixer = MetadataIso19139Fixer()
+        self.output = Path("tests/output/fixed_19139.xml")
+
+    # -- TESTS ---------------------------------------------------------
+    def test_fix_file(self):
+        """All fixes are applied to a complete record."""
+        applied = self.fixer.fix_file(
+            Path("tests/fixtures/iso19139/sample_19139.xml"), self.output
+        )
+        self.assertEqual(
+            applied,
+            ["add_ds_creation_date", "add_md_character_set", "fix_srs", "fix_cgus"],
+        )
+        md = etree.parse(str(self.output))
+        self.assertEqual(
+            md.xpath(
+                "//gmd:CI_Citation/gmd:date/gmd:CI_Date[gmd:dateType/"
+                "gmd:CI_DateTypeCode/@codeListValue='creation']/gmd:date/gco:Date/text()",
+                namespaces=NAMESPACES,
+            )[-1],
+            "2015-09-08Z",
+        )
+        self.assertEqual(len(md.xpath("//gmd:characterSet", namespaces=NAMESPACES)), 2)
+        self.assertEqual(
+            md.xpath(
+                "//gmd:RS_Identifier/gmd:code/gco:CharacterString/text()",
+                namespaces=NAMESPACES,
+            ),
+            ["urn:ogc:def:crs:EPSG:2154"],
+        )
+        self.assertFalse(md.xpath("//gmd:codeSpace", namespaces=NAMESPACES))
+        constraints = md.xpath("//gmd:resourceConstraints", namespaces=NAMESPACES)
+        self.assertEqual(len(constraints), 1)
+        self.assertEqual(
+            constraints[0].xpath(".//gmx:Anchor/@xl:title", namespaces=NAMESPACES),
+            ["Licence ouverte ETALAB 1.0"],
+        )
+        # pretty-printed
+        self.assertIn("\n  <gmd:characterSet>", self.output.read_text(encoding="utf-8"))
+
+    def test_fix_missing_elements(self):
+        """Fixes without their target elements are skipped."""
+        tree = etree.ElementTree(etree.fromstring(MINIMAL_19139.encode("utf-8")))
+        self.assertEqual(self.fixer.fix_tree(tree), ["add_md_character_set"])
+
+    def test_fix_idempotent(self):
+        """Fixing a fixed file changes nothing."""
+        self.fixer.fix_file(Path("tests/fixtures/iso19139/sample_19139.xml"), self.output)
+        refixed = Path("tests/output/refixed_19139.xml")
+        parser = etree.XMLParser(remove_blank_text=True)
+        for streaming in (False, True):
+            fixer = MetadataIso19139Fixer(streaming=streaming)
+            self.assertEqual(fixer.fix_file(self.output, refixed), [])
+            # canonical form: namespaces declarations order is meaningless
+            self.assertEqual(
+                etree.tostring(etree.parse(str(refixed), parser), method="c14n"),
+                etree.tostring(etree.parse(str(self.output), parser), method="c14n"),
+            )
+
+    def test_stream_fix(self):
+        """Streamed and parsed fixes give the same document."""
+        # large document: many children written while parsed
+        sample = etree.parse("tests/fixtures/iso19139/sample_19139.xml")
+        root = sample.getroot()
+        for i in range(500):
+            content = etree.SubElement(root, "{{{}}}contentInfo".format(NAMESPACES.get("gmd")))
+            content.text = "content {}".format(i)
+        large_xml = Path("tests/output/large_19139.xml")
+        sample.write(str(large_xml), encoding="utf-8", xml_declaration=True)
+
+        stream_output = Path("tests/output/fixed_stream_19139.xml")
+        applied = MetadataIso19139Fixer(streaming=True).fix_file(large_xml, stream_output)
+        self.assertEqual(
+            sorted(applied),
+            sorted(self.fixer.fix_file(large_xml, self.output)),
+        )
+
+        def canonical(xml_path):
+            return [
+                (elem.tag, sorted(elem.attrib.items()), (elem.text or "").strip())
+                for elem in etree.parse(str(xml_path)).iter()
+            ]
+
+        self.assertEqual(canonical(stream_output), canonical(self.output))
+
+    def test_stream_fix_predicates(self):
+        """Anchors with predicates on their targets are streamed, with the same
+        results as parsed fixes."""
+        gmd = "{{{}}}".format(NAMESPACES.get("gmd"))
+        plan = StreamPlan(self.fixer.rules)
+        self.assertIn(
+            (
+                gmd + "MD_Metadata",
+                gmd + "identificationInfo",
+                gmd + "MD_DataIdentification",
+            ),
+            plan.filters,
+        )
+
+        license = etree.fromstring(
+            '<gmd:resourceConstraints xmlns:gmd="{gmd}" xmlns:gmx="{gmx}" xmlns:xl="{xl}">'
+            "<gmd:MD_Constraints><gmd:useLimitation>"
+            '<gmx:Anchor xl:title="Licence ouverte ETALAB 1.0" xl:href="http://example.com"/>'
+            "</gmd:useLimitation></gmd:MD_Constraints></gmd:resourceConstraints>".format(
+                **NAMESPACES
+            )
+        )
+        parser = etree.XMLParser(remove_blank_text=True)
+        stream_output = Path("tests/output/fixed_stream_19139.xml")
+        for with_license in (False, True):
+            sample = etree.parse("tests/fixtures/iso19139/sample_19139.xml")
+            identification = sample.find(".//gmd:MD_DataIdentification", NAMESPACES)
+            constraints = identification.find("gmd:resourceConstraints", NAMESPACES)
+            # held constraints followed by a streamed child (citation)
+            identification.insert(0, etree.fromstring(etree.tostring(constraints)))
+            if with_license:
+                constraints.addnext(license)
+            xml = Path("tests/output/predicates_19139.xml")
+            sample.write(str(xml), encoding="utf-8", xml_declaration=True)
+
+            applied = MetadataIso19139Fixer(streaming=True).fix_file(xml, stream_output)
+            self.assertEqual(sorted(applied), sorted(self.fixer.fix_file(xml, self.output)))
+            self.assertEqual("fix_cgus" in applied, not with_license)
+            self.assertEqual(
+                etree.tostring(etree.parse(str(stream_output), parser), method="c14n"),
+                etree.tostring(etree.parse(str(self.output), parser), method="c14n"),
+            )
+
+    def test_stream_fix_large_subtree(self):
+        """A large subtree without anchor is written element by element, with
+        its comments, and gives the same document as parsed fixes."""
+        gmd = "{{{}}}".format(NAMESPACES.get("gmd"))
+        gco = "{{{}}}".format(NAMESPACES.get("gco"))
+        sample = etree.parse("tests/fixtures/iso19139/sample_19139.xml")
+        content = etree.SubElement(sample.getroot(), gmd + "contentInfo")
+        description = etree.SubElement(content, gmd + "MD_FeatureCatalogueDescription")
+        description.append(etree.Comment(" feature types "))
+        for i in range(2000):
+            feature_type = etree.SubElement(description, gmd + "featureTypes")
+            etree.SubElement(feature_type, gco + "LocalName").text = "type_{}".format(i)
+        xml = Path("tests/output/large_subtree_19139.xml")
+        sample.write(str(xml), encoding="utf-8", xml_declaration=True)
+
+        stream_output = Path("tests/output/fixed_stream_19139.xml")
+        applied = MetadataIso19139Fixer(streaming=True).fix_file(xml, stream_output)
+        self.assertEqual(sorted(applied), sorted(self.fixer.fix_file(xml, self.output)))
+        parser = etree.XMLParser(remove_blank_text=True)
+        self.assertEqual(
+            etree.tostring(etree.parse(str(stream_output), parser), method="c14n"),
+            etree.tostring(etree.parse(str(self.output), parser), method="c14n"),
+        )
+        # namespaces are declared once, by the root
+        self.assertEqual(stream_output.read_text(encoding="utf-8").count("xmlns:gco"), 1)
+
+    def test_output_mode(self):
+        """Fixed files and manifests get the mode of the files created by open()."""
+        for streaming in (False, True):
+            MetadataIso19139Fixer(streaming=streaming).fix_file(
+                Path("tests/fixtures/iso19139/sample_19139.xml"), self.output
+            )
+            self.assertEqual(stat.S_IMODE(self.output.stat().st_mode), FILE_MODE)
+        manifest_path = Path("tests/output/fix_manifest.json")
+        with FixManifest(manifest_path) as manifest:
+            manifest.record(self.output, "input", "rules", "output")
+        self.assertEqual(stat.S_IMODE(manifest_path.stat().st_mode), FILE_MODE)
+
+    def test_fix_many(self):
+        """Files are fixed over a pool of processes, errors being reported."""
+        input_dir = Path("tests/output/fix_many_input")
+        output_dir = Path("tests/output/fix_many_output")
+        for folder in (input_dir, output_dir):
+            if folder.exists():
+                shutil.rmtree(str(folder))
+        input_dir.mkdir()
+        for i in range(3):
+            shutil.copyfile(
+                "tests/fixtures/iso19139/sample_19139.xml",
+                str(input_dir / "record_{}.xml".format(i)),
+            )
+        (input_dir / "broken.xml").write_text("<gmd:MD_Metadata", encoding="utf-8")
+
+        report = fix_many(sorted(input_dir.glob("*.xml")), output_dir, jobs=2)
+        self.assertEqual(
+            [row.get("status") for row in report], ["error", "fixed", "fixed", "fixed"]
+        )
+        self.assertTrue(report[0].get("error"))
+        self.assertEqual(
+            sorted(i.name for i in output_dir.iterdir()),
+            ["record_0.xml", "record_1.xml", "record_2.xml"],
+        )
+
+        # unchanged files are skipped
+        manifest = output_dir / "fix_manifest.json"
+        inputs = sorted(input_dir.glob("record_*.xml"))
+        fix_many(inputs, output_dir, manifest=manifest)
+        shutil.copyfile(str(output_dir / "record_1.xml"), str(input_dir / "record_1.xml"))
+        report = fix_many(inputs, output_dir, jobs=2, manifest=manifest)
+        self.assertEqual(
+            [row.get("status") for row in report], ["unchanged", "fixed", "unchanged"]
+        )
+        self.assertEqual(report[1].get("applied"), "")
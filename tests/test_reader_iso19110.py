@@ -20,7 +20,8 @@ import sys
 import unittest
 
 # modules
-from isogeo_xml_toolbelt.readers import MetadataIso19110
+from isogeo_xml_toolbelt.models import FeatureType, FeatureTypes
+from isogeo_xml_toolbelt.readers import MetadataIso19110, iter_feature_attributes
 
 # #############################################################################
 # ######## Globals #################
@@ -68,3 +69,64 @@ class TestReaderIso19110(unittest.TestCase):
             #     "featureTypes": md.featureTypes,
             #     "featureAttributes": md.featureAttributes,
             # )
+
+    def test_read_missing_values(self):
+        """Attributes without definition or type don't break the reading."""
+        sample = Path("tests/fixtures/iso19110/sample_19110.xml")
+        xml_path = Path("tests/output/missing_values_19110.xml")
+        xml_path.write_text(
+            sample.read_text(encoding="utf-8").replace(
+                "<gco:CharacterString>Nom du cours d'eau</gco:CharacterString>", ""
+            ),
+            encoding="utf-8",
+        )
+        md = MetadataIso19110(xml_path)
+        self.assertEqual(md.featureAttributes.get("NOM"), [["", "String"]])
+        self.assertEqual(
+            md.featureAttributes.get("ID"),
+            [
+                ["Identifiant du tronçon", "Integer"],
+                ["Identifiant du plan d'eau", "Integer"],
+            ],
+        )
+
+    def test_iter_feature_attributes(self):
+        """Attributes are yielded with their feature type, cardinality and values."""
+        attributes = list(
+            iter_feature_attributes(Path("tests/fixtures/iso19110/sample_19110.xml"))
+        )
+        self.assertEqual(
+            [(i.featureType, i.name) for i in attributes],
+            [("COURS_EAU", "ID"), ("COURS_EAU", "NOM"), ("COURS_EAU", "REGIME"), ("PLAN_EAU", "ID")],
+        )
+        self.assertEqual(attributes[0].cardinality, "1..1")
+        self.assertEqual(attributes[2].listedValues, ("Permanent", "Intermittent"))
+        self.assertEqual(attributes[3].definition, "Identifiant du plan d'eau")
+
+    def test_feature_types(self):
+        """Feature types are looked up by name or uuid, asDict being unchanged."""
+        md = MetadataIso19110(Path("tests/fixtures/iso19110/sample_19110.xml"))
+        self.assertEqual(len(md.featureTypes), 2)
+        cours_eau = md.featureTypes.get("COURS_EAU")
+        self.assertIs(md.featureTypes.get("9b1f2c3d-4e5f-4a6b-8c7d-0e1f2a3b4c5d"), cours_eau)
+        self.assertIsNone(md.featureTypes.get("MISSING"))
+        self.assertEqual(cours_eau.names, ("ID", "NOM", "REGIME"))
+        self.assertEqual(cours_eau.get("REGIME")[4], ("Permanent", "Intermittent"))
+        self.assertEqual(
+            md.asDict().get("featureTypes"),
+            {
+                "name": "COURS_EAU, PLAN_EAU",
+                "uuid": "9b1f2c3d-4e5f-4a6b-8c7d-0e1f2a3b4c5d, 2a3b4c5d-6e7f-4a8b-9c0d-1e2f3a4b5c6d",
+            },
+        )
+        self.assertEqual(len(md.asDict().get("featureAttributes").get("ID")), 2)
+
+    def test_feature_types_empty(self):
+        """Feature types without attributes or name are looked up and reported."""
+        empty = FeatureType("EMPTY", "u-1")
+        feature_types = FeatureTypes([empty, FeatureType("", "u-2")])
+        self.assertEqual(len(empty), 0)
+        self.assertIs(feature_types.get("EMPTY"), empty)
+        self.assertIs(feature_types.get("u-1"), empty)
+        self.assertIsNone(empty.get("ID"))
+        self.assertEqual(feature_types.asDict(), {"name": "EMPTY", "uuid": "u-1, u-2"})
@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_record_diff
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from pathlib import Path
+import unittest
+
+# 3rd party
+from lxml import etree
+
+# modules
+from isogeo_xml_toolbelt.comparators import (
+    diff_many,
+    diff_records,
+    diff_trees,
+    subtree_hashes,
+)
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+NAMESPACES = {
+    "gco": "http://www.isotc211.org/2005/gco",
+    "gmd": "http://www.isotc211.org/2005/gmd",
+}
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestRecordDiff(unittest.TestCase):
+    """Test the records diff."""
+
+    # standard methods
+    @classmethod
+    def setUpClass(cls):
+        """Executed once before all tests: write a changed version of the sample."""
+        cls.sample = Path("tests/fixtures/iso19139/sample_19139.xml")
+        cls.changed = Path("tests/output/changed_19139.xml")
+        tree = etree.parse(str(cls.sample))
+        title = tree.find(
+            "gmd:identificationInfo/*/gmd:citation/*/gmd:title/gco:CharacterString",
+            NAMESPACES,
+        )
+        cls.old_title, title.text = title.text, "New title"
+        tree.write(str(cls.changed), encoding="utf-8", xml_declaration=True)
+        # same content, other layout
+        cls.reindented = Path("tests/output/reindented_19139.xml")
+        etree.parse(str(cls.sample)).write(
+            str(cls.reindented), encoding="utf-8", pretty_print=False
+        )
+
+    # -- TESTS ---------------------------------------------------------
+    def test_diff_trees(self):
+        """Only the changed elements are reported, with their path."""
+        old = etree.fromstring(
+            "<a><b>1</b><b>2</b><c x='1'><d>3</d></c><e/></a>"
+        )
+        new = etree.fromstring(
+            "<a><b>1</b><b>4</b><b>5</b><c x='2'><d>3</d></c></a>"
+        )
+        old_hashes, new_hashes = subtree_hashes(old), subtree_hashes(new)
+        self.assertEqual(old_hashes.get(old[0]), new_hashes.get(new[0]))
+        changes = diff_trees(old, new, old_hashes, new_hashes)
+        self.assertEqual(
+            [(i.path, i.kind, i.old, i.new) for i in changes],
+            [
+                ("/a/b[2]", "modified", "2", "4"),
+                ("/a/b[3]", "added", None, "5"),
+                ("/a/c/@x", "modified", "1", "2"),
+                ("/a/e", "removed", "", None),
+            ],
+        )
+
+    def test_diff_records(self):
+        """Fields and elements changes, layout being ignored."""
+        record_diff = diff_records(self.sample, self.changed)
+        self.assertEqual(record_diff.status, "changed")
+        self.assertEqual(
+            [(i.field, i.old, i.new) for i in record_diff.fields],
+            [("title", self.old_title, "New title")],
+        )
+        self.assertEqual(len(record_diff.elements), 1)
+        self.assertTrue(record_diff.elements[0].path.endswith("gmd:title/gco:CharacterString"))
+        self.assertEqual(diff_records(self.sample, self.reindented).status, "identical")
+
+    def test_diff_many(self):
+        """Pairs are compared over a pool of processes, in pairs order."""
+        pairs = [
+            (self.sample, self.sample),
+            (self.sample, self.changed),
+            (self.sample, Path("tests/output/missing.xml")),
+        ]
+        report = diff_many(pairs, jobs=2)
+        self.assertEqual(
+            [i.get("status") for i in report], ["identical", "changed", "error"]
+        )
+        self.assertEqual(report[1].get("fields"), "title")
@@ -0,0 +1,99 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_reporter_csv
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import gzip
+import io
+from pathlib import Path
+import unittest
+
+# modules
+from isogeo_xml_toolbelt.reporters import CsvReporter
+from isogeo_xml_toolbelt.reporters import csv_reporter
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestReporterCsv(unittest.TestCase):
+    """Test the CSV reporter."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.headers = ["Nom", "Objets", "Format"]
+        self.row = {"Nom": "Data", "Objets": 25, "Format": "ISO19139"}
+        self.expected = "Nom;Objets;Format\r\n" + "Data;25;ISO19139\r\n" * 3
+
+    def tearDown(self):
+        """Executed after each test."""
+        pass
+
+    #  -- Tests ------------------------------------------------------------
+    def test_plain(self):
+        """Check uncompressed report."""
+        csvpath = Path("tests/output/report_test.csv")
+        csv_report = CsvReporter(csvpath=csvpath, headers=self.headers)
+        csv_report.add_unique(self.row)
+        csv_report.add_multiple([self.row, self.row])
+        self.assertEqual(csvpath.read_bytes().decode("utf-8"), self.expected)
+
+    def test_gzip(self):
+        """Check gzip compressed report."""
+        csvpath = Path("tests/output/report_test.csv.gz")
+        with CsvReporter(
+            csvpath=csvpath, headers=self.headers, compression="gzip", compresslevel=0
+        ) as csv_report:
+            self.assertEqual(csv_report.compresslevel, 0)
+            csv_report.add_unique(self.row)
+            csv_report.add_multiple([self.row, self.row])
+
+        with gzip.open(str(csvpath), "rb") as gz:
+            self.assertEqual(gz.read().decode("utf-8"), self.expected)
+
+    @unittest.skipIf(csv_reporter.zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        """Check zstd compressed report."""
+        csvpath = Path("tests/output/report_test.csv.zst")
+        with CsvReporter(
+            csvpath=csvpath, headers=self.headers, compression="zstd"
+        ) as csv_report:
+            csv_report.add_unique(self.row)
+            csv_report.add_multiple([self.row, self.row])
+
+        with csvpath.open("rb") as zst:
+            reader = csv_reporter.zstandard.ZstdDecompressor().stream_reader(zst)
+            self.assertEqual(
+                io.TextIOWrapper(reader, encoding="utf-8", newline="").read(),
+                self.expected,
+            )
+
+    def test_bad_compression(self):
+        """Check unsupported compression is refused."""
+        with self.assertRaises(ValueError):
+            CsvReporter(
+                csvpath=Path("tests/output/report_test.csv.xz"),
+                headers=self.headers,
+                compression="xz",
+            )
@@ -0,0 +1,97 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_reporter_flattener
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import unittest
+
+# modules
+from isogeo_xml_toolbelt.reporters import FlattenPlan
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestReporterFlattener(unittest.TestCase):
+    """Test the flattening plan used by tabular reporters."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.record = {
+            "title": "Data",
+            "keywords": ["water", "river", "lake"],
+            "contacts": [
+                {"name": "John", "organisation": "Isogeo"},
+                {"name": "Jane", "organisation": "Orano"},
+            ],
+        }
+
+    def tearDown(self):
+        """Executed after each test."""
+        pass
+
+    #  -- Tests ------------------------------------------------------------
+    def test_join_first_json(self):
+        """Check join, first-N and JSON modes."""
+        plan = FlattenPlan(
+            headers=["title", "keywords", "contacts.name", "contacts.organisation"],
+            rules={"keywords": ("first", 2), "contacts": "join"},
+        )
+        self.assertEqual(
+            plan.apply(self.record),
+            [
+                {
+                    "title": "Data",
+                    "keywords": "water|river",
+                    "contacts.name": "John|Jane",
+                    "contacts.organisation": "Isogeo|Orano",
+                }
+            ],
+        )
+        plan = FlattenPlan(headers=["keywords"], rules={"keywords": "json"})
+        self.assertEqual(plan.apply(self.record), [{"keywords": '["water", "river", "lake"]'}])
+
+    def test_subkey_without_rule(self):
+        """Check sub-keys without rule are joined instead of passing the list."""
+        plan = FlattenPlan(headers=["title", "contacts.name"])
+        self.assertEqual(
+            plan.apply(self.record), [{"title": "Data", "contacts.name": "John|Jane"}]
+        )
+
+    def test_explode(self):
+        """Check explode mode produces a row per item."""
+        plan = FlattenPlan(
+            headers=["title", "contacts.name"], rules={"contacts": "explode"}
+        )
+        rows = plan.apply_multiple([self.record, {"title": "Empty"}])
+        self.assertEqual(
+            rows,
+            [
+                {"title": "Data", "contacts.name": "John"},
+                {"title": "Data", "contacts.name": "Jane"},
+                {"title": "Empty", "contacts.name": None},
+            ],
+        )
+
+    def test_bad_rules(self):
+        """Check rules are checked."""
+        with self.assertRaises(ValueError):
+            FlattenPlan(headers=["keywords"], rules={"keywords": "split"})
+        with self.assertRaises(ValueError):
+            FlattenPlan(
+                headers=["keywords", "contacts.name"],
+                rules={"keywords": "explode", "contacts": "explode"},
+            )
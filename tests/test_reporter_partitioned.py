@@ -0,0 +1,68 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_reporter_partitioned
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from pathlib import Path
+import shutil
+import unittest
+
+# modules
+from isogeo_xml_toolbelt.reporters import PartitionedCsvReporter
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestReporterPartitioned(unittest.TestCase):
+    """Test the partitioned CSV reporter."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.root = Path("tests/output/report_partitioned")
+        shutil.rmtree(str(self.root), ignore_errors=True)
+        self.row = {"Nom": "Data", "Objets": 25}
+
+    def tearDown(self):
+        """Executed after each test."""
+        pass
+
+    #  -- Tests ------------------------------------------------------------
+    def test_routing_with_evictions(self):
+        """Check rows are routed to their partition, even after being evicted
+        from the pool of open files."""
+        with PartitionedCsvReporter(
+            root=self.root, headers=["Nom", "Objets"], max_open_files=2
+        ) as csv_report:
+            csv_report.add_unique(self.row, "cat1", "iso19139")
+            csv_report.add_multiple([self.row, self.row], "cat2", "iso19110")
+            csv_report.add_unique(self.row, "cat3", "iso19139")
+            self.assertLessEqual(len(csv_report._pool), 2)
+            csv_report.add_unique(self.row, "cat1", "iso19139")
+
+        self.assertEqual(len(csv_report.partitions), 3)
+        cat1 = (self.root / "cat1" / "iso19139.csv").read_text(encoding="utf-8")
+        self.assertEqual(cat1.splitlines(), ["Nom;Objets", "Data;25", "Data;25"])
+        cat2 = (self.root / "cat2" / "iso19110.csv").read_text(encoding="utf-8")
+        self.assertEqual(len(cat2.splitlines()), 3)
@@ -0,0 +1,109 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_reporter_sqlite
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from pathlib import Path
+import sqlite3
+import unittest
+
+# modules
+from isogeo_xml_toolbelt.reporters import SqliteReporter
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestReporterSqlite(unittest.TestCase):
+    """Test the SQLite reporter."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.dbpath = Path("tests/output/report_test.sqlite")
+        for suffix in ("", "-wal", "-shm"):
+            db_file = Path(str(self.dbpath) + suffix)
+            if db_file.exists():
+                db_file.unlink()
+        # fixtures
+        self.md_19139 = {
+            "filename": "sample.xml",
+            "fileIdentifier": "0135b681-5a76-4824-b7fa-0c492df3182d",
+            "title": "Sample",
+            "keywords": ["water", "river"],
+            "contacts": [
+                {"name": "John", "organisation": "Isogeo", "role": "pointOfContact"}
+            ],
+            "latmin": -90,
+        }
+        self.md_19110 = {
+            "filename": "catalog.xml",
+            "name": "Catalog",
+            "title": "Catalog",
+            "contact": {"email": ["contact@isogeo.com"], "city": ["Paris"]},
+            "featureAttributes": {"id": [["Identifier", "Integer"]]},
+        }
+
+    def tearDown(self):
+        """Executed after each test."""
+        pass
+
+    #  -- Tests ------------------------------------------------------------
+    def test_write_tables(self):
+        """Check rows are written into normalised tables."""
+        with SqliteReporter(dbpath=self.dbpath, batch_size=2) as reporter:
+            reporter.add_multiple([self.md_19139, self.md_19110, self.md_19139])
+
+        conn = sqlite3.connect(str(self.dbpath))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0], 3)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM keywords").fetchone()[0], 4)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0], 3)
+        self.assertEqual(
+            conn.execute("SELECT name, definition, type FROM feature_attributes").fetchall(),
+            [("id", "Identifier", "Integer")],
+        )
+        self.assertEqual(
+            conn.execute("SELECT mail FROM contacts WHERE metadata_id = 2").fetchone()[0],
+            "contact@isogeo.com",
+        )
+        conn.close()
+
+    def test_reopen_keeps_ids(self):
+        """Check a reopened database continues the metadata identifiers."""
+        with SqliteReporter(dbpath=self.dbpath) as reporter:
+            reporter.add_unique(self.md_19139)
+        with SqliteReporter(dbpath=self.dbpath) as reporter:
+            reporter.add_unique(self.md_19139)
+
+        conn = sqlite3.connect(str(self.dbpath))
+        self.assertEqual(
+            conn.execute("SELECT id FROM metadata ORDER BY id").fetchall(), [(1,), (2,)]
+        )
+        conn.close()
+
+    def test_bad_parameters(self):
+        """Check parameters are checked."""
+        with self.assertRaises(TypeError):
+            SqliteReporter(dbpath="report.sqlite")
+        with self.assertRaises(ValueError):
+            SqliteReporter(dbpath=self.dbpath, batch_size=0)
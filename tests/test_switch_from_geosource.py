@@ -0,0 +1,304 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_switch_from_geosource
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from itertools import islice
+import os
+from pathlib import Path
+import shutil
+import unittest
+from unittest import mock
+
+# 3rd party
+from click.testing import CliRunner
+
+# modules
+from isogeo_xml_toolbelt.switch_from_geosource import (
+    ERRORS_FILENAME,
+    JOURNAL_FILENAME,
+    MANIFEST_FILENAME,
+    DestinationNames,
+    cli_switch_from_geosource,
+    iter_metadata_folders,
+    list_metadata_folder,
+    migrate_metadata_folders,
+)
+from isogeo_xml_toolbelt.utils import AttachmentTransfer
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+INFO_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<info version="1.1">
+  <general>
+    <schema>iso19139</schema>
+    <siteId>{cat_uuid}</siteId>
+  </general>
+  <public>
+    <file name="RapportSample_PUBLIC.pdf" />
+  </public>
+  <private />
+</info>
+"""
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestSwitchFromGeosource(unittest.TestCase):
+    """Test the migration from a GeoSource export."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test. Build a GeoSource export from fixtures."""
+        self.input_dir = Path("tests/output/geosource_input")
+        self.output_dir = Path("tests/output/geosource_output")
+        shutil.rmtree(str(self.input_dir), ignore_errors=True)
+        shutil.rmtree(str(self.output_dir), ignore_errors=True)
+        shutil.rmtree("tests/output/cli_output", ignore_errors=True)
+
+        self.cat_uuid = "6b2e1f3a-2c1e-4a5b-9a3d-1f2e3d4c5b6a"
+        self.md_uuids = (
+            "1b8ccc26-99f4-455b-bb9c-ead396af50fa",
+            "0135b681-5a76-4824-b7fa-0c492df3182d",
+        )
+        for md_uuid in self.md_uuids:
+            md_folder = self.input_dir / "export" / md_uuid
+            for subfolder in ("metadata", "private", "public"):
+                (md_folder / subfolder).mkdir(parents=True)
+            shutil.copy(
+                "tests/fixtures/iso19139/sample_19139.xml",
+                str(md_folder / "metadata" / "metadata.xml"),
+            )
+            shutil.copy(
+                "tests/fixtures/geosource_folder/1b8ccc26-99f4-455b-bb9c-ead396af50fa/public/RapportSample_PUBLIC.pdf",
+                str(md_folder / "public"),
+            )
+            (md_folder / "info.xml").write_text(
+                INFO_XML.format(cat_uuid=self.cat_uuid), encoding="utf-8"
+            )
+        # folders to be ignored
+        (self.input_dir / "export" / "not-a-uuid" / "metadata").mkdir(parents=True)
+        (self.input_dir / "export" / "2d2fc7b6-91e8-4a4e-9c56-36a7c4f6bb4e").mkdir()
+
+    def tearDown(self):
+        """Executed after each test."""
+        pass
+
+    #  -- Tests ------------------------------------------------------------
+    def test_list_metadata_folder(self):
+        """Check GeoSource folders discovery."""
+        folders = list_metadata_folder(self.input_dir)
+        self.assertEqual(sorted(i.name for i in folders), sorted(self.md_uuids))
+
+    def test_iter_metadata_folders(self):
+        """Check GeoSource folders are found at any depth, lazily."""
+        nested = self.input_dir.joinpath(
+            "nested", "deeper", "5f0c2e4d-8b7a-4c3e-9f1d-2a6b8c0e4d3f"
+        )
+        for subfolder in ("metadata", "private", "public"):
+            (nested / subfolder).mkdir(parents=True)
+        shutil.copy(
+            "tests/fixtures/iso19139/sample_19139.xml",
+            str(nested / "metadata" / "metadata.xml"),
+        )
+        folders = list(iter_metadata_folders(self.input_dir))
+        self.assertEqual(
+            sorted(i.name for i in folders), sorted(self.md_uuids + (nested.name,))
+        )
+
+        # a GeoSource folder as root is the only one yielded
+        root = self.input_dir / "export" / self.md_uuids[0]
+        self.assertEqual(list(iter_metadata_folders(root)), [root.resolve()])
+
+        # stopped early (--limit): the rest of the tree is not listed
+        with mock.patch("os.scandir", wraps=os.scandir) as scandir:
+            list(iter_metadata_folders(self.input_dir))
+            full_calls = scandir.call_count
+            scandir.reset_mock()
+            self.assertEqual(len(list(islice(iter_metadata_folders(self.input_dir), 1))), 1)
+            self.assertLess(scandir.call_count, full_calls)
+
+    def test_migrate(self):
+        """Check sequential and parallel migrations."""
+        for jobs in (1, 2):
+            records = list(
+                migrate_metadata_folders(
+                    list_metadata_folder(self.input_dir), self.output_dir, jobs=jobs
+                )
+            )
+            self.assertEqual(len(records), 2)
+            # same titles, distinct files
+            self.assertNotEqual(records[0].get("dest_path"), records[1].get("dest_path"))
+            for record in records:
+                self.assertIsNone(record.get("error"))
+                self.assertEqual(record.get("md").get("title"), "Cours d'eau")
+                self.assertTrue(record.get("dest_path").is_file())
+                self.assertEqual(
+                    record.get("dest_path").parent,
+                    self.output_dir / self.cat_uuid / "iso19139",
+                )
+
+    def test_migrate_resume_names(self):
+        """Check folders placed again after a crash keep their destination name."""
+        names_path = self.output_dir / "names"
+        dest_paths = []
+        for resume in (False, True):
+            # nothing journaled: every folder is placed again
+            with DestinationNames(names_path, resume=resume) as names:
+                records = migrate_metadata_folders(
+                    list_metadata_folder(self.input_dir), self.output_dir, names=names
+                )
+                dest_paths.append(sorted(str(i.get("dest_path")) for i in records))
+        self.assertEqual(dest_paths[0], dest_paths[1])
+        placed = self.output_dir.joinpath(self.cat_uuid, "iso19139").glob("*.xml")
+        self.assertEqual(sorted(str(i) for i in placed), dest_paths[0])
+
+    def test_migrate_errors(self):
+        """Check a failing record doesn't stop the migration."""
+        broken = self.input_dir / "export" / self.md_uuids[1] / "info.xml"
+        broken.write_text("<info><general /></info>", encoding="utf-8")
+        self.output_dir.mkdir(parents=True)
+        manifest = self.output_dir / "manifest.csv"
+        with AttachmentTransfer(manifest=manifest) as transfer:
+            records = list(
+                migrate_metadata_folders(
+                    list_metadata_folder(self.input_dir),
+                    self.output_dir,
+                    jobs=2,
+                    transfer=transfer,
+                )
+            )
+            row = transfer.transfer(Path("tests/output/missing.pdf"), self.output_dir / "a.pdf")
+        self.assertEqual(
+            sorted(bool(record.get("error")) for record in records), [False, True]
+        )
+        self.assertTrue(row.get("error").startswith("FileNotFoundError"))
+        rows = manifest.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(rows), 3)
+
+    def test_migrate_placement(self):
+        """Check attached files are placed with each placement mode."""
+        for placement in ("copy", "hardlink", "reflink"):
+            shutil.rmtree(str(self.output_dir), ignore_errors=True)
+            records = list(
+                migrate_metadata_folders(
+                    list_metadata_folder(self.input_dir),
+                    self.output_dir,
+                    placement=placement,
+                )
+            )
+            for record in records:
+                self.assertEqual(len(record.get("dest_files")), 1)
+                src_file = record.get("files")[0]
+                dest_file = record.get("dest_files")[0]
+                self.assertEqual(
+                    dest_file,
+                    self.output_dir.joinpath(
+                        self.cat_uuid,
+                        "iso19139",
+                        record.get("folder").name,
+                        "public",
+                        "RapportSample_PUBLIC.pdf",
+                    ),
+                )
+                self.assertEqual(dest_file.read_bytes(), src_file.read_bytes())
+                if placement == "hardlink":
+                    self.assertTrue(os.path.samefile(str(src_file), str(dest_file)))
+
+    def test_cli_resume(self):
+        """Check an interrupted run is resumed from the journal."""
+        runner = CliRunner()
+        input_dir = str(self.input_dir.resolve())
+        cwd = os.getcwd()
+        # the report is written into the working directory
+        os.chdir(str(self.output_dir.parent))
+        try:
+            args = ["--input_dir", input_dir, "--output_dir", "cli_output", "--log", "ERROR"]
+            result = runner.invoke(cli_switch_from_geosource, args + ["--limit", 1])
+            self.assertEqual(result.exit_code, 0, result.output)
+            result = runner.invoke(cli_switch_from_geosource, args + ["--resume"])
+            self.assertEqual(result.exit_code, 0, result.output)
+
+            journal = Path("cli_output", JOURNAL_FILENAME).read_text().split()
+            self.assertEqual(sorted(journal), sorted(self.md_uuids))
+            report = Path("report.csv").read_text(encoding="utf-8").splitlines()
+            self.assertEqual(len(report), 3)
+        finally:
+            os.chdir(cwd)
+
+    def test_cli_errors(self):
+        """Check failed folders are reported apart from the attached files."""
+        broken = self.input_dir / "export" / self.md_uuids[1] / "info.xml"
+        broken.write_text("<info><general /></info>", encoding="utf-8")
+        runner = CliRunner()
+        input_dir = str(self.input_dir.resolve())
+        cwd = os.getcwd()
+        os.chdir(str(self.output_dir.parent))
+        try:
+            args = ["--input_dir", input_dir, "--output_dir", "cli_output", "--log", "CRITICAL"]
+            result = runner.invoke(cli_switch_from_geosource, args)
+            self.assertEqual(result.exit_code, 0, result.output)
+
+            errors = Path("cli_output", ERRORS_FILENAME).read_text(encoding="utf-8")
+            self.assertEqual(len(errors.splitlines()), 2)
+            self.assertIn(self.md_uuids[1], errors)
+            manifest = Path("cli_output", MANIFEST_FILENAME).read_text(encoding="utf-8")
+            self.assertEqual(len(manifest.splitlines()), 2)
+            self.assertNotIn(self.md_uuids[1], manifest)
+        finally:
+            os.chdir(cwd)
+
+    def test_migrate_transfer(self):
+        """Check attached files are checksummed and deduplicated."""
+        manifest = self.output_dir / "manifest.csv"
+        self.output_dir.mkdir(parents=True)
+        with AttachmentTransfer(manifest=manifest, algorithm="sha256") as transfer:
+            records = list(
+                migrate_metadata_folders(
+                    list_metadata_folder(self.input_dir),
+                    self.output_dir,
+                    jobs=2,
+                    transfer=transfer,
+                )
+            )
+        dest_files = [record.get("dest_files")[0] for record in records]
+        self.assertTrue(os.path.samefile(str(dest_files[0]), str(dest_files[1])))
+        self.assertEqual(list(self.output_dir.glob("**/*.part")), [])
+
+        rows = manifest.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(rows), 3)
+        checksums = {row.split(";")[4] for row in rows[1:]}
+        self.assertEqual(len(checksums), 1)
+        self.assertEqual(sum(1 for row in rows[1:] if row.split(";")[5]), 1)
+
+    def test_transfer_resume(self):
+        """Check files listed by an appended manifest are deduplicated."""
+        manifest = self.output_dir / "manifest.csv"
+        src_files = sorted(self.input_dir.glob("export/*/public/*.pdf"))
+        dest_files = [self.output_dir / "a.pdf", self.output_dir / "b.pdf"]
+        self.output_dir.mkdir(parents=True)
+        for append, src_file, dest_file in zip((False, True), src_files, dest_files):
+            with AttachmentTransfer(manifest=manifest, append=append) as transfer:
+                row = transfer.transfer(src_file, dest_file)
+        self.assertEqual(row.get("linked_to"), str(dest_files[0]))
+        self.assertTrue(os.path.samefile(str(dest_files[0]), str(dest_files[1])))
+        self.assertEqual(len(manifest.read_text(encoding="utf-8").splitlines()), 3)
@@ -0,0 +1,100 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+    
+    ```python
+    python -m unittest tests.test_xml_sniffer
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from pathlib import Path
+import unittest
+
+# modules
+from isogeo_xml_toolbelt.readers import MetadataIso19110, MetadataIso19139, get_reader
+from isogeo_xml_toolbelt.utils import sniff_metadata_schema
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+CSW_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<!-- harvested record -->
+<csw:GetRecordByIdResponse xmlns:csw="http://www.opengis.net/cat/csw/2.0.2">
+  <gmd:MD_Metadata xmlns:gmd="http://www.isotc211.org/2005/gmd">
+    <gmd:fileIdentifier />
+  </gmd:MD_Metadata>
+</csw:GetRecordByIdResponse>
+"""
+
+ISO_19115_3 = """<?xml version="1.0" encoding="UTF-8"?>
+<mdb:MD_Metadata xmlns:mdb="http://standards.iso.org/iso/19115/-3/mdb/2.0">
+  <mdb:metadataIdentifier />
+</mdb:MD_Metadata>
+"""
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestXmlSniffer(unittest.TestCase):
+    """Test the metadata schema sniffer."""
+
+    # standard methods
+    def setUp(self):
+        """Executed before each test."""
+        self.csw_path = Path("tests/output/sniff_csw.xml")
+        self.csw_path.write_text(CSW_RESPONSE, encoding="utf-8")
+        self.iso19115_3_path = Path("tests/output/sniff_19115-3.xml")
+        self.iso19115_3_path.write_text(ISO_19115_3, encoding="utf-8")
+        self.not_xml_path = Path("tests/output/sniff_not_xml.xml")
+        self.not_xml_path.write_text("Not a XML file", encoding="utf-8")
+
+    def tearDown(self):
+        """Executed after each test."""
+        pass
+
+    #  -- Tests ------------------------------------------------------------
+    def test_sniff(self):
+        """Check schemas are guessed from the root element."""
+        sniffed = sniff_metadata_schema(Path("tests/fixtures/iso19139/sample_19139.xml"))
+        self.assertEqual(sniffed.schema, "iso19139")
+        self.assertIsNone(sniffed.wrapper)
+        sniffed = sniff_metadata_schema(Path("tests/fixtures/iso19110/sample_19110.xml"))
+        self.assertEqual(sniffed.schema, "iso19110")
+        self.assertEqual(sniff_metadata_schema(self.iso19115_3_path).schema, "iso19115-3")
+        self.assertEqual(sniff_metadata_schema(self.not_xml_path).schema, None)
+
+    def test_sniff_wrapped(self):
+        """Check records wrapped into a CSW response are detected."""
+        sniffed = sniff_metadata_schema(self.csw_path)
+        self.assertEqual(sniffed.schema, "iso19139")
+        self.assertEqual(
+            sniffed.wrapper,
+            "{http://www.opengis.net/cat/csw/2.0.2}GetRecordByIdResponse",
+        )
+
+    def test_get_reader(self):
+        """Check readers are picked from the sniffed schema."""
+        self.assertIs(
+            get_reader(Path("tests/fixtures/iso19110/sample_19110.xml")),
+            MetadataIso19110,
+        )
+        self.assertIs(
+            get_reader(Path("tests/fixtures/iso19139/sample_19139.xml"), "iso19139.fra"),
+            MetadataIso19139,
+        )
+        self.assertIsNone(get_reader(self.csw_path))
+        self.assertIsNone(get_reader(self.iso19115_3_path))
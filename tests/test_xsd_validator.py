@@ -0,0 +1,128 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_xsd_validator
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from pathlib import Path
+import unittest
+
+# modules
+from isogeo_xml_toolbelt.validators import OfflineResolver, XsdValidator, validate_many
+from isogeo_xml_toolbelt.validators.xsd_validator import iter_report_rows
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+# ensure log and output dirs
+Path("tests/logs").mkdir(exist_ok=True)
+Path("tests/output").mkdir(exist_ok=True)
+
+# minimal schemas, gco being imported by its URL
+GMD_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:gco="http://www.isotc211.org/2005/gco"
+    targetNamespace="http://www.isotc211.org/2005/gmd" elementFormDefault="qualified">
+  <xs:import namespace="http://www.isotc211.org/2005/gco"
+      schemaLocation="http://www.isotc211.org/2005/gco/gco.xsd"/>
+  <xs:element name="MD_Metadata">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="fileIdentifier" type="gco:CharacterString_PropertyType"/>
+        <xs:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+GCO_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:gco="http://www.isotc211.org/2005/gco"
+    targetNamespace="http://www.isotc211.org/2005/gco" elementFormDefault="qualified">
+  <xs:element name="CharacterString" type="xs:string"/>
+  <xs:complexType name="CharacterString_PropertyType">
+    <xs:sequence>
+      <xs:element ref="gco:CharacterString"/>
+    </xs:sequence>
+  </xs:complexType>
+</xs:schema>
+"""
+
+INVALID_19139 = """<?xml version="1.0" encoding="UTF-8"?>
+<gmd:MD_Metadata xmlns:gmd="http://www.isotc211.org/2005/gmd">
+  <gmd:fileIdentifier />
+</gmd:MD_Metadata>
+"""
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestXsdValidator(unittest.TestCase):
+    """Test the XSD validator."""
+
+    # standard methods
+    @classmethod
+    def setUpClass(cls):
+        """Executed once before all tests: write the local copy of the schemas."""
+        cls.xsd_dir = Path("tests/output/xsd")
+        for url_path, content in (
+            ("www.isotc211.org/2005/gmd/gmd.xsd", GMD_XSD),
+            ("www.isotc211.org/2005/gco/gco.xsd", GCO_XSD),
+        ):
+            xsd_path = cls.xsd_dir / url_path
+            xsd_path.parent.mkdir(parents=True, exist_ok=True)
+            xsd_path.write_text(content, encoding="utf-8")
+        cls.invalid_path = Path("tests/output/invalid_19139.xml")
+        cls.invalid_path.write_text(INVALID_19139, encoding="utf-8")
+
+    # -- TESTS ---------------------------------------------------------
+    def test_resolver(self):
+        """URLs are resolved to their local copy only."""
+        resolver = OfflineResolver(self.xsd_dir)
+        self.assertEqual(
+            resolver.local_path("http://www.isotc211.org/2005/gco/gco.xsd"),
+            self.xsd_dir / "www.isotc211.org/2005/gco/gco.xsd",
+        )
+        self.assertIsNone(resolver.local_path("http://www.opengis.net/gml/3.2.1/gml.xsd"))
+        self.assertIsNone(resolver.local_path("gco.xsd"))
+
+    def test_validate_file(self):
+        """Errors are reported with their line, the schema being compiled once."""
+        validator = XsdValidator(self.xsd_dir)
+        valid = validator.validate_file(Path("tests/fixtures/iso19139/sample_19139.xml"))
+        self.assertEqual(valid.get("status"), "valid")
+        self.assertEqual(valid.get("schema"), "http://www.isotc211.org/2005/gmd/gmd.xsd")
+        invalid = validator.validate_file(self.invalid_path)
+        self.assertEqual(invalid.get("status"), "invalid")
+        self.assertEqual(invalid.get("errors")[0].line, 3)
+        self.assertEqual(len(validator.schemas), 1)
+
+    def test_validate_many(self):
+        """Files are validated over a pool of processes, in inputs order."""
+        inputs = [
+            Path("tests/fixtures/iso19139/sample_19139.xml"),
+            self.invalid_path,
+            Path("tests/fixtures/iso19110/sample_19110.xml"),  # schema not copied
+            Path("setup.py"),
+        ]
+        results = validate_many(inputs, xsd_dir=self.xsd_dir, jobs=2)
+        self.assertEqual(
+            [i.get("status") for i in results], ["valid", "invalid", "error", "unknown"]
+        )
+        rows = list(iter_report_rows(results))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1].get("type"), "SCHEMAV_ELEMENT_CONTENT")